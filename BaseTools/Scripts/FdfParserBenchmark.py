@@ -0,0 +1,177 @@
+## @file
+# Measure the parse time of FDF files, and compare it with another BaseTools.
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+'''
+FdfParserBenchmark
+'''
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import subprocess
+
+#
+# Globals for help information
+#
+__prog__        = 'FdfParserBenchmark'
+__version__     = '%s Version %s' % (__prog__, '0.1 ')
+__copyright__   = 'Copyright (c) 2017, Intel Corporation. All rights reserved.'
+__description__ = 'Measure the time of GenFds FdfParser to parse FDF files, and compare the time and result with the FdfParser of another BaseTools.\n'
+
+#
+# Parse the FDF file with the FdfParser in PythonDir, then print the best time
+# in seconds and a summary of the result
+#
+def ParseFdf (PythonDir, FdfFile, Macros, Repeat):
+  sys.path.insert (0, PythonDir)
+  from Common import EdkLogger
+  from Common import GlobalData
+  from Common.BuildToolError import FatalError
+  from Common.MultipleWorkspace import MultipleWorkspace as mws
+  from GenFds import FdfParser
+  from GenFds.GenFdsGlobalVariable import GenFdsGlobalVariable
+
+  EdkLogger.Initialize ()
+  EdkLogger.SetLevel (EdkLogger.QUIET)
+  Workspace = os.environ['WORKSPACE']
+  mws.setWs (Workspace, os.environ.get ('PACKAGES_PATH'))
+  GlobalData.gWorkspace = Workspace
+  GlobalData.gGlobalDefines = {'WORKSPACE' : Workspace}
+  GlobalData.gCommandLineDefines = Macros
+  GenFdsGlobalVariable.WorkSpaceDir = Workspace
+
+  Best = None
+  for Count in range (Repeat):
+    del FdfParser.AllIncludeFileList[:]
+    Start = time.time ()
+    Parser = FdfParser.FdfParser (FdfFile)
+    try:
+      Parser.ParseFile ()
+      Result = 'OK'
+    except FdfParser.Warning, X:
+      Result = 'Error: %s(%s): %s' % (X.FileName, X.LineNumber, X.Message)
+    except FatalError, X:
+      Result = 'Error: %s' % (X)
+    Elapsed = time.time () - Start
+    if Best == None or Elapsed < Best:
+      Best = Elapsed
+
+  Profile = Parser.Profile
+  print Best
+  print Result
+  print 'Lines: %s' % (hashlib.md5 (''.join (Profile.FileLinesList)).hexdigest ())
+  print 'FD: %s' % (' '.join (sorted (Profile.FdDict)))
+  print 'FV: %s' % (' '.join (sorted (Profile.FvDict)))
+  print 'Capsule: %s' % (' '.join (sorted (Profile.CapsuleDict)))
+  print 'Rule: %s' % (' '.join (sorted (Profile.RuleDict)))
+  print 'OptionRom: %s' % (' '.join (sorted (Profile.OptRomDict)))
+  print 'INF: %s' % (' '.join (Profile.InfList))
+
+#
+# Run ParseFdf in a new process, return the time and the summary of result
+#
+def RunParser (PythonDir, FdfFile, Macros, Repeat):
+  Command = [sys.executable, os.path.abspath (__file__), '--python-dir', PythonDir, '-n', str (Repeat)]
+  for Macro in Macros:
+    Command += ['-D', Macro]
+  Command.append (FdfFile)
+  Process = subprocess.Popen (Command, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+  Output, Error = Process.communicate ()
+  if Process.returncode != 0:
+    print >> sys.stderr, Error
+    print >> sys.stderr, 'Failed to run: %s' % (' '.join (Command))
+    sys.exit (1)
+  Elapsed, Summary = Output.split ('\n', 1)
+  return float (Elapsed), Summary
+
+#
+# Find the largest FDF files in the packages of workspace
+#
+def FindLargestFdf (Workspace, Count):
+  FdfList = []
+  for Root, Dirs, Files in os.walk (Workspace):
+    if Root == Workspace:
+      Dirs[:] = [Dir for Dir in Dirs if Dir not in ('Build', 'Conf', 'BaseTools')]
+    for File in Files:
+      if os.path.splitext (File)[1].lower () == '.fdf':
+        File = os.path.join (Root, File)
+        FdfList.append ((os.path.getsize (File), File))
+  FdfList.sort (reverse = True)
+  return [File for Size, File in FdfList[:Count]]
+
+if __name__ == '__main__':
+  DefaultPythonDir = os.path.join (os.path.dirname (os.path.abspath (__file__)), '..', 'Source', 'Python')
+
+  parser = argparse.ArgumentParser (prog = __prog__, version = __version__,
+                                    description = __description__ + __copyright__,
+                                    conflict_handler = 'resolve')
+  parser.add_argument ("FdfFiles", nargs = '*',
+                       help = "FDF files to be parsed.  Default is the largest FDF files in WORKSPACE.")
+  parser.add_argument ("-b", "--baseline", dest = 'Baseline',
+                       help = "Path of BaseTools/Source/Python of another BaseTools, whose FdfParser is compared with")
+  parser.add_argument ("-D", "--define", dest = 'Macros', action = 'append', default = [],
+                       help = "Macro in the format of MACRO=VALUE, for the macros defined in DSC file")
+  parser.add_argument ("-c", "--count", dest = 'Count', type = int, default = 5,
+                       help = "Number of the largest FDF files in WORKSPACE to parse, if no FDF file is given.  Default is 5.")
+  parser.add_argument ("-n", "--repeat", dest = 'Repeat', type = int, default = 3,
+                       help = "Times to parse each file, the best one is reported.  Default is 3.")
+  parser.add_argument ("--python-dir", dest = 'PythonDir',
+                       help = argparse.SUPPRESS)
+
+  args = parser.parse_args ()
+
+  if 'WORKSPACE' not in os.environ:
+    print >> sys.stderr, 'WORKSPACE is not set'
+    sys.exit (1)
+
+  if args.PythonDir:
+    Macros = {}
+    for Macro in args.Macros:
+      Name, Value = (Macro.split ('=', 1) + [''])[:2]
+      Macros[Name.strip ()] = Value.strip ()
+    ParseFdf (args.PythonDir, args.FdfFiles[0], Macros, args.Repeat)
+    sys.exit (0)
+
+  FdfFiles = args.FdfFiles
+  if not FdfFiles:
+    FdfFiles = FindLargestFdf (os.environ['WORKSPACE'], args.Count)
+
+  print '%-32s %10s %10s %10s  %s' % ('File', 'Size', 'Baseline', 'Time', 'Result')
+  TotalTime = [0.0, 0.0]
+  for FdfFile in FdfFiles:
+    FdfFile = os.path.abspath (FdfFile)
+    Elapsed, Summary = RunParser (os.path.abspath (DefaultPythonDir), FdfFile, args.Macros, args.Repeat)
+    TotalTime[1] += Elapsed
+    Baseline = '%10s' % 'N/A'
+    if args.Baseline:
+      BaselineElapsed, BaselineSummary = RunParser (os.path.abspath (args.Baseline), FdfFile, args.Macros, args.Repeat)
+      if BaselineSummary != Summary:
+        print >> sys.stderr, 'The results of %s are different' % (FdfFile)
+        print >> sys.stderr, BaselineSummary
+        print >> sys.stderr, Summary
+        sys.exit (1)
+      TotalTime[0] += BaselineElapsed
+      Baseline = '%9.3fs' % BaselineElapsed
+    print '%-32s %8dKB %s %9.3fs  %s' % (
+            os.path.basename (FdfFile)[-32:],
+            os.path.getsize (FdfFile) / 1024,
+            Baseline,
+            Elapsed,
+            Summary.split ('\n', 1)[0][:60]
+            )
+  if args.Baseline:
+    print '%-32s %10s %9.3fs %9.3fs' % ('Total', '', TotalTime[0], TotalTime[1])
+  else:
+    print '%-32s %10s %10s %9.3fs' % ('Total', '', '', TotalTime[1])
@@ -0,0 +1,195 @@
+## @file
+# Measure the time to generate the dynamic PCD database for platforms of growing size.
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+'''
+PcdDbBenchmark
+'''
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+import subprocess
+
+#
+# Globals for help information
+#
+__prog__        = 'PcdDbBenchmark'
+__version__     = '%s Version %s' % (__prog__, '0.1 ')
+__copyright__   = 'Copyright (c) 2017, Intel Corporation. All rights reserved.'
+__description__ = 'Measure the time of GenPcdDb to generate the PCD database of platforms with different number of dynamic PCDs, and compare the time and result with the GenPcdDb of another BaseTools.\n'
+
+#
+# The kinds of dynamic PCDs in the platform, one after another
+#
+PcdKindList = ['UINT8', 'UINT16', 'UINT32', 'UINT64', 'BOOLEAN', 'VOID*', 'HII', 'VPD']
+
+class Object (object):
+  def __init__ (self, **Attributes):
+    self.__dict__.update (Attributes)
+
+#
+# Create a platform with PcdNumber dynamic PCDs, each of which has value in
+# SkuNumber SKUs
+#
+def CreatePlatform (PcdNumber, SkuNumber):
+  from Common.Misc import SkuClass
+  from CommonDataClass.CommonClass import SkuInfoClass
+  from Workspace.BuildClassObject import PcdClassObject
+
+  SkuIds = {'DEFAULT' : ('0', 'DEFAULT', '')}
+  for Sku in range (1, SkuNumber):
+    SkuIds['SKU%d' % Sku] = (str (Sku), 'SKU%d' % Sku, 'DEFAULT')
+  SkuNames = sorted (SkuIds, key = lambda Name: int (SkuIds[Name][0]))
+
+  PcdList = []
+  PcdTokenNumber = {}
+  for Index in range (PcdNumber):
+    Kind = PcdKindList[Index % len (PcdKindList)]
+    TokenSpace = Index % 4
+    TokenSpaceGuidValue = '{0x%08x, 0x1234, 0x5678, {0x90, 0xab, 0xcd, 0xef, 0x01, 0x23, 0x45, 0x%02x}}' % (0x11111111 * (TokenSpace + 1), TokenSpace)
+    DatumType = Kind
+    Type = 'DynamicDefault'
+    MaxDatumSize = ''
+    if Kind in ('UINT16', 'UINT32') and Index % 3 == 0:
+      Type = 'DynamicExDefault'
+    elif Kind == 'VOID*':
+      MaxDatumSize = '32'
+    elif Kind == 'HII':
+      Type = 'DynamicHii'
+      DatumType = 'UINT32'
+    elif Kind == 'VPD':
+      Type = 'DynamicVpd'
+      DatumType = 'UINT32'
+
+    SkuInfoList = {}
+    for SkuName in SkuNames:
+      SkuId = SkuIds[SkuName][0]
+      # only some of PCDs have different values in SKUs
+      Value = Index
+      if Index % 5 == 0:
+        Value += int (SkuId)
+      if Kind == 'VOID*':
+        if Index % 2:
+          SkuInfo = SkuInfoClass (SkuName, SkuId, DefaultValue = 'L"Pcd%06d"' % Value)
+        else:
+          SkuInfo = SkuInfoClass (SkuName, SkuId, DefaultValue = '"Pcd%06d"' % Value)
+      elif Kind == 'HII':
+        SkuInfo = SkuInfoClass (SkuName, SkuId, VariableName = 'L"Var%d"' % (Index % 50),
+                                VariableGuidValue = TokenSpaceGuidValue,
+                                VariableOffset = str (Index / 50 * 4),
+                                HiiDefaultValue = '0x%X' % Value,
+                                VariableAttribute = 'NV,BS')
+      elif Kind == 'VPD':
+        SkuInfo = SkuInfoClass (SkuName, SkuId, VpdOffset = '0x%X' % (Index * 4))
+      elif Kind == 'BOOLEAN':
+        SkuInfo = SkuInfoClass (SkuName, SkuId, DefaultValue = str (Value % 2))
+      else:
+        SkuInfo = SkuInfoClass (SkuName, SkuId, DefaultValue = '0x%X' % (Value % 0x100))
+      SkuInfoList[SkuName] = SkuInfo
+
+    Pcd = PcdClassObject ('Pcd%d' % Index, 'gTokenSpace%dGuid' % TokenSpace, Type, DatumType, '',
+                          '0x%08X' % (Index + 1), MaxDatumSize, SkuInfoList, GuidValue = TokenSpaceGuidValue,
+                          validateranges = [], validlists = [], expressions = [])
+    if Index % 10 == 0:
+      Pcd.Phase = 'PEI'
+    PcdList.append (Pcd)
+
+  #
+  # PEI PCDs get the token numbers before DXE PCDs
+  #
+  for Phase in ('PEI', 'DXE'):
+    for Pcd in PcdList:
+      if Pcd.Phase == Phase:
+        PcdTokenNumber[Pcd.TokenCName, Pcd.TokenSpaceGuidCName] = len (PcdTokenNumber) + 1
+
+  Dsc = Object (SkuIds = SkuIds, SkuIdMgr = SkuClass ('ALL', SkuIds), PcdInfoFlag = True, VarCheckFlag = False)
+  return Object (Platform = Dsc, DynamicPcdList = PcdList, PcdTokenNumber = PcdTokenNumber, BuildDir = '')
+
+#
+# Generate the PCD database with the GenPcdDb in PythonDir, then print the best
+# time in seconds and the digest of result
+#
+def GeneratePcdDb (PythonDir, PcdNumber, SkuNumber, Repeat):
+  sys.path.insert (0, PythonDir)
+  from Common import EdkLogger
+  from AutoGen import GenPcdDb
+
+  EdkLogger.Initialize ()
+  EdkLogger.SetLevel (EdkLogger.QUIET)
+
+  Best = None
+  for Count in range (Repeat):
+    PlatformList = [CreatePlatform (PcdNumber, SkuNumber) for Phase in ('PEI', 'DXE')]
+    Start = time.time ()
+    Result = []
+    for Platform, Phase in zip (PlatformList, ('PEI', 'DXE')):
+      AutoGenH, AutoGenC, Buffer = GenPcdDb.NewCreatePcdDatabasePhaseSpecificAutoGen (Platform, Phase)
+      Result += [AutoGenH.String, AutoGenC.String, Buffer]
+    Elapsed = time.time () - Start
+    if Best == None or Elapsed < Best:
+      Best = Elapsed
+
+  print Best
+  print hashlib.md5 ('\0'.join (Result)).hexdigest ()
+
+#
+# Run GeneratePcdDb in a new process, return the time and the digest of result
+#
+def RunGenPcdDb (PythonDir, PcdNumber, SkuNumber, Repeat):
+  Command = [sys.executable, os.path.abspath (__file__), '--python-dir', PythonDir,
+             '-k', str (SkuNumber), '-n', str (Repeat), str (PcdNumber)]
+  Process = subprocess.Popen (Command, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+  Output, Error = Process.communicate ()
+  if Process.returncode != 0:
+    print >> sys.stderr, Error
+    print >> sys.stderr, 'Failed to run: %s' % (' '.join (Command))
+    sys.exit (1)
+  Elapsed, Digest = Output.split ()[:2]
+  return float (Elapsed), Digest
+
+if __name__ == '__main__':
+  DefaultPythonDir = os.path.join (os.path.dirname (os.path.abspath (__file__)), '..', 'Source', 'Python')
+
+  parser = argparse.ArgumentParser (prog = __prog__, version = __version__,
+                                    description = __description__ + __copyright__,
+                                    conflict_handler = 'resolve')
+  parser.add_argument ("PcdNumbers", nargs = '*', type = int, default = [250, 500, 1000, 2000],
+                       help = "Numbers of dynamic PCDs in the platforms.  Default is 250 500 1000 2000.")
+  parser.add_argument ("-b", "--baseline", dest = 'Baseline',
+                       help = "Path of BaseTools/Source/Python of another BaseTools, whose GenPcdDb is compared with")
+  parser.add_argument ("-k", "--sku", dest = 'SkuNumber', type = int, default = 4,
+                       help = "Number of SKUs in the platforms, including DEFAULT.  Default is 4.")
+  parser.add_argument ("-n", "--repeat", dest = 'Repeat', type = int, default = 3,
+                       help = "Times to generate each PCD database, the best one is reported.  Default is 3.")
+  parser.add_argument ("--python-dir", dest = 'PythonDir',
+                       help = argparse.SUPPRESS)
+
+  args = parser.parse_args ()
+
+  if args.PythonDir:
+    GeneratePcdDb (args.PythonDir, args.PcdNumbers[0], args.SkuNumber, args.Repeat)
+    sys.exit (0)
+
+  print '%10s %10s %10s %10s' % ('PCDs', 'SKUs', 'Baseline', 'Time')
+  for PcdNumber in args.PcdNumbers:
+    Elapsed, Digest = RunGenPcdDb (os.path.abspath (DefaultPythonDir), PcdNumber, args.SkuNumber, args.Repeat)
+    Baseline = '%10s' % 'N/A'
+    if args.Baseline:
+      BaselineElapsed, BaselineDigest = RunGenPcdDb (os.path.abspath (args.Baseline), PcdNumber, args.SkuNumber, args.Repeat)
+      if BaselineDigest != Digest:
+        print >> sys.stderr, 'The PCD databases of %d PCDs are different' % (PcdNumber)
+        sys.exit (1)
+      Baseline = '%9.3fs' % BaselineElapsed
+    print '%10d %10d %s %9.3fs' % (PcdNumber, args.SkuNumber, Baseline, Elapsed)
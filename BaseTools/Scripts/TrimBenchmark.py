@@ -0,0 +1,120 @@
+## @file
+# Compare the streaming and in-memory modes of Trim on preprocessed files.
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+'''
+TrimBenchmark
+'''
+
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+import argparse
+import subprocess
+
+#
+# Globals for help information
+#
+__prog__        = 'TrimBenchmark'
+__version__     = '%s Version %s' % (__prog__, '0.1 ')
+__copyright__   = 'Copyright (c) 2017, Intel Corporation. All rights reserved.'
+__description__ = 'Compare the time and peak memory of Trim in streaming and in-memory modes, on preprocessed .i files.\n'
+
+#
+# Run Trim once, return the time in seconds and the peak memory in KB, or None
+# if the peak memory can't be got on this OS
+#
+def RunTrim (TrimScript, Options, InputFile, OutputFile):
+  Command = [sys.executable, TrimScript] + Options + ['-o', OutputFile, InputFile]
+  Start = time.time ()
+  Process = subprocess.Popen (Command)
+  if hasattr (os, 'wait4'):
+    Pid, Status, Usage = os.wait4 (Process.pid, 0)
+    PeakMemory = Usage.ru_maxrss
+    Process.returncode = Status
+  else:
+    Process.wait ()
+    Status = Process.returncode
+    PeakMemory = None
+  Elapsed = time.time () - Start
+  if Status != 0:
+    print >> sys.stderr, 'Failed to run: %s' % (' '.join (Command))
+    sys.exit (1)
+  return Elapsed, PeakMemory
+
+def FormatMemory (PeakMemory):
+  if PeakMemory == None:
+    return '%10s' % 'N/A'
+  return '%8dKB' % PeakMemory
+
+if __name__ == '__main__':
+  DefaultTrim = os.path.join (os.path.dirname (os.path.abspath (__file__)), '..', 'Source', 'Python', 'Trim', 'Trim.py')
+
+  parser = argparse.ArgumentParser (prog = __prog__, version = __version__,
+                                    description = __description__ + __copyright__,
+                                    conflict_handler = 'resolve')
+  parser.add_argument ("InputFiles", nargs = '+',
+                       help = "Preprocessed files to be trimmed")
+  parser.add_argument ("-r", "--vfr-file", dest = 'Vfr', action = 'store_true',
+                       help = "The input files are preprocessed VFR files, instead of source code")
+  parser.add_argument ("-c", "--convert-hex", dest = 'ConvertHex', action = 'store_true',
+                       help = "Pass --convert-hex to Trim")
+  parser.add_argument ("-l", "--trim-long", dest = 'TrimLong', action = 'store_true',
+                       help = "Pass --trim-long to Trim")
+  parser.add_argument ("-n", "--repeat", dest = 'Repeat', type = int, default = 3,
+                       help = "Times to run Trim in each mode, the best one is reported.  Default is 3.")
+  parser.add_argument ("-t", "--trim", dest = 'TrimScript', default = DefaultTrim,
+                       help = "Path of Trim.py.  Default is the one in this BaseTools.")
+
+  args = parser.parse_args ()
+
+  if args.Vfr:
+    Options = ['-r']
+  else:
+    Options = ['-s']
+  if args.ConvertHex:
+    Options.append ('-c')
+  if args.TrimLong:
+    Options.append ('-l')
+
+  TempDir = tempfile.mkdtemp ()
+  try:
+    print '%-32s %10s %10s %10s %10s %10s' % ('File', 'Size', 'Streaming', 'Memory', 'In-memory', 'Memory')
+    TotalTime = [0.0, 0.0]
+    for InputFile in args.InputFiles:
+      Result = []
+      for Index, ModeOptions in enumerate ([Options, Options + ['--in-memory']]):
+        OutputFile = os.path.join (TempDir, '%d.iii' % Index)
+        Best = None
+        for Count in range (args.Repeat):
+          Elapsed, PeakMemory = RunTrim (args.TrimScript, ModeOptions, InputFile, OutputFile)
+          if Best == None or Elapsed < Best[0]:
+            Best = (Elapsed, PeakMemory)
+        Result.append (Best)
+        TotalTime[Index] += Best[0]
+      if not filecmp.cmp (os.path.join (TempDir, '0.iii'), os.path.join (TempDir, '1.iii'), shallow = False):
+        print >> sys.stderr, 'The outputs of %s are different' % (InputFile)
+        sys.exit (1)
+      print '%-32s %8dKB %9.3fs %s %9.3fs %s' % (
+              os.path.basename (InputFile)[-32:],
+              os.path.getsize (InputFile) / 1024,
+              Result[0][0],
+              FormatMemory (Result[0][1]),
+              Result[1][0],
+              FormatMemory (Result[1][1])
+              )
+    print '%-32s %10s %9.3fs %10s %9.3fs' % ('Total', '', TotalTime[0], '', TotalTime[1])
+  finally:
+    shutil.rmtree (TempDir, True)
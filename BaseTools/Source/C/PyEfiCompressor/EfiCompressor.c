@@ -12,8 +12,14 @@ WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
 
 **/
 
+#define PY_SSIZE_T_CLEAN
 #include <Python.h>
 #include <Decompress.h>
+#include "Sdk/C/Alloc.h"
+#include "Sdk/C/LzmaEnc.h"
+#include "Sdk/C/Bra.h"
+
+#define LZMA_HEADER_SIZE (LZMA_PROPS_SIZE + 8)
 
 /*
  UefiDecompress(data_buffer, size, original_size)
@@ -193,14 +199,98 @@ FrameworkCompress(
   return NULL;
 }
 
+/*
+ LzmaCompress(data_buffer, x86_convert)
+
+ The result is the same as the one of LzmaCompress tool: encoder properties,
+ 64-bit size of original data and the encoded data.
+*/
+STATIC
+PyObject*
+LzmaCompress(
+  PyObject    *Self,
+  PyObject    *Args
+  )
+{
+  UINT8         *SrcBuf;
+  Py_ssize_t    SrcDataSize;
+  INT32         X86Convert;
+  UINT8         *FilteredBuf;
+  UINT8         *DstBuf;
+  size_t        DstDataSize;
+  size_t        EncodedSize;
+  size_t        PropsSize;
+  UINT32        X86State;
+  CLzmaEncProps Props;
+  SRes          Res;
+  INT32         Index;
+  PyObject      *ReturnValue;
+
+  X86Convert = 0;
+  if (!PyArg_ParseTuple(Args, "s#|i", &SrcBuf, &SrcDataSize, &X86Convert)) {
+    return NULL;
+  }
+  if (SrcDataSize == 0) {
+    PyErr_SetString(PyExc_Exception, "No data to compress\n");
+    return NULL;
+  }
+
+  // the same buffer size as LzmaCompress tool, 105% of original size + 64KB
+  DstDataSize = (size_t)SrcDataSize / 20 * 21 + (1 << 16);
+  DstBuf = PyMem_Malloc(DstDataSize);
+  FilteredBuf = NULL;
+  if (X86Convert) {
+    FilteredBuf = PyMem_Malloc(SrcDataSize);
+  }
+  if (DstBuf == NULL || (X86Convert && FilteredBuf == NULL)) {
+    PyMem_Free(DstBuf);
+    PyMem_Free(FilteredBuf);
+    PyErr_SetString(PyExc_Exception, "Not enough memory\n");
+    return NULL;
+  }
+
+  for (Index = 0; Index < 8; Index++) {
+    DstBuf[LZMA_PROPS_SIZE + Index] = (UINT8)((UINT64)SrcDataSize >> (8 * Index));
+  }
+
+  // encoding doesn't touch any Python object, let other threads run meanwhile
+  Py_BEGIN_ALLOW_THREADS
+  if (X86Convert) {
+    memcpy(FilteredBuf, SrcBuf, SrcDataSize);
+    x86_Convert_Init(X86State);
+    x86_Convert(FilteredBuf, (SizeT)SrcDataSize, 0, &X86State, 1);
+  }
+  LzmaEncProps_Init(&Props);
+  LzmaEncProps_Normalize(&Props);
+  EncodedSize = DstDataSize - LZMA_HEADER_SIZE;
+  PropsSize = LZMA_PROPS_SIZE;
+  Res = LzmaEncode(DstBuf + LZMA_HEADER_SIZE, &EncodedSize,
+          X86Convert ? FilteredBuf : SrcBuf, (SizeT)SrcDataSize,
+          &Props, DstBuf, &PropsSize, 0,
+          NULL, &g_Alloc, &g_Alloc);
+  Py_END_ALLOW_THREADS
+
+  if (Res != SZ_OK) {
+    PyErr_SetString(PyExc_Exception, "Failed to compress\n");
+    ReturnValue = NULL;
+  } else {
+    ReturnValue = PyString_FromStringAndSize((CONST INT8*)DstBuf, (Py_ssize_t)(LZMA_HEADER_SIZE + EncodedSize));
+  }
+  PyMem_Free(DstBuf);
+  PyMem_Free(FilteredBuf);
+  return ReturnValue;
+}
+
 STATIC INT8 DecompressDocs[] = "Decompress(): Decompress data using UEFI standard algorithm\n";
 STATIC INT8 CompressDocs[] = "Compress(): Compress data using UEFI standard algorithm\n";
+STATIC INT8 LzmaCompressDocs[] = "LzmaCompress(): Compress data in the same way as LzmaCompress tool\n";
 
 STATIC PyMethodDef EfiCompressor_Funcs[] = {
   {"UefiDecompress", (PyCFunction)UefiDecompress, METH_VARARGS, DecompressDocs},
   {"UefiCompress", (PyCFunction)UefiCompress, METH_VARARGS, DecompressDocs},
   {"FrameworkDecompress", (PyCFunction)FrameworkDecompress, METH_VARARGS, DecompressDocs},
   {"FrameworkCompress", (PyCFunction)FrameworkCompress, METH_VARARGS, DecompressDocs},
+  {"LzmaCompress", (PyCFunction)LzmaCompress, METH_VARARGS, LzmaCompressDocs},
   {NULL, NULL, 0, NULL}
 };
 
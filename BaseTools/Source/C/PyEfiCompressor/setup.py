@@ -22,6 +22,7 @@ if 'BASE_TOOLS_PATH' not in os.environ:
     raise "Please define BASE_TOOLS_PATH to the root of base tools tree"
 
 BaseToolsDir = os.environ['BASE_TOOLS_PATH']
+LzmaSdkDir = os.path.join(BaseToolsDir, 'Source', 'C', 'LzmaCompress', 'Sdk', 'C')
 setup(
     name="EfiCompressor",
     version="0.01",
@@ -30,13 +31,19 @@ setup(
             'EfiCompressor',
             sources=[
                 os.path.join(BaseToolsDir, 'Source', 'C', 'Common', 'Decompress.c'),
+                os.path.join(LzmaSdkDir, 'Alloc.c'),
+                os.path.join(LzmaSdkDir, 'LzFind.c'),
+                os.path.join(LzmaSdkDir, 'LzmaEnc.c'),
+                os.path.join(LzmaSdkDir, 'Bra86.c'),
                 'EfiCompressor.c'
                 ],
             include_dirs=[
                 os.path.join(BaseToolsDir, 'Source', 'C', 'Include'),
                 os.path.join(BaseToolsDir, 'Source', 'C', 'Include', 'Ia32'),
-                os.path.join(BaseToolsDir, 'Source', 'C', 'Common')
+                os.path.join(BaseToolsDir, 'Source', 'C', 'Common'),
+                os.path.join(BaseToolsDir, 'Source', 'C', 'LzmaCompress')
                 ],
+            define_macros=[('_7ZIP_ST', None)],
             )
         ],
   )
@@ -45,6 +45,7 @@ import InfSectionParser
 import datetime
 import hashlib
 from GenVar import VariableMgr,var_info
+from Common.BinaryCache import BinaryCache
 
 ## Regular expression for splitting Dependency Expression string into tokens
 gDepexTokenPattern = re.compile("(\(|\)|\w+| \S+\.inf)")
@@ -664,10 +665,7 @@ class WorkspaceAutoGen(AutoGen):
             for files in AllWorkSpaceMetaFiles:
                 if files.endswith('.dec'):
                     continue
-                f = open(files, 'r')
-                Content = f.read()
-                f.close()
-                m.update(Content)
+                m.update(GlobalData.gFileDigestCache.GetDigest(files))
             SaveFileOnChange(os.path.join(self.BuildDir, 'AutoGen.hash'), m.hexdigest(), True)
             GlobalData.gPlatformHash = m.hexdigest()
 
@@ -689,21 +687,16 @@ class WorkspaceAutoGen(AutoGen):
         CreateDirectory(PkgDir)
         HashFile = os.path.join(PkgDir, Pkg.PackageName + '.hash')
         m = hashlib.md5()
-        # Get .dec file's hash value
-        f = open(Pkg.MetaFile.Path, 'r')
-        Content = f.read()
-        f.close()
-        m.update(Content)
-        # Get include files hash value
+        # Get .dec file and include files
+        FileList = [Pkg.MetaFile.Path]
         if Pkg.Includes:
             for inc in Pkg.Includes:
                 for Root, Dirs, Files in os.walk(str(inc)):
                     for File in Files:
-                        File_Path = os.path.join(Root, File)
-                        f = open(File_Path, 'r')
-                        Content = f.read()
-                        f.close()
-                        m.update(Content)
+                        FileList.append(os.path.join(Root, File))
+        GlobalData.gFileDigestCache.Prefetch(FileList)
+        for File in FileList:
+            m.update(GlobalData.gFileDigestCache.GetDigest(File))
         SaveFileOnChange(HashFile, m.hexdigest(), True)
         if Pkg.PackageName not in GlobalData.gPackageHash[Pkg.Arch]:
             GlobalData.gPackageHash[Pkg.Arch][Pkg.PackageName] = m.hexdigest()
@@ -2862,6 +2855,7 @@ class ModuleAutoGen(AutoGen):
         self._VfrFileList = None
         self._IdfFileList = None
         self._SourceFileList  = None
+        self._HashFileList    = None
         self._ObjectFileList  = None
         self._BinaryFileList  = None
 
@@ -4288,16 +4282,26 @@ class ModuleAutoGen(AutoGen):
         if GlobalData.gBinCacheDest:
             self.CopyModuleToCache()
 
+    ## Key of the module in binary cache
+    #
+    # Module hash doesn't cover build target and tool chain, and two modules
+    # may have the same content, so they are part of the key too.
+    #
+    def _GetBinaryCacheKey(self):
+        return BinaryCache.GetKey(GlobalData.gModuleHash[self.Arch][self.Name], self.Arch, self.BuildTarget,
+                                  self.ToolChain, path.join(self.SourceDir, self.MetaFile.Name))
+
     def CopyModuleToCache(self):
-        FileDir = path.join(GlobalData.gBinCacheDest, self.Arch, self.SourceDir, self.MetaFile.BaseName)
-        CreateDirectory (FileDir)
+        if not GlobalData.gModuleHash.get(self.Arch, {}).get(self.Name):
+            return
+        FileList = []
         HashFile = path.join(self.BuildDir, self.Name + '.hash')
         ModuleFile = path.join(self.OutputDir, self.Name + '.inf')
         if os.path.exists(HashFile):
-            shutil.copy2(HashFile, FileDir)
+            FileList.append(HashFile)
         if os.path.exists(ModuleFile):
-            shutil.copy2(ModuleFile, FileDir)
-        if not self.OutputFile:
+            FileList.append(ModuleFile)
+        if not self.OutputFile and os.path.exists(ModuleFile):
             Ma = self.Workspace.BuildDatabase[PathClass(ModuleFile), self.Arch, self.BuildTarget, self.ToolChain]
             self.OutputFile = Ma.Binaries
         if self.OutputFile:
@@ -4306,30 +4310,21 @@ class ModuleAutoGen(AutoGen):
                 if not os.path.isabs(File):
                     File = os.path.join(self.OutputDir, File)
                 if os.path.exists(File):
-                    shutil.copy2(File, FileDir)
+                    FileList.append(File)
+        GlobalData.gBinCache.Store(self._GetBinaryCacheKey(), [(path.basename(File), File) for File in FileList])
 
     def AttemptModuleCacheCopy(self):
         if self.IsBinaryModule:
             return False
-        FileDir = path.join(GlobalData.gBinCacheSource, self.Arch, self.SourceDir, self.MetaFile.BaseName)
-        HashFile = path.join(FileDir, self.Name + '.hash')
-        if os.path.exists(HashFile):
-            f = open(HashFile, 'r')
-            CacheHash = f.read()
-            f.close()
-            if GlobalData.gModuleHash[self.Arch][self.Name]:
-                if CacheHash == GlobalData.gModuleHash[self.Arch][self.Name]:
-                    for root, dir, files in os.walk(FileDir):
-                        for f in files:
-                            if self.Name + '.hash' in f:
-                                shutil.copy2(HashFile, self.BuildDir)
-                            else:
-                                File = path.join(root, f)
-                                shutil.copy2(File, self.OutputDir)
-                    if self.Name == "PcdPeim" or self.Name == "PcdDxe":
-                        CreatePcdDatabaseCode(self, TemplateString(), TemplateString())
-                    return True
-        return False
+        if not GlobalData.gModuleHash[self.Arch][self.Name]:
+            return False
+        HashFileName = self.Name + '.hash'
+        if not GlobalData.gBinCache.Retrieve(self._GetBinaryCacheKey(),
+                                             lambda Name: self.BuildDir if Name == HashFileName else self.OutputDir):
+            return False
+        if self.Name == "PcdPeim" or self.Name == "PcdDxe":
+            CreatePcdDatabaseCode(self, TemplateString(), TemplateString())
+        return True
 
     ## Create makefile for the module and its dependent libraries
     #
@@ -4460,6 +4455,20 @@ class ModuleAutoGen(AutoGen):
                         self._ApplyBuildRule(Lib.Target, TAB_UNKNOWN_FILE)
         return self._LibraryAutoGenList
 
+    ## Return the list of source files and files included by them, for module hash
+    def _GetHashFileList(self):
+        if self._HashFileList == None:
+            FileSet = set()
+            FileCache = {}
+            SearchPathList = self.IncludePathList + self.BuildOptionIncPathList
+            for File in self.SourceFileList:
+                FileSet.add(File.Path)
+                # AutoGen.h is not included here, its content comes from meta files only
+                for Dependency in GenMake.GetDependencyList(self, FileCache, File, [], SearchPathList):
+                    FileSet.add(str(Dependency))
+            self._HashFileList = sorted(FileSet)
+        return self._HashFileList
+
     def GenModuleHash(self):
         if self.Arch not in GlobalData.gModuleHash:
             GlobalData.gModuleHash[self.Arch] = {}
@@ -4480,17 +4489,10 @@ class ModuleAutoGen(AutoGen):
                 m.update(GlobalData.gModuleHash[self.Arch][Lib.Name])
 
         # Add Module self
-        f = open(str(self.MetaFile), 'r')
-        Content = f.read()
-        f.close()
-        m.update(Content)
-        # Add Module's source files
-        if self.SourceFileList:
-            for File in self.SourceFileList:
-                f = open(str(File), 'r')
-                Content = f.read()
-                f.close()
-                m.update(Content)
+        m.update(GlobalData.gFileDigestCache.GetDigest(self.MetaFile))
+        # Add Module's source files and the files included by them
+        for File in self.HashFileList:
+            m.update(GlobalData.gFileDigestCache.GetDigest(File))
 
         ModuleHashFile = path.join(self.BuildDir, self.Name + ".hash")
         if self.Name not in GlobalData.gModuleHash[self.Arch]:
@@ -4582,6 +4584,7 @@ class ModuleAutoGen(AutoGen):
     UnicodeFileList = property(_GetUnicodeFileList)
     VfrFileList     = property(_GetVfrFileList)
     SourceFileList  = property(_GetSourceFileList)
+    HashFileList    = property(_GetHashFileList)
     BinaryFileList  = property(_GetBinaryFiles) # FileType : [File List]
     Targets         = property(_GetTargets)
     IntroTargetList = property(_GetIntroTargetList)
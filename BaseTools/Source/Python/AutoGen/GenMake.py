@@ -17,12 +17,14 @@ import Common.LongFilePathOs as os
 import sys
 import string
 import re
+import time
 import os.path as path
 from Common.LongFilePathSupport import OpenLongFilePath as open
 from Common.MultipleWorkspace import MultipleWorkspace as mws
 from Common.BuildToolError import *
 from Common.Misc import *
 from Common.String import *
+from Common.FileDigestCache import FileDigestCache
 from BuildEngine import *
 import Common.GlobalData as GlobalData
 
@@ -34,6 +36,50 @@ gMacroPattern = re.compile("([_A-Z][_A-Z0-9]*)[ \t]*\((.+)\)", re.UNICODE)
 
 gIsFileMap = {}
 
+## Files included by a file and found in given search path list
+#
+#   (file path, search path tuple) : [PathClass of included files]
+#
+gIncludeResolution = {}
+
+## Entries added into gIsFileMap, gIncludeResolution and gDependencyDatabase
+#
+#   It's only recorded in AutoGen worker processes, so that the entries found
+# by them can be merged into the build process.
+#
+#   ({file path : is file}, {(file path, search path tuple) : [PathClass]}, {file path : (modified time, size, [names])})
+#
+gIncludeIndexUpdates = None
+
+## Start recording the entries added into the include index
+#
+def StartIncludeIndexUpdates():
+    global gIncludeIndexUpdates
+    gIncludeIndexUpdates = ({}, {}, {})
+
+## Get the entries added into the include index since last call
+#
+#   @retval     tuple           The entries of gIsFileMap, gIncludeResolution and gDependencyDatabase
+#
+def GetIncludeIndexUpdates():
+    global gIncludeIndexUpdates
+    Updates = gIncludeIndexUpdates
+    if Updates is not None:
+        gIncludeIndexUpdates = ({}, {}, {})
+    return Updates
+
+## Merge the entries added into the include index by another process
+#
+#   @param      Updates         The entries got by GetIncludeIndexUpdates()
+#
+def MergeIncludeIndexUpdates(Updates):
+    if not Updates:
+        return
+    IsFileMap, IncludeResolution, DependencyDatabase = Updates
+    gIsFileMap.update(IsFileMap)
+    gIncludeResolution.update(IncludeResolution)
+    gDependencyDatabase.update(DependencyDatabase)
+
 ## pattern for include style in Edk.x code
 gProtocolDefinition = "Protocol/%(HeaderKey)s/%(HeaderKey)s.h"
 gGuidDefinition = "Guid/%(HeaderKey)s/%(HeaderKey)s.h"
@@ -990,10 +1036,6 @@ cleanlib:
 
     ## Find dependencies for one source file
     #
-    #  By searching recursively "#include" directive in file, find out all the
-    #  files needed by given source file. The dependecies will be only searched
-    #  in given search path list.
-    #
     #   @param      File            The source file
     #   @param      ForceInculeList The list of files which will be included forcely
     #   @param      SearchPathList  The list of search path
@@ -1001,62 +1043,48 @@ cleanlib:
     #   @retval     list            The list of files the given source file depends on
     #
     def GetDependencyList(self, File, ForceList, SearchPathList):
-        EdkLogger.debug(EdkLogger.DEBUG_1, "Try to get dependency files for %s" % File)
-        FileStack = [File] + ForceList
-        DependencySet = set()
+        return GetDependencyList(self._AutoGenObject, self.FileCache, File, ForceList, SearchPathList)
 
-        if self._AutoGenObject.Arch not in gDependencyDatabase:
-            gDependencyDatabase[self._AutoGenObject.Arch] = {}
-        DepDb = gDependencyDatabase[self._AutoGenObject.Arch]
-
-        while len(FileStack) > 0:
-            F = FileStack.pop()
+    _TemplateDict = property(_CreateTemplateDict)
 
-            FullPathDependList = []
-            if F in self.FileCache:
-                for CacheFile in self.FileCache[F]:
-                    FullPathDependList.append(CacheFile)
-                    if CacheFile not in DependencySet:
-                        FileStack.append(CacheFile)
-                DependencySet.update(FullPathDependList)
-                continue
+## Find dependencies for one source file
+#
+#  By searching recursively "#include" directive in file, find out all the
+#  files needed by given source file. The dependecies will be only searched
+#  in given search path list.
+#
+#   @param      AutoGenObject   The ModuleAutoGen object the source file belongs to
+#   @param      FileCache       The dict caching dependencies of files for the module
+#   @param      File            The source file
+#   @param      ForceInculeList The list of files which will be included forcely
+#   @param      SearchPathList  The list of search path
+#
+#   @retval     list            The list of files the given source file depends on
+#
+def GetDependencyList(AutoGenObject, FileCache, File, ForceList, SearchPathList):
+    EdkLogger.debug(EdkLogger.DEBUG_1, "Try to get dependency files for %s" % File)
+    FileStack = [File] + ForceList
+    DependencySet = set()
+    SearchPathTuple = tuple(SearchPathList)
 
-            CurrentFileDependencyList = []
-            if F in DepDb:
-                CurrentFileDependencyList = DepDb[F]
-            else:
-                try:
-                    Fd = open(F.Path, 'r')
-                except BaseException, X:
-                    EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=F.Path + "\n\t" + str(X))
-
-                FileContent = Fd.read()
-                Fd.close()
-                if len(FileContent) == 0:
-                    continue
+    while len(FileStack) > 0:
+        F = FileStack.pop()
 
-                if FileContent[0] == 0xff or FileContent[0] == 0xfe:
-                    FileContent = unicode(FileContent, "utf-16")
-                IncludedFileList = gIncludePattern.findall(FileContent)
-
-                for Inc in IncludedFileList:
-                    Inc = Inc.strip()
-                    # if there's macro used to reference header file, expand it
-                    HeaderList = gMacroPattern.findall(Inc)
-                    if len(HeaderList) == 1 and len(HeaderList[0]) == 2:
-                        HeaderType = HeaderList[0][0]
-                        HeaderKey = HeaderList[0][1]
-                        if HeaderType in gIncludeMacroConversion:
-                            Inc = gIncludeMacroConversion[HeaderType] % {"HeaderKey" : HeaderKey}
-                        else:
-                            # not known macro used in #include, always build the file by
-                            # returning a empty dependency
-                            self.FileCache[File] = []
-                            return []
-                    Inc = os.path.normpath(Inc)
-                    CurrentFileDependencyList.append(Inc)
-                DepDb[F] = CurrentFileDependencyList
+        if F in FileCache:
+            FullPathDependList = FileCache[F]
+        elif (F.Path, SearchPathTuple) in gIncludeResolution:
+            # resolved for another module with the same search path list
+            FullPathDependList = gIncludeResolution[F.Path, SearchPathTuple]
+            FileCache[F] = FullPathDependList
+        else:
+            CurrentFileDependencyList = GetIncludedNameList(F)
+            if CurrentFileDependencyList == None:
+                # not known macro used in #include, always build the file by
+                # returning a empty dependency
+                FileCache[File] = []
+                return []
 
+            FullPathDependList = []
             CurrentFilePath = F.Dir
             PathList = [CurrentFilePath] + SearchPathList
             for Inc in CurrentFileDependencyList:
@@ -1068,29 +1096,86 @@ cleanlib:
                     # If isfile is called too many times, the performance is slow down.
                     elif not os.path.isfile(FilePath):
                         gIsFileMap[FilePath] = False
+                        if gIncludeIndexUpdates is not None:
+                            gIncludeIndexUpdates[0][FilePath] = False
                         continue
                     else:
                         gIsFileMap[FilePath] = True
-                    FilePath = PathClass(FilePath)
-                    FullPathDependList.append(FilePath)
-                    if FilePath not in DependencySet:
-                        FileStack.append(FilePath)
+                        if gIncludeIndexUpdates is not None:
+                            gIncludeIndexUpdates[0][FilePath] = True
+                    FullPathDependList.append(PathClass(FilePath))
                     break
                 else:
                     EdkLogger.debug(EdkLogger.DEBUG_9, "%s included by %s was not found "\
                                     "in any given path:\n\t%s" % (Inc, F, "\n\t".join(SearchPathList)))
-
-            self.FileCache[F] = FullPathDependList
-            DependencySet.update(FullPathDependList)
-
-        DependencySet.update(ForceList)
-        if File in DependencySet:
-            DependencySet.remove(File)
-        DependencyList = list(DependencySet)  # remove duplicate ones
-
-        return DependencyList
-
-    _TemplateDict = property(_CreateTemplateDict)
+            gIncludeResolution[F.Path, SearchPathTuple] = FullPathDependList
+            if gIncludeIndexUpdates is not None:
+                gIncludeIndexUpdates[1][F.Path, SearchPathTuple] = FullPathDependList
+            FileCache[F] = FullPathDependList
+
+        for FilePath in FullPathDependList:
+            if FilePath not in DependencySet:
+                FileStack.append(FilePath)
+        DependencySet.update(FullPathDependList)
+
+    DependencySet.update(ForceList)
+    if File in DependencySet:
+        DependencySet.remove(File)
+    DependencyList = list(DependencySet)  # remove duplicate ones
+
+    return DependencyList
+
+## Find the names of files included by a file
+#
+#   The names are kept in gDependencyDatabase together with the modified time
+# and size of the file, and used again as long as the file is not changed.
+# gDependencyDatabase is restored from and saved to Conf/.cache by build, so
+# each file is only scanned again after it's changed. Like FileDigestCache, the
+# names of a file modified in last seconds are not kept.
+#
+#   @param      File            The PathClass object of the file
+#
+#   @retval     list            The normalized names in #include directives
+#   @retval     None            If macro not known is used in #include directive
+#
+def GetIncludedNameList(File):
+    try:
+        Stat = os.stat(File.Path)
+    except BaseException, X:
+        EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=File.Path + "\n\t" + str(X))
+    Entry = gDependencyDatabase.get(File.Path)
+    if Entry and Entry[0] == Stat.st_mtime and Entry[1] == Stat.st_size:
+        return Entry[2]
+
+    try:
+        Fd = open(File.Path, 'r')
+    except BaseException, X:
+        EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=File.Path + "\n\t" + str(X))
+    FileContent = Fd.read()
+    Fd.close()
+
+    IncludedNameList = []
+    if len(FileContent) != 0:
+        if FileContent[0] == 0xff or FileContent[0] == 0xfe:
+            FileContent = unicode(FileContent, "utf-16")
+        for Inc in gIncludePattern.findall(FileContent):
+            Inc = Inc.strip()
+            # if there's macro used to reference header file, expand it
+            HeaderList = gMacroPattern.findall(Inc)
+            if len(HeaderList) == 1 and len(HeaderList[0]) == 2:
+                HeaderType = HeaderList[0][0]
+                HeaderKey = HeaderList[0][1]
+                if HeaderType in gIncludeMacroConversion:
+                    Inc = gIncludeMacroConversion[HeaderType] % {"HeaderKey" : HeaderKey}
+                else:
+                    IncludedNameList = None
+                    break
+            IncludedNameList.append(os.path.normpath(Inc))
+    if Stat.st_mtime < time.time() - FileDigestCache._RACY_TIME_:
+        gDependencyDatabase[File.Path] = (Stat.st_mtime, Stat.st_size, IncludedNameList)
+        if gIncludeIndexUpdates is not None:
+            gIncludeIndexUpdates[2][File.Path] = gDependencyDatabase[File.Path]
+    return IncludedNameList
 
 ## CustomMakefile class
 #
@@ -1544,6 +1629,10 @@ class TopLevelMakefile(BuildFile):
             ExtraOption += " -c"
         if GlobalData.gEnableGenfdsMultiThread:
             ExtraOption += " --genfds-multi-thread"
+        if GlobalData.gGenFdsCache:
+            ExtraOption += " --genfds-cache %s" % GlobalData.gGenFdsCache
+            if GlobalData.gGenFdsCacheSize:
+                ExtraOption += " --genfds-cache-size %d" % GlobalData.gGenFdsCacheSize
         if GlobalData.gIgnoreSource:
             ExtraOption += " --ignore-sources"
 
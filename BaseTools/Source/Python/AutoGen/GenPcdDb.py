@@ -14,6 +14,7 @@ from StringIO import StringIO
 from Common.Misc import *
 from Common.String import StringToArray
 from struct import pack
+from struct import pack_into
 from ValidCheckingInfoObject import VAR_CHECK_PCD_VARIABLE_TAB_CONTAINER
 from ValidCheckingInfoObject import VAR_CHECK_PCD_VARIABLE_TAB
 from ValidCheckingInfoObject import VAR_VALID_OBJECT_FACTORY
@@ -271,6 +272,18 @@ def toHex(s):
         return reduce(lambda x,y:x+y, lst)
     else:
         return 'empty'
+
+## Pack a list of values in the same format at one time
+#
+#   @param      PackStr     The format of the value, or the fields of a structure value, like "=L" or "=LHH"
+#   @param      ValueList   The values of all fields of all items, one after another
+#
+#   @retval     Buffer      The packed data
+#
+def PackValueList(PackStr, ValueList):
+    Count = len(ValueList) / (len(PackStr) - 1)
+    return pack(PackStr[0] + PackStr[1:] * Count, *[GetIntegerValue(Value) for Value in ValueList])
+
 ## DbItemList
 #
 #  The class holds the Pcd database items. ItemSize if not zero should match the item datum type in the C structure. 
@@ -289,19 +302,35 @@ class DbItemList:
         self.DataList = DataList
         self.RawDataList = RawDataList
         self.ListSize = 0
+        self.OffsetList = None
+
+    ## Get the size of each item, for the list of variable length items
+    def GetItemSizeList(self):
+        return [len(Datas) for Datas in self.RawDataList]
+
+    ## Get the offset of each item, and the size of list as the last one
+    #
+    #   The offsets are calculated only once, the size of items must not be changed after that.
+    #
+    def GetOffsetList(self):
+        if self.OffsetList is None:
+            Offset = 0
+            self.OffsetList = [Offset]
+            for Size in self.GetItemSizeList():
+                Offset += Size
+                self.OffsetList.append(Offset)
+        return self.OffsetList
 
     def GetInterOffset(self, Index):
         Offset = 0
         if self.ItemSize == 0:
             #
-            # Variable length, need to calculate one by one
+            # Variable length, get it from the offsets calculated once
             #
             assert(Index < len(self.RawDataList))
-            for ItemIndex in xrange(Index):
-                Offset += len(self.RawDataList[ItemIndex])
-        else:
-            for Datas in self.RawDataList:
-                Offset = self.ItemSize * Index
+            Offset = self.GetOffsetList()[Index]
+        elif self.RawDataList:
+            Offset = self.ItemSize * Index
 
         return Offset
 
@@ -312,7 +341,7 @@ class DbItemList:
             self.ListSize = 0
             return self.ListSize
         if self.ItemSize == 0:
-            self.ListSize = self.GetInterOffset(len(self.RawDataList) - 1) + len(self.RawDataList[len(self.RawDataList)-1])
+            self.ListSize = self.GetOffsetList()[-1]
         else:
             self.ListSize = self.ItemSize * len(self.RawDataList)
         return self.ListSize
@@ -335,21 +364,16 @@ class DbItemList:
             # should not reach here
             assert(False)
 
-        Buffer = ''
+        ValueList = []
         for Datas in self.RawDataList:
             if type(Datas) in (list, tuple):
-                for Data in Datas:
-                    if PackStr:
-                        Buffer += pack(PackStr, GetIntegerValue(Data))
-                    else:
-                        Buffer += PackGuid(Data)
+                ValueList.extend(Datas)
             else:
-                if PackStr:
-                    Buffer += pack(PackStr, GetIntegerValue(Datas))
-                else:
-                    Buffer += PackGuid(Datas)
+                ValueList.append(Datas)
 
-        return Buffer
+        if not PackStr:
+            return ''.join([PackGuid(Data) for Data in ValueList])
+        return PackValueList(PackStr, ValueList)
 
 ## DbExMapTblItemList
 #
@@ -363,14 +387,11 @@ class DbExMapTblItemList (DbItemList):
             RawDataList = []
         DbItemList.__init__(self, ItemSize, DataList, RawDataList)
     def PackData(self):
-        Buffer = ''
         PackStr = "=LHH"
+        ValueList = []
         for Datas in self.RawDataList:
-            Buffer += pack(PackStr, 
-                           GetIntegerValue(Datas[0]),
-                           GetIntegerValue(Datas[1]),
-                           GetIntegerValue(Datas[2]))      
-        return Buffer
+            ValueList += [Datas[0], Datas[1], Datas[2]]
+        return PackValueList(PackStr, ValueList)
 
 ## DbComItemList
 #
@@ -384,6 +405,9 @@ class DbComItemList (DbItemList):
         if RawDataList is None:
             RawDataList = []
         DbItemList.__init__(self, ItemSize, DataList, RawDataList)
+    def GetItemSizeList(self):
+        return [len(Datas) * self.ItemSize for Datas in self.RawDataList]
+
     def GetInterOffset(self, Index):
         Offset = 0
         if self.ItemSize == 0:
@@ -394,8 +418,7 @@ class DbComItemList (DbItemList):
             assert(False)
         else:
             assert(Index < len(self.RawDataList))
-            for ItemIndex in xrange(Index):
-                Offset += len(self.RawDataList[ItemIndex]) * self.ItemSize         
+            Offset = self.GetOffsetList()[Index]
 
         return Offset
 
@@ -408,7 +431,7 @@ class DbComItemList (DbItemList):
             if len(self.RawDataList) == 0:
                 self.ListSize = 0
             else:
-                self.ListSize = self.GetInterOffset(len(self.RawDataList) - 1) + len(self.RawDataList[len(self.RawDataList)-1]) * self.ItemSize
+                self.ListSize = self.GetOffsetList()[-1]
 
         return self.ListSize
 
@@ -426,16 +449,15 @@ class DbComItemList (DbItemList):
         else:
             assert(False)
 
-        Buffer = ''
+        ValueList = []
         for DataList in self.RawDataList:
             for Data in DataList:
                 if type(Data) in (list, tuple):
-                    for SingleData in Data:
-                        Buffer += pack(PackStr, GetIntegerValue(SingleData))
+                    ValueList.extend(Data)
                 else:
-                    Buffer += pack(PackStr, GetIntegerValue(Data))
-        
-        return Buffer
+                    ValueList.append(Data)
+
+        return PackValueList(PackStr, ValueList)
 
 ## DbVariableTableItemList
 #
@@ -450,18 +472,11 @@ class DbVariableTableItemList (DbComItemList):
         DbComItemList.__init__(self, ItemSize, DataList, RawDataList)
     def PackData(self):
         PackStr = "=LLHHLHH"
-        Buffer = ''
+        ValueList = []
         for DataList in self.RawDataList:
             for Data in DataList:
-                Buffer += pack(PackStr, 
-                               GetIntegerValue(Data[0]),
-                               GetIntegerValue(Data[1]),
-                               GetIntegerValue(Data[2]),
-                               GetIntegerValue(Data[3]),
-                               GetIntegerValue(Data[4]),
-                               GetIntegerValue(Data[5]),
-                               GetIntegerValue(0))
-        return Buffer
+                ValueList += [Data[0], Data[1], Data[2], Data[3], Data[4], Data[5], 0]
+        return PackValueList(PackStr, ValueList)
 
 class DbStringHeadTableItemList(DbItemList):
     def __init__(self,ItemSize,DataList=None,RawDataList=None):
@@ -470,24 +485,25 @@ class DbStringHeadTableItemList(DbItemList):
         if RawDataList is None:
             RawDataList = []        
         DbItemList.__init__(self, ItemSize, DataList, RawDataList)
-        
+
+    def GetItemSizeList(self):
+        if self.ItemSize == 0:
+            return DbItemList.GetItemSizeList(self)
+        SizeList = []
+        for Datas in self.RawDataList:
+            if type(Datas) in (list, tuple):
+                SizeList.append(len(Datas) * self.ItemSize)
+            else:
+                SizeList.append(self.ItemSize)
+        return SizeList
+
     def GetInterOffset(self, Index):
-        Offset = 0
         if self.ItemSize == 0:
             #
-            # Variable length, need to calculate one by one
+            # Variable length, get it from the offsets calculated once
             #
             assert(Index < len(self.RawDataList))
-            for ItemIndex in xrange(Index):
-                Offset += len(self.RawDataList[ItemIndex])
-        else:
-            for innerIndex in range(Index):
-                if type(self.RawDataList[innerIndex]) in (list, tuple):
-                    Offset += len(self.RawDataList[innerIndex]) * self.ItemSize
-                else:
-                    Offset += self.ItemSize
-
-        return Offset
+        return self.GetOffsetList()[Index]
 
     def GetListSize(self):
         if self.ListSize:
@@ -495,14 +511,7 @@ class DbStringHeadTableItemList(DbItemList):
         if len(self.RawDataList) == 0:
             self.ListSize = 0
             return self.ListSize
-        if self.ItemSize == 0:
-            self.ListSize = self.GetInterOffset(len(self.RawDataList) - 1) + len(self.RawDataList[len(self.RawDataList)-1])
-        else:
-            for Datas in self.RawDataList:
-                if type(Datas) in (list, tuple):
-                    self.ListSize += len(Datas) * self.ItemSize
-                else:
-                    self.ListSize += self.ItemSize
+        self.ListSize = self.GetOffsetList()[-1]
         return self.ListSize 
 
 ## DbSkuHeadTableItemList
@@ -518,12 +527,10 @@ class DbSkuHeadTableItemList (DbItemList):
         DbItemList.__init__(self, ItemSize, DataList, RawDataList)
     def PackData(self):
         PackStr = "=LL"
-        Buffer = ''
+        ValueList = []
         for Data in self.RawDataList:
-            Buffer += pack(PackStr, 
-                           GetIntegerValue(Data[0]),
-                           GetIntegerValue(Data[1]))
-        return Buffer
+            ValueList += [Data[0], Data[1]]
+        return PackValueList(PackStr, ValueList)
 
 ## DbSizeTableItemList
 #
@@ -543,14 +550,11 @@ class DbSizeTableItemList (DbItemList):
         return length * self.ItemSize
     def PackData(self):
         PackStr = "=H"
-        Buffer = ''
+        ValueList = []
         for Data in self.RawDataList:
-            Buffer += pack(PackStr, 
-                           GetIntegerValue(Data[0]))
-            for subData in Data[1]:
-                Buffer += pack(PackStr, 
-                           GetIntegerValue(subData))
-        return Buffer
+            ValueList.append(Data[0])
+            ValueList.extend(Data[1])
+        return PackValueList(PackStr, ValueList)
 
 ## DbStringItemList
 #
@@ -572,22 +576,15 @@ class DbStringItemList (DbComItemList):
             Len = LenList[Index]
             RawDatas = RawDataList[Index]
             assert(Len >= len(RawDatas))
-            ActualDatas = []
-            for i in xrange(len(RawDatas)):
-                ActualDatas.append(RawDatas[i])
-            for i in xrange(len(RawDatas), Len):
-                ActualDatas.append(0)
-            DataList.append(ActualDatas)
+            DataList.append(list(RawDatas) + [0] * (Len - len(RawDatas)))
         self.LenList = LenList
         DbComItemList.__init__(self, ItemSize, DataList, RawDataList)
-    def GetInterOffset(self, Index):
-        Offset = 0
+    def GetItemSizeList(self):
+        return self.LenList
 
+    def GetInterOffset(self, Index):
         assert(Index < len(self.LenList))
-        for ItemIndex in xrange(Index):
-            Offset += self.LenList[ItemIndex]
-
-        return Offset
+        return self.GetOffsetList()[Index]
 
     def GetListSize(self):
         if self.ListSize:
@@ -596,7 +593,7 @@ class DbStringItemList (DbComItemList):
         if len(self.LenList) == 0:
             self.ListSize = 0
         else:
-            self.ListSize = self.GetInterOffset(len(self.LenList) - 1) + self.LenList[len(self.LenList)-1]
+            self.ListSize = self.GetOffsetList()[-1]
 
         return self.ListSize
 
@@ -612,10 +609,23 @@ class DbStringItemList (DbComItemList):
 #   @param      List1  The list that Key1 will be searched
 #   @param      Key2   The key used to search the List2
 #   @param      List2  The list that Key2 will be searched
+#   @param      IndexCache  The dictionary to keep the index of the lists, which is built when
+#                           the lists are searched first time. It can be given only if the lists
+#                           are not changed any more.
 #
 #   @retval     Index  The position inside the list where list1[Index] == Key1 and list2[Index] == Key2
 #
-def GetMatchedIndex(Key1, List1, Key2, List2):
+def GetMatchedIndex(Key1, List1, Key2, List2, IndexCache=None):
+    if IndexCache is not None:
+        ListKey = (id(List1), id(List2))
+        if ListKey not in IndexCache:
+            IndexDict = {}
+            # the first matched index is kept for the duplicated keys
+            for Index in xrange(len(List1) - 1, -1, -1):
+                IndexDict[(List1[Index], List2[Index])] = Index
+            IndexCache[ListKey] = IndexDict
+        return IndexCache[ListKey].get((Key1, Key2), -1)
+
     StartPos = 0
     while StartPos < len(List1):
         Index = List1.index(Key1, StartPos)
@@ -778,22 +788,26 @@ def BuildExDataBase(Dict):
         SkuIdTableOffset += DbItemTotal[DbIndex].GetListSize()
     
     
-    # Get offset of SkuValue table in the database    
+    # Get offset of each table in the database, the table after the init tables is 8 bytes aligned
+    DbTableOffsetList = []
+    DbOffset = FixedHeaderLen
+    for DbIndex in xrange(len(DbTotal)):
+        DbTableOffsetList.append(DbOffset)
+        DbOffset += DbItemTotal[DbIndex].GetListSize()
+        if DbIndex + 1 == InitTableNum:
+            if DbOffset % 8:
+                DbOffset += (8 - DbOffset % 8)
+
+    # Get index of each table by its identity, the first one is used if one table appears twice
+    DbTableIndexDict = {}
+    for DbIndex in xrange(len(DbTotal) - 1, -1, -1):
+        DbTableIndexDict[id(DbTotal[DbIndex])] = DbIndex
 
     # Fix up the LocalTokenNumberTable, SkuHeader table
     for (LocalTokenNumberTableIndex, (Offset, Table)) in enumerate(LocalTokenNumberTable):
-        DbIndex = 0
-        DbOffset = FixedHeaderLen
-        for DbIndex in xrange(len(DbTotal)):
-            if DbTotal[DbIndex] is Table:
-                DbOffset += DbItemTotal[DbIndex].GetInterOffset(Offset)
-                break
-            DbOffset += DbItemTotal[DbIndex].GetListSize()
-            if DbIndex + 1 == InitTableNum:
-                if DbOffset % 8:
-                    DbOffset += (8 - DbOffset % 8)
-        else:
-            assert(False)
+        assert(id(Table) in DbTableIndexDict)
+        DbIndex = DbTableIndexDict[id(Table)]
+        DbOffset = DbTableOffsetList[DbIndex] + DbItemTotal[DbIndex].GetInterOffset(Offset)
 
         TokenTypeValue = Dict['TOKEN_TYPE'][LocalTokenNumberTableIndex]
         TokenTypeValue = GetTokenTypeValue(TokenTypeValue)
@@ -808,18 +822,9 @@ def BuildExDataBase(Dict):
         skuindex = 0
         for VariableEntryPerSku in VariableEntries:
             (VariableHeadGuidIndex, VariableHeadStringIndex, SKUVariableOffset, VariableOffset, VariableRefTable, VariableAttribute) = VariableEntryPerSku[:]
-            DbIndex = 0
-            DbOffset = FixedHeaderLen
-            for DbIndex in xrange(len(DbTotal)):
-                if DbTotal[DbIndex] is VariableRefTable:
-                    DbOffset += DbItemTotal[DbIndex].GetInterOffset(VariableOffset)
-                    break
-                DbOffset += DbItemTotal[DbIndex].GetListSize()
-                if DbIndex + 1 == InitTableNum:
-                    if DbOffset % 8:
-                        DbOffset += (8 - DbOffset % 8)
-            else:
-                assert(False)
+            assert(id(VariableRefTable) in DbTableIndexDict)
+            DbIndex = DbTableIndexDict[id(VariableRefTable)]
+            DbOffset = DbTableOffsetList[DbIndex] + DbItemTotal[DbIndex].GetInterOffset(VariableOffset)
             if isinstance(VariableRefTable[0],list):
                 DbOffset += skuindex * 4   
             skuindex += 1
@@ -932,18 +937,15 @@ def BuildExDataBase(Dict):
     Buffer += b
     Buffer += b
     
-    Index = 0
-    for Item in DbItemTotal:
-        Index +=1
+    BufferList = [Buffer]
+    BufferSize = len(Buffer)
+    for Item in DbItemTotal[:InitTableNum]:
         b = Item.PackData()
-        Buffer += b  
-        if Index == InitTableNum:
-            if len(Buffer) % 8:
-                for num in range(8 - len(Buffer) % 8):
-                    b = pack('=B', Pad)
-                    Buffer += b
-            break        
-    return Buffer
+        BufferList.append(b)
+        BufferSize += len(b)
+    if BufferSize % 8:
+        BufferList.append(pack('=B', Pad) * (8 - BufferSize % 8))
+    return ''.join(BufferList)
 
 ## Create code for PCD database
 #
@@ -990,28 +992,25 @@ def CreatePcdDataBase(PcdDBData):
             continue
         delta[(skuname,skuid)] = [(index,data,hex(data)) for index,data in enumerate(PcdDBData[(skuname,skuid)][1]) if PcdDBData[(skuname,skuid)][1][index] != PcdDBData[("DEFAULT","0")][1][index]]
         basedata[(skuname,skuid)] = [(index,PcdDBData[("DEFAULT","0")][1][index],hex(PcdDBData[("DEFAULT","0")][1][index])) for index,data in enumerate(PcdDBData[(skuname,skuid)][1]) if PcdDBData[(skuname,skuid)][1][index] != PcdDBData[("DEFAULT","0")][1][index]]
-    databasebuff = PcdDBData[("DEFAULT","0")][0]
+    databasebuff = [PcdDBData[("DEFAULT","0")][0]]
+    totallen = len(databasebuff[0])
 
     for skuname,skuid in delta:
         # 8 byte align
-        if len(databasebuff) % 8 > 0:
-            for i in range(8 - (len(databasebuff) % 8)):
-                databasebuff += pack("=B",0)
-        databasebuff += pack('=Q', int(skuid))
-        databasebuff += pack('=Q', 0)
-        databasebuff += pack('=L', 8+8+4+4*len(delta[(skuname,skuid)]))
+        if totallen % 8 > 0:
+            databasebuff.append(pack("=B",0) * (8 - (totallen % 8)))
+            totallen += 8 - (totallen % 8)
+        databasebuff.append(pack('=Q', int(skuid)))
+        databasebuff.append(pack('=Q', 0))
+        databasebuff.append(pack('=L', 8+8+4+4*len(delta[(skuname,skuid)])))
+        # each item is the offset in the low 3 bytes and the value in the high byte
         for item in delta[(skuname,skuid)]:
-            databasebuff += pack("=L",item[0])
-            databasebuff = databasebuff[:-1] + pack("=B",item[1])
-    totallen = len(databasebuff)
-    totallenbuff = pack("=L",totallen)
-    newbuffer = databasebuff[:32]
-    for i in range(4):
-        newbuffer += totallenbuff[i]
-    for i in range(36,totallen):
-        newbuffer += databasebuff[i]
-
-    return newbuffer
+            databasebuff.append(pack("=L",item[0])[:-1] + pack("=B",item[1]))
+        totallen += 8+8+4+4*len(delta[(skuname,skuid)])
+    newbuffer = bytearray(''.join(databasebuff))
+    pack_into("=L", newbuffer, 32, totallen)
+
+    return str(newbuffer)
 def CreateVarCheckBin(VarCheckTab):
     return VarCheckTab[('DEFAULT',"0")]
 def CreateAutoGen(PcdDriverAutoGenData):
@@ -1048,9 +1047,7 @@ def NewCreatePcdDatabasePhaseSpecificAutoGen(Platform,Phase):
     if DynamicPcdSet_Sku:
         for skuname,skuid in DynamicPcdSet_Sku:
             AdditionalAutoGenH, AdditionalAutoGenC, PcdDbBuffer,VarCheckTab = CreatePcdDatabasePhaseSpecificAutoGen (Platform,DynamicPcdSet_Sku[(skuname,skuid)], Phase)
-            final_data = ()
-            for item in PcdDbBuffer:
-                final_data += unpack("B",item)
+            final_data = unpack("%dB" % len(PcdDbBuffer), PcdDbBuffer)
             PcdDBData[(skuname,skuid)] = (PcdDbBuffer, final_data)
             PcdDriverAutoGenData[(skuname,skuid)] = (AdditionalAutoGenH, AdditionalAutoGenC)
             VarCheckTableData[(skuname,skuid)] = VarCheckTab
@@ -1161,6 +1158,12 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
     
     StringTableIndex = 0
     StringTableSize = 0
+    # value in string table : index of its first appearance
+    StringTableValueIndexDict = {}
+    # offset of each item in string table, and the size of items as the last one
+    StringTableOffsetList = [0]
+    # the index of name and guid lists searched by GetMatchedIndex
+    MatchedIndexCache = {}
     NumberOfLocalTokens = 0
     NumberOfPeiLocalTokens = 0
     NumberOfDxeLocalTokens = 0
@@ -1275,7 +1278,7 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
                 # and calculate the VariableHeadStringIndex
 
                 VariableNameStructure = StringToArray(Sku.VariableName)
-                if VariableNameStructure not in Dict['STRING_TABLE_VALUE']:
+                if VariableNameStructure not in StringTableValueIndexDict:
                     Dict['STRING_TABLE_CNAME'].append(CName)
                     Dict['STRING_TABLE_GUID'].append(TokenSpaceGuid)
                     if StringTableIndex == 0:
@@ -1284,16 +1287,16 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
                         Dict['STRING_TABLE_INDEX'].append('_%d' % StringTableIndex)
                     VarNameSize = len(VariableNameStructure.replace(',',' ').split())
                     Dict['STRING_TABLE_LENGTH'].append(VarNameSize )
+                    StringTableOffsetList.append(StringTableOffsetList[-1] + VarNameSize)
                     Dict['STRING_TABLE_VALUE'].append(VariableNameStructure)
+                    StringTableValueIndexDict[VariableNameStructure] = len(Dict['STRING_TABLE_VALUE']) - 1
                     StringHeadOffsetList.append(str(StringTableSize) + 'U')
                     VarStringDbOffsetList = []
                     VarStringDbOffsetList.append(StringTableSize)
                     Dict['STRING_DB_VALUE'].append(VarStringDbOffsetList)
                     StringTableIndex += 1
                     StringTableSize += len(VariableNameStructure.replace(',',' ').split())
-                VariableHeadStringIndex = 0
-                for Index in range(Dict['STRING_TABLE_VALUE'].index(VariableNameStructure)):
-                    VariableHeadStringIndex += Dict['STRING_TABLE_LENGTH'][Index]
+                VariableHeadStringIndex = StringTableOffsetList[StringTableValueIndexDict[VariableNameStructure]]
                 VariableHeadList.append(VariableHeadStringIndex)
                         
                 VariableHeadStringIndex = VariableHeadList[SkuIdIndex - 2]
@@ -1381,14 +1384,17 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
                         DefaultValueBinStructure = StringToArray(Sku.DefaultValue)
                         Size = len(DefaultValueBinStructure.replace(',',' ').split())
                         Dict['STRING_TABLE_VALUE'].append(DefaultValueBinStructure)
+                        StringTableValueIndexDict.setdefault(DefaultValueBinStructure, len(Dict['STRING_TABLE_VALUE']) - 1)
                     elif Sku.DefaultValue[0] == '"':
                         DefaultValueBinStructure = StringToArray(Sku.DefaultValue)
                         Size = len(Sku.DefaultValue) - 2 + 1
                         Dict['STRING_TABLE_VALUE'].append(DefaultValueBinStructure)
+                        StringTableValueIndexDict.setdefault(DefaultValueBinStructure, len(Dict['STRING_TABLE_VALUE']) - 1)
                     elif Sku.DefaultValue[0] == '{':
                         DefaultValueBinStructure = StringToArray(Sku.DefaultValue)
                         Size = len(Sku.DefaultValue.split(","))
                         Dict['STRING_TABLE_VALUE'].append(DefaultValueBinStructure)
+                        StringTableValueIndexDict.setdefault(DefaultValueBinStructure, len(Dict['STRING_TABLE_VALUE']) - 1)
                     
                     StringHeadOffsetList.append(str(StringTableSize) + 'U')
                     StringDbOffsetList.append(StringTableSize)
@@ -1406,6 +1412,7 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
                     if Sku.VpdOffset == '':
                         VoidStarTypeCurrSize.append(str(Size) + 'U')
                     Dict['STRING_TABLE_LENGTH'].append(StringTabLen)
+                    StringTableOffsetList.append(StringTableOffsetList[-1] + StringTabLen)
                     StringTableIndex += 1
                     StringTableSize += (StringTabLen)
             else:
@@ -1543,22 +1550,22 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
         # search the Offset and Table, used by LocalTokenNumberTableOffset
         if 'PCD_TYPE_HII' in Pcd.TokenTypeList:
             # Find index by CName, TokenSpaceGuid
-            Offset = GetMatchedIndex(CName, Dict['VARIABLE_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['VARIABLE_HEAD_GUID_DECL'])
+            Offset = GetMatchedIndex(CName, Dict['VARIABLE_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['VARIABLE_HEAD_GUID_DECL'], MatchedIndexCache)
             assert(Offset != -1)
             Table = Dict['VARIABLE_DB_VALUE']
         if 'PCD_TYPE_VPD' in Pcd.TokenTypeList:
-            Offset = GetMatchedIndex(CName, Dict['VPD_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['VPD_HEAD_GUID_DECL'])
+            Offset = GetMatchedIndex(CName, Dict['VPD_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['VPD_HEAD_GUID_DECL'], MatchedIndexCache)
             assert(Offset != -1)
             Table = Dict['VPD_DB_VALUE']
         if 'PCD_TYPE_STRING' in Pcd.TokenTypeList and 'PCD_TYPE_HII' not in Pcd.TokenTypeList:
             # Find index by CName, TokenSpaceGuid
-            Offset = GetMatchedIndex(CName, Dict['STRING_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['STRING_HEAD_GUID_DECL'])
+            Offset = GetMatchedIndex(CName, Dict['STRING_HEAD_CNAME_DECL'], TokenSpaceGuid, Dict['STRING_HEAD_GUID_DECL'], MatchedIndexCache)
             Offset = PCD_STRING_INDEX_MAP[Offset]
             assert(Offset != -1)
             Table = Dict['STRING_DB_VALUE']
         if 'PCD_TYPE_DATA' in Pcd.TokenTypeList:
             # need to store whether it is in init table or not
-            Offset = GetMatchedIndex(CName, Dict[Pcd.InitString+'_CNAME_DECL_'+Pcd.DatumType], TokenSpaceGuid, Dict[Pcd.InitString+'_GUID_DECL_'+Pcd.DatumType])
+            Offset = GetMatchedIndex(CName, Dict[Pcd.InitString+'_CNAME_DECL_'+Pcd.DatumType], TokenSpaceGuid, Dict[Pcd.InitString+'_GUID_DECL_'+Pcd.DatumType], MatchedIndexCache)
             assert(Offset != -1)
             if Pcd.InitString == 'UNINIT':
                 Table =  Dict[Pcd.InitString+'_GUID_DECL_'+Pcd.DatumType]
@@ -1595,11 +1602,11 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
             Dict['EXMAPPING_TABLE_GUID_INDEX'].append(str(GuidList.index(TokenSpaceGuid)) + 'U')
 
     if Platform.Platform.PcdInfoFlag:
+        TokenSpaceOffsetList = [StringTableSize]
+        for Length in Dict['PCD_TOKENSPACE_LENGTH']:
+            TokenSpaceOffsetList.append(TokenSpaceOffsetList[-1] + Length)
         for index in range(len(Dict['PCD_TOKENSPACE_MAP'])):
-            TokenSpaceIndex = StringTableSize
-            for i in range(Dict['PCD_TOKENSPACE_MAP'][index]):
-                TokenSpaceIndex += Dict['PCD_TOKENSPACE_LENGTH'][i]
-            Dict['PCD_TOKENSPACE_OFFSET'].append(TokenSpaceIndex)   
+            Dict['PCD_TOKENSPACE_OFFSET'].append(TokenSpaceOffsetList[Dict['PCD_TOKENSPACE_MAP'][index]])   
         for index in range(len(Dict['PCD_TOKENSPACE'])):
             StringTableSize += Dict['PCD_TOKENSPACE_LENGTH'][index]
             StringTableIndex += 1
@@ -1674,15 +1681,16 @@ def CreatePcdDatabasePhaseSpecificAutoGen (Platform, DynamicPcdList, Phase):
                 ReOrderFlag = False
         
         if ReOrderFlag:
+            SizeIndexDict = {}
+            for Count1 in range(len(Dict['SIZE_TABLE_CNAME'])):
+                SizeIndexDict.setdefault((Dict['SIZE_TABLE_CNAME'][Count1], Dict['SIZE_TABLE_GUID'][Count1]), []).append(Count1)
             for Count in range(len(Dict['TOKEN_CNAME'])):
-                for Count1 in range(len(Dict['SIZE_TABLE_CNAME'])):
-                    if Dict['TOKEN_CNAME'][Count] == Dict['SIZE_TABLE_CNAME'][Count1] and \
-                        Dict['TOKEN_GUID'][Count] == Dict['SIZE_TABLE_GUID'][Count1]:
-                        SizeCNameTempList.append(Dict['SIZE_TABLE_CNAME'][Count1])
-                        SizeGuidTempList.append(Dict['SIZE_TABLE_GUID'][Count1])
-                        SizeCurLenTempList.append(Dict['SIZE_TABLE_CURRENT_LENGTH'][Count1])
-                        SizeMaxLenTempList.append(Dict['SIZE_TABLE_MAXIMUM_LENGTH'][Count1])
-                        
+                for Count1 in SizeIndexDict.get((Dict['TOKEN_CNAME'][Count], Dict['TOKEN_GUID'][Count]), []):
+                    SizeCNameTempList.append(Dict['SIZE_TABLE_CNAME'][Count1])
+                    SizeGuidTempList.append(Dict['SIZE_TABLE_GUID'][Count1])
+                    SizeCurLenTempList.append(Dict['SIZE_TABLE_CURRENT_LENGTH'][Count1])
+                    SizeMaxLenTempList.append(Dict['SIZE_TABLE_MAXIMUM_LENGTH'][Count1])
+
             for Count in range(len(Dict['SIZE_TABLE_CNAME'])):
                 Dict['SIZE_TABLE_CNAME'][Count] = SizeCNameTempList[Count]
                 Dict['SIZE_TABLE_GUID'][Count] = SizeGuidTempList[Count]
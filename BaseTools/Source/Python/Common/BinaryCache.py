@@ -0,0 +1,274 @@
+## @file
+# Content-addressed cache of module binaries which can be shared by builds
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import hashlib
+import shutil
+import time
+import uuid
+import Common.LongFilePathOs as os
+from os import getpid
+import Common.EdkLogger as EdkLogger
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## Binary cache
+#
+#   Each entry of the cache is a directory named by its key, which is derived
+# from the module hash, under <Root>/objects/<first two digits of key>/. An
+# entry is written into <Root>/tmp first and renamed to its final place when
+# complete, so readers never see a partial entry and concurrent writers of the
+# same entry don't corrupt each other. The MANIFEST file in each entry lists
+# the MD5 digest of every file, which is verified when the entry is used.
+#
+#   The modified time of an entry directory is refreshed each time the entry
+# is used. Least recently used entries are removed when the total size of
+# cache exceeds the given limit.
+#
+#   @param      Root        The root directory of the cache
+#   @param      MaxSize     Maximum size of cache in bytes, 0 means no limit
+#   @param      Name        The name of cache shown in summary
+#
+class BinaryCache(object):
+    _MANIFEST_ = 'MANIFEST'
+    # left-over of interrupted builds in tmp directory older than this will be removed
+    _STALE_TIME_ = 24 * 3600
+
+    def __init__(self, Root, MaxSize=0, Name='Binary cache'):
+        self.Root = Root
+        self.MaxSize = MaxSize
+        self.Name = Name
+        self.ObjectDir = os.path.join(Root, 'objects')
+        self.TempDir = os.path.join(Root, 'tmp')
+        self.HitCount = 0
+        self.MissCount = 0
+        self.StoreCount = 0
+        self.EvictCount = 0
+
+    ## Get the key of an entry from the given values
+    @staticmethod
+    def GetKey(*Args):
+        return hashlib.md5('|'.join([str(Arg) for Arg in Args])).hexdigest()
+
+    def _GetEntryDir(self, Key):
+        return os.path.join(self.ObjectDir, Key[:2], Key)
+
+    ## Copy a file and calculate the MD5 digest of its content
+    #
+    #   @retval     (Digest, Size)
+    #
+    def _CopyFile(self, Src, Dst):
+        Md5 = hashlib.md5()
+        Size = 0
+        SrcFd = open(Src, 'rb')
+        try:
+            DstFd = open(Dst, 'wb')
+            try:
+                while True:
+                    Data = SrcFd.read(0x100000)
+                    if not Data:
+                        break
+                    Md5.update(Data)
+                    DstFd.write(Data)
+                    Size += len(Data)
+            finally:
+                DstFd.close()
+        finally:
+            SrcFd.close()
+        shutil.copystat(Src, Dst)
+        return Md5.hexdigest(), Size
+
+    ## Read the manifest of an entry
+    #
+    #   @retval     [(Name, Digest, Size), ...]
+    #   @retval     None        If the entry doesn't exist or its manifest is invalid
+    #
+    def _ReadManifest(self, EntryDir):
+        ManifestFile = os.path.join(EntryDir, self._MANIFEST_)
+        if not os.path.exists(ManifestFile):
+            return None
+        Manifest = []
+        try:
+            Fd = open(ManifestFile, 'r')
+            try:
+                for Line in Fd:
+                    Digest, Size, Name = Line.rstrip('\r\n').split(' ', 2)
+                    Manifest.append((Name, Digest, int(Size)))
+            finally:
+                Fd.close()
+        except (IOError, ValueError):
+            return None
+        return Manifest
+
+    ## Remove an entry or a directory in tmp
+    #
+    # The directory is renamed first so that no reader can find it any more.
+    #
+    def _Remove(self, Dir):
+        Trash = os.path.join(self.TempDir, '%s.trash' % uuid.uuid4().hex)
+        try:
+            if not os.path.exists(self.TempDir):
+                os.makedirs(self.TempDir)
+            os.rename(Dir, Trash)
+        except OSError:
+            return False
+        shutil.rmtree(Trash, True)
+        return True
+
+    ## Publish files as the entry of given key
+    #
+    #   @param      Key         The key of the entry
+    #   @param      FileList    [(Name, Path), ...] of files in the entry
+    #
+    #   @retval     True        The entry is published
+    #   @retval     False       The entry exists already, or failed to publish
+    #
+    def Store(self, Key, FileList):
+        EntryDir = self._GetEntryDir(Key)
+        if os.path.exists(EntryDir):
+            return False
+        TempEntry = os.path.join(self.TempDir, '%s.%d.%s' % (Key, getpid(), uuid.uuid4().hex))
+        try:
+            os.makedirs(TempEntry)
+            Manifest = []
+            for Name, File in FileList:
+                if Name in [Item[0] for Item in Manifest] or Name == self._MANIFEST_:
+                    continue
+                Digest, Size = self._CopyFile(File, os.path.join(TempEntry, Name))
+                Manifest.append((Name, Digest, Size))
+            Fd = open(os.path.join(TempEntry, self._MANIFEST_), 'w')
+            try:
+                for Name, Digest, Size in Manifest:
+                    Fd.write('%s %d %s\n' % (Digest, Size, Name))
+            finally:
+                Fd.close()
+            PrefixDir = os.path.dirname(EntryDir)
+            if not os.path.exists(PrefixDir):
+                try:
+                    os.makedirs(PrefixDir)
+                except OSError:
+                    # created by another build at the same time
+                    if not os.path.exists(PrefixDir):
+                        raise
+            # fails if another build published the same entry first
+            os.rename(TempEntry, EntryDir)
+        except (IOError, OSError), X:
+            EdkLogger.verbose("Failed to store [%s] into binary cache\n\t%s" % (Key, str(X)))
+            shutil.rmtree(TempEntry, True)
+            return False
+        self.StoreCount += 1
+        return True
+
+    ## Copy files of the entry of given key
+    #
+    #   Files are copied to temporary files beside their destinations first, and
+    # renamed to the destinations only after all of them are verified. No file
+    # in destination directories is changed if the entry can't be used.
+    #
+    #   @param      Key         The key of the entry
+    #   @param      GetDestDir  Callable returning the directory a file is copied to, by file name
+    #
+    #   @retval     True        All files of the entry are copied and verified
+    #   @retval     False       The entry doesn't exist, or it's broken or removed during copy
+    #
+    def Retrieve(self, Key, GetDestDir):
+        EntryDir = self._GetEntryDir(Key)
+        Manifest = self._ReadManifest(EntryDir)
+        if Manifest == None:
+            self.MissCount += 1
+            return False
+        TempFileList = []
+        try:
+            for Name, Digest, Size in Manifest:
+                DestFile = os.path.join(GetDestDir(Name), Name)
+                TempFile = '%s.%d.%s' % (DestFile, getpid(), uuid.uuid4().hex)
+                TempFileList.append((TempFile, DestFile))
+                if self._CopyFile(os.path.join(EntryDir, Name), TempFile)[0] != Digest:
+                    EdkLogger.verbose("Binary cache entry [%s] is corrupted and removed" % EntryDir)
+                    self._Remove(EntryDir)
+                    self._RemoveFiles(TempFileList)
+                    self.MissCount += 1
+                    return False
+            for TempFile, DestFile in TempFileList:
+                if os.path.exists(DestFile):
+                    os.remove(DestFile)
+                os.rename(TempFile, DestFile)
+            # mark the entry as most recently used
+            os.utime(EntryDir, None)
+        except (IOError, OSError), X:
+            # most likely the entry is evicted by another build
+            EdkLogger.verbose("Failed to retrieve [%s] from binary cache\n\t%s" % (Key, str(X)))
+            self._RemoveFiles(TempFileList)
+            self.MissCount += 1
+            return False
+        self.HitCount += 1
+        return True
+
+    ## Remove the temporary files left by Retrieve()
+    def _RemoveFiles(self, TempFileList):
+        for TempFile, DestFile in TempFileList:
+            try:
+                if os.path.exists(TempFile):
+                    os.remove(TempFile)
+            except OSError:
+                pass
+
+    ## Remove least recently used entries until the cache fits in MaxSize
+    def Evict(self):
+        Now = time.time()
+        if os.path.exists(self.TempDir):
+            for Name in os.listdir(self.TempDir):
+                Dir = os.path.join(self.TempDir, Name)
+                try:
+                    if Name.endswith('.trash') or os.stat(Dir).st_mtime < Now - self._STALE_TIME_:
+                        shutil.rmtree(Dir, True)
+                except OSError:
+                    pass
+
+        if not self.MaxSize or not os.path.exists(self.ObjectDir):
+            return
+        EntryList = []
+        TotalSize = 0
+        for Prefix in os.listdir(self.ObjectDir):
+            PrefixDir = os.path.join(self.ObjectDir, Prefix)
+            if not os.path.isdir(PrefixDir):
+                continue
+            for Key in os.listdir(PrefixDir):
+                EntryDir = os.path.join(PrefixDir, Key)
+                Manifest = self._ReadManifest(EntryDir)
+                try:
+                    LastUsed = os.stat(EntryDir).st_mtime
+                except OSError:
+                    continue
+                if Manifest == None:
+                    # not a valid entry, remove it first
+                    LastUsed = 0
+                    Size = 0
+                else:
+                    Size = sum([Item[2] for Item in Manifest])
+                EntryList.append((LastUsed, Size, EntryDir))
+                TotalSize += Size
+
+        EntryList.sort()
+        for LastUsed, Size, EntryDir in EntryList:
+            if TotalSize <= self.MaxSize and LastUsed:
+                break
+            if self._Remove(EntryDir):
+                TotalSize -= Size
+                self.EvictCount += 1
+
+    ## Summary of cache usage in current build
+    def GetSummary(self):
+        return "%s: %d hit(s), %d miss(es), %d stored, %d evicted" % \
+               (self.Name, self.HitCount, self.MissCount, self.StoreCount, self.EvictCount)
@@ -0,0 +1,124 @@
+## @file
+# Persistent cache of MD5 digests of files, used to calculate module hash
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import hashlib
+import time
+from multiprocessing.pool import ThreadPool
+import Common.LongFilePathOs as os
+from os import getpid
+import Common.EdkLogger as EdkLogger
+from Common.BuildToolError import FILE_OPEN_FAILURE
+from Common.Misc import DataDump
+from Common.Misc import DataRestore
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## File digest cache
+#
+#   The digest of a file is kept together with the size and modified time of
+# the file. It is used again, without reading the file, as long as the size
+# and modified time don't change.
+#
+#   @param      CacheFile       The path of file the cache is stored in, None
+#                               if the cache is not kept across builds
+#   @param      ThreadNumber    The number of threads used to calculate digests
+#
+class FileDigestCache(object):
+    _VERSION_ = 1
+    # the digest of a file modified in last seconds is not kept, because the
+    # file may be changed again without changing its modified time
+    _RACY_TIME_ = 2
+
+    def __init__(self, CacheFile, ThreadNumber=1):
+        self.CacheFile = CacheFile
+        self.ThreadNumber = ThreadNumber
+        # Path : (Size, ModifiedTime, Digest)
+        self._Digests = {}
+        self._Modified = False
+        if CacheFile and os.path.exists(CacheFile):
+            Data = DataRestore(CacheFile)
+            if type(Data) == type(()) and len(Data) == 2 and Data[0] == self._VERSION_:
+                self._Digests = Data[1]
+
+    ## Get the MD5 digest of file content
+    #
+    #   @param      File        The path of file
+    #
+    #   @retval     string      Hex digest of the content
+    #
+    def GetDigest(self, File):
+        Path = str(File)
+        try:
+            Stat = os.stat(Path)
+        except OSError, X:
+            EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=Path + "\n\t" + str(X))
+        Entry = self._Digests.get(Path)
+        if Entry and Entry[0] == Stat.st_size and Entry[1] == Stat.st_mtime:
+            return Entry[2]
+
+        Md5 = hashlib.md5()
+        try:
+            Fd = open(Path, 'rb')
+            try:
+                while True:
+                    Data = Fd.read(0x100000)
+                    if not Data:
+                        break
+                    Md5.update(Data)
+            finally:
+                Fd.close()
+        except IOError, X:
+            EdkLogger.error("build", FILE_OPEN_FAILURE, ExtraData=Path + "\n\t" + str(X))
+        Digest = Md5.hexdigest()
+        if Stat.st_mtime < time.time() - self._RACY_TIME_:
+            self._Digests[Path] = (Stat.st_size, Stat.st_mtime, Digest)
+            self._Modified = True
+        return Digest
+
+    ## Calculate the digests of files in parallel
+    #
+    # Reading files and hashing big buffers release the interpreter lock, so
+    # threads are enough.
+    #
+    #   @param      FileList        The list of files
+    #
+    def Prefetch(self, FileList):
+        PathList = list(set([str(File) for File in FileList]))
+        if self.ThreadNumber <= 1 or len(PathList) <= 1:
+            for Path in PathList:
+                self.GetDigest(Path)
+            return
+        Pool = ThreadPool(min(self.ThreadNumber, len(PathList)))
+        try:
+            Pool.map(self.GetDigest, PathList)
+        finally:
+            Pool.close()
+            Pool.join()
+
+    ## Write the cache back to file system
+    def Save(self):
+        if not self.CacheFile or not self._Modified:
+            return
+        TempFile = "%s.%d" % (self.CacheFile, getpid())
+        DataDump((self._VERSION_, self._Digests), TempFile)
+        try:
+            if os.path.exists(self.CacheFile):
+                os.remove(self.CacheFile)
+            os.rename(TempFile, self.CacheFile)
+        except OSError, X:
+            EdkLogger.verbose("Failed to save [%s]\n\t%s" % (self.CacheFile, str(X)))
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
+        self._Modified = False
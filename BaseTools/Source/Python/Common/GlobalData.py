@@ -98,7 +98,16 @@ gConditionalPcds = []
 gUseHashCache = None
 gBinCacheDest = None
 gBinCacheSource = None
+# Common.BinaryCache.BinaryCache object of --binary-destination or --binary-source
+gBinCache = None
 gPlatformHash = None
 gPackageHash = {}
 gModuleHash = {}
 gEnableGenfdsMultiThread = False
+# directory and maximum size in MB of GenFds cache
+gGenFdsCache = None
+gGenFdsCacheSize = 0
+# Common.FileDigestCache.FileDigestCache object used for module hash
+gFileDigestCache = None
+# Storage of meta file records, 'sqlite' or 'memory'
+gMetaFileStorage = 'sqlite'
@@ -23,6 +23,7 @@ import time
 import re
 import cPickle
 import array
+import struct
 import shutil
 from struct import pack
 from UserDict import IterableUserDict
@@ -46,7 +47,9 @@ gPlaceholderPattern = re.compile("\$\{([^$()\s]+)\}", re.MULTILINE | re.UNICODE)
 gFileTimeStampCache = {}    # {file path : file time stamp}
 
 ## Dictionary used to store dependencies of files
-gDependencyDatabase = {}    # arch : {file path : [dependent files list]}
+gDependencyDatabase = {}    # file path : (modified time, size, [included file names])
+## Bump it if the layout of gDependencyDatabase is changed
+gDependencyDatabaseVersion = 3
 
 def GetVariableOffset(mapfilepath, efifilepath, varnames):
     """ Parse map file to get variable offset in current EFI file 
@@ -2077,9 +2080,46 @@ class PathClass(object):
     Key = property(_GetFileKey)
     TimeStamp = property(_GetTimeStamp)
 
+## Dictionary used to store the information of parsed PE/TE images
+gPeImageCache = {}  # file path : (size, modified time, {attribute name : value})
+
 ## Parse PE image to get the required PE informaion.
 #
+# TE image is supported too. The fixed-layout headers are decoded with the
+# precompiled structures below, and the result is cached by the path, size
+# and modified time of the file, so that the image is parsed only once even
+# if it's used by several steps of the build.
+#
+#   SectionHeaderList   [(Name, VirtualAddress, PointerToRawData, VirtualSize), ...]
+#   SectionTable        [(Name, VirtualSize, VirtualAddress, SizeOfRawData,
+#                         PointerToRawData, Characteristics), ...]
+#   RelocationDirectory (VirtualAddress, Size) of base relocation directory
+#   DebugDirectory      (VirtualAddress, Size) of debug directory
+#
 class PeImageClass():
+    _DosHeader = struct.Struct('<2s58xI')
+    _PeFileHeader = struct.Struct('<4sHHIIIHH')
+    _OptionalHeader32 = struct.Struct('<HBBIIIIIIIIIHHHHHHIIIIHHIIIIII')
+    _OptionalHeader64 = struct.Struct('<HBBIIIIIQIIHHHHHHIIIIHHQQQQII')
+    # the structure of optional header, and the indexes of (EntryPoint, ImageBase,
+    # SectionAlignment, FileAlignment, SizeOfImage, SizeOfHeaders, Subsystem,
+    # NumberOfRvaAndSizes) in it, by magic
+    _PE32_MAGIC_ = 0x10B
+    _PE32PLUS_MAGIC_ = 0x20B
+    _OptionalHeaders = {
+        _PE32_MAGIC_     : (_OptionalHeader32, (6, 9, 10, 11, 19, 20, 22, 29)),
+        _PE32PLUS_MAGIC_ : (_OptionalHeader64, (6, 8, 9, 10, 18, 19, 21, 28)),
+    }
+    _TeHeader = struct.Struct('<2sHBBHIIQIIII')
+    _SectionHeader = struct.Struct('<8sIIIIIIHHI')
+    _DataDirectory = struct.Struct('<II')
+    _DebugDirectoryEntry = struct.Struct('<IIHHIIII')
+    _BaseRelocation = struct.Struct('<II')
+    _DIRECTORY_ENTRY_BASERELOC_ = 5
+    _DIRECTORY_ENTRY_DEBUG_ = 6
+    # enough to hold the headers of most images
+    _HEADER_READ_SIZE_ = 0x1000
+
     ## Constructor
     #
     #   @param  File FilePath of PeImage
@@ -2092,74 +2132,208 @@ class PeImageClass():
         self.SectionAlignment  = 0
         self.SectionHeaderList = []
         self.ErrorInfo = ''
+        self.IsTeImage = False
+        self.Machine = 0
+        self.Magic = 0
+        self.ImageBase = 0
+        self.Subsystem = 0
+        self.FileAlignment = 0
+        self.SizeOfHeaders = 0
+        self.SectionTable = []
+        self.RelocationDirectory = (0, 0)
+        self.DebugDirectory = (0, 0)
+        # file offset of data in TE image = PointerToRawData - TeAdjustment
+        self.TeAdjustment = 0
+        try:
+            Stat = os.stat(PeFile)
+        except:
+            self.ErrorInfo = self.FileName + ' can not be found\n'
+            return
+        Key = str(PeFile)
+        Cached = gPeImageCache.get(Key)
+        if Cached and Cached[0] == Stat.st_size and Cached[1] == Stat.st_mtime:
+            self._Restore(Cached[2])
+            return
         try:
             PeObject = open(PeFile, 'rb')
         except:
             self.ErrorInfo = self.FileName + ' can not be found\n'
             return
-        # Read DOS header
-        ByteArray = array.array('B')
-        ByteArray.fromfile(PeObject, 0x3E)
-        ByteList = ByteArray.tolist()
+        try:
+            self._Parse(PeObject)
+        finally:
+            PeObject.close()
+        #
+        # Same as FileDigestCache, the image modified in last seconds is not
+        # kept, because it may be changed again without changing its modified
+        # time, like being rebased in place.
+        #
+        from Common.FileDigestCache import FileDigestCache
+        if Stat.st_mtime < time.time() - FileDigestCache._RACY_TIME_:
+            gPeImageCache[Key] = (Stat.st_size, Stat.st_mtime, self._Save())
+
+    ## Names of attributes kept in gPeImageCache
+    _CachedAttributes = ('IsValid', 'Size', 'EntryPoint', 'SectionAlignment', 'SectionHeaderList', 'ErrorInfo',
+                         'IsTeImage', 'Machine', 'Magic', 'ImageBase', 'Subsystem', 'FileAlignment', 'SizeOfHeaders',
+                         'SectionTable', 'RelocationDirectory', 'DebugDirectory', 'TeAdjustment')
+
+    def _Save(self):
+        return dict([(Name, getattr(self, Name)) for Name in self._CachedAttributes])
+
+    def _Restore(self, Attributes):
+        for Name in self._CachedAttributes:
+            Value = Attributes[Name]
+            # the lists may be changed by caller
+            if type(Value) == type([]):
+                Value = list(Value)
+            setattr(self, Name, Value)
+
+    ## Read the headers of image, with at least Size bytes if the file is large enough
+    def _ReadHeader(self, PeObject, Buffer, Size):
+        if Size > len(Buffer):
+            Buffer += PeObject.read(Size - len(Buffer))
+        return Buffer
+
+    def _Parse(self, PeObject):
+        Buffer = PeObject.read(self._HEADER_READ_SIZE_)
+        if Buffer[0:2] == 'VZ':
+            return self._ParseTe(PeObject, Buffer)
         # DOS signature should be 'MZ'
-        if self._ByteListToStr (ByteList[0x0:0x2]) != 'MZ':
+        if len(Buffer) < self._DosHeader.size or Buffer[0:2] != 'MZ':
             self.ErrorInfo = self.FileName + ' has no valid DOS signature MZ'
             return
+        PeOffset = self._DosHeader.unpack_from(Buffer)[1]
 
-        # Read 4 byte PE Signature
-        PeOffset = self._ByteListToInt(ByteList[0x3C:0x3E])
-        PeObject.seek(PeOffset)
-        ByteArray = array.array('B')
-        ByteArray.fromfile(PeObject, 4)
         # PE signature should be 'PE\0\0'
-        if ByteArray.tostring() != 'PE\0\0':
+        Buffer = self._ReadHeader(PeObject, Buffer, PeOffset + self._PeFileHeader.size)
+        if len(Buffer) < PeOffset + self._PeFileHeader.size or Buffer[PeOffset:PeOffset + 4] != 'PE\0\0':
             self.ErrorInfo = self.FileName + ' has no valid PE signature PE00'
             return
-
-        # Read PE file header
-        ByteArray = array.array('B')
-        ByteArray.fromfile(PeObject, 0x14)
-        ByteList = ByteArray.tolist()
-        SecNumber = self._ByteListToInt(ByteList[0x2:0x4])
+        Signature, self.Machine, SecNumber, TimeDateStamp, PointerToSymbolTable, NumberOfSymbols, \
+            OptionalHeaderSize, Characteristics = self._PeFileHeader.unpack_from(Buffer, PeOffset)
         if SecNumber == 0:
             self.ErrorInfo = self.FileName + ' has no section header'
             return
 
         # Read PE optional header
-        OptionalHeaderSize = self._ByteListToInt(ByteArray[0x10:0x12])
-        ByteArray = array.array('B')
-        ByteArray.fromfile(PeObject, OptionalHeaderSize)
-        ByteList = ByteArray.tolist()
-        self.EntryPoint       = self._ByteListToInt(ByteList[0x10:0x14])
-        self.SectionAlignment = self._ByteListToInt(ByteList[0x20:0x24])
-        self.Size             = self._ByteListToInt(ByteList[0x38:0x3C])
+        OptionalHeaderOffset = PeOffset + self._PeFileHeader.size
+        SectionOffset = OptionalHeaderOffset + OptionalHeaderSize
+        Buffer = self._ReadHeader(PeObject, Buffer, SectionOffset + SecNumber * self._SectionHeader.size)
+        if len(Buffer) < SectionOffset + SecNumber * self._SectionHeader.size:
+            self.ErrorInfo = self.FileName + ' has no valid section header'
+            return
+        Magic = struct.unpack_from('<H', Buffer, OptionalHeaderOffset)[0]
+        OptionalHeader, FieldIndexes = self._OptionalHeaders.get(Magic, self._OptionalHeaders[self._PE32_MAGIC_])
+        if OptionalHeaderSize < OptionalHeader.size:
+            self.ErrorInfo = self.FileName + ' has no valid optional header'
+            return
+        Values = OptionalHeader.unpack_from(Buffer, OptionalHeaderOffset)
+        self.Magic = Magic
+        self.EntryPoint, self.ImageBase, self.SectionAlignment, self.FileAlignment, self.Size, self.SizeOfHeaders, \
+            self.Subsystem, NumberOfRvaAndSizes = [Values[Index] for Index in FieldIndexes]
+
+        NumberOfRvaAndSizes = min(NumberOfRvaAndSizes, (OptionalHeaderSize - OptionalHeader.size) / self._DataDirectory.size)
+        DataDirectoryOffset = OptionalHeaderOffset + OptionalHeader.size
+        if NumberOfRvaAndSizes > self._DIRECTORY_ENTRY_BASERELOC_:
+            self.RelocationDirectory = self._DataDirectory.unpack_from(
+                                         Buffer, DataDirectoryOffset + self._DIRECTORY_ENTRY_BASERELOC_ * self._DataDirectory.size)
+        if NumberOfRvaAndSizes > self._DIRECTORY_ENTRY_DEBUG_:
+            self.DebugDirectory = self._DataDirectory.unpack_from(
+                                    Buffer, DataDirectoryOffset + self._DIRECTORY_ENTRY_DEBUG_ * self._DataDirectory.size)
+
+        self._ParseSections(Buffer, SectionOffset, SecNumber)
+        self.IsValid = True
 
+    def _ParseTe(self, PeObject, Buffer):
+        if len(Buffer) < self._TeHeader.size:
+            self.ErrorInfo = self.FileName + ' has no valid TE header'
+            return
+        Signature, self.Machine, SecNumber, self.Subsystem, StrippedSize, self.EntryPoint, BaseOfCode, \
+            self.ImageBase, RelocRva, RelocSize, DebugRva, DebugSize = self._TeHeader.unpack_from(Buffer)
+        if SecNumber == 0:
+            self.ErrorInfo = self.FileName + ' has no section header'
+            return
+        Buffer = self._ReadHeader(PeObject, Buffer, self._TeHeader.size + SecNumber * self._SectionHeader.size)
+        if len(Buffer) < self._TeHeader.size + SecNumber * self._SectionHeader.size:
+            self.ErrorInfo = self.FileName + ' has no valid section header'
+            return
+        self.IsTeImage = True
+        self.TeAdjustment = StrippedSize - self._TeHeader.size
+        self.RelocationDirectory = (RelocRva, RelocSize)
+        self.DebugDirectory = (DebugRva, DebugSize)
+        self._ParseSections(Buffer, self._TeHeader.size, SecNumber)
+        self.IsValid = True
+
+    def _ParseSections(self, Buffer, Offset, SecNumber):
         # Read each Section Header
         for Index in range(SecNumber):
-            ByteArray = array.array('B')
-            ByteArray.fromfile(PeObject, 0x28)
-            ByteList = ByteArray.tolist()
-            SecName  = self._ByteListToStr(ByteList[0:8])
-            SecVirtualSize = self._ByteListToInt(ByteList[8:12])
-            SecRawAddress  = self._ByteListToInt(ByteList[20:24])
-            SecVirtualAddress = self._ByteListToInt(ByteList[12:16])
+            SecName, SecVirtualSize, SecVirtualAddress, SecRawSize, SecRawAddress, PointerToRelocations, \
+                PointerToLinenumbers, NumberOfRelocations, NumberOfLinenumbers, Characteristics = \
+                self._SectionHeader.unpack_from(Buffer, Offset)
+            SecName = SecName.split('\0', 1)[0]
             self.SectionHeaderList.append((SecName, SecVirtualAddress, SecRawAddress, SecVirtualSize))
-        self.IsValid = True
-        PeObject.close()
+            self.SectionTable.append((SecName, SecVirtualSize, SecVirtualAddress, SecRawSize, SecRawAddress, Characteristics))
+            Offset += self._SectionHeader.size
+
+    ## Get the file offset of data at the given RVA
+    #
+    #   @param  Rva     The relative virtual address
+    #
+    #   @retval int     The offset in file
+    #   @retval None    The RVA isn't in the raw data of any section
+    #
+    def RvaToOffset(self, Rva):
+        for SecName, SecVirtualSize, SecVirtualAddress, SecRawSize, SecRawAddress, Characteristics in self.SectionTable:
+            if Rva >= SecVirtualAddress and Rva < SecVirtualAddress + max(SecVirtualSize, SecRawSize):
+                if Rva - SecVirtualAddress >= SecRawSize:
+                    return None
+                return Rva - SecVirtualAddress + SecRawAddress - self.TeAdjustment
+        return None
 
-    def _ByteListToStr(self, ByteList):
-        String = ''
-        for index in range(len(ByteList)):
-            if ByteList[index] == 0: 
+    ## Read the data at the given RVA from image file
+    def _ReadRva(self, Rva, Size):
+        Offset = self.RvaToOffset(Rva)
+        if Offset == None or Size == 0:
+            return ''
+        PeObject = open(self.FileName, 'rb')
+        try:
+            PeObject.seek(Offset)
+            return PeObject.read(Size)
+        finally:
+            PeObject.close()
+
+    ## Get the base relocations of image
+    #
+    #   @retval list    [(Rva, Type), ...] of relocations, in the order of image
+    #
+    def GetRelocationList(self):
+        RelocationList = []
+        Rva, Size = self.RelocationDirectory
+        Buffer = self._ReadRva(Rva, Size)
+        Offset = 0
+        while Offset + self._BaseRelocation.size <= len(Buffer):
+            PageRva, BlockSize = self._BaseRelocation.unpack_from(Buffer, Offset)
+            if BlockSize < self._BaseRelocation.size or Offset + BlockSize > len(Buffer):
                 break
-            String += chr(ByteList[index])
-        return String
+            Count = (BlockSize - self._BaseRelocation.size) / 2
+            for Entry in struct.unpack_from('<%dH' % Count, Buffer, Offset + self._BaseRelocation.size):
+                RelocationList.append((PageRva + (Entry & 0xFFF), Entry >> 12))
+            Offset += BlockSize
+        return RelocationList
 
-    def _ByteListToInt(self, ByteList):
-        Value = 0
-        for index in range(len(ByteList) - 1, -1, -1):
-            Value = (Value << 8) | int(ByteList[index])
-        return Value
+    ## Get the entries of debug directory
+    #
+    #   @retval list    [(Type, Rva, FileOffset, Size), ...] of debug data
+    #
+    def GetDebugEntryList(self):
+        DebugEntryList = []
+        Rva, Size = self.DebugDirectory
+        Buffer = self._ReadRva(Rva, Size)
+        for Offset in range(0, len(Buffer) - self._DebugDirectoryEntry.size + 1, self._DebugDirectoryEntry.size):
+            Characteristics, TimeDateStamp, MajorVersion, MinorVersion, Type, DataSize, DataRva, DataOffset = \
+                self._DebugDirectoryEntry.unpack_from(Buffer, Offset)
+            DebugEntryList.append((Type, DataRva, DataOffset, DataSize))
+        return DebugEntryList
 
 class DefaultStore():
     def __init__(self,DefaultStores ):
@@ -0,0 +1,314 @@
+## @file
+# Rebase PE/COFF images in the same way as GenFw --rebase and --address
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import struct
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+#
+# The images updated here must be byte-identical to the ones updated by GenFw.
+# Like GenFw, the image is loaded into a memory buffer, relocated there and
+# the raw data of sections is copied back. Images GenFw would convert first
+# (ELF, non-XIP), report as an error, or relocate with machine specific fixups
+# are left to GenFw, so that they still get the same result and error message.
+#
+
+EFI_IMAGE_DOS_SIGNATURE = 'MZ'
+EFI_IMAGE_NT_SIGNATURE = 'PE\0\0'
+EFI_IMAGE_NT_OPTIONAL_HDR32_MAGIC = 0x10B
+EFI_IMAGE_NT_OPTIONAL_HDR64_MAGIC = 0x20B
+EFI_IMAGE_FILE_RELOCS_STRIPPED = 0x0001
+EFI_IMAGE_SCN_CNT_CODE = 0x00000020
+EFI_IMAGE_DIRECTORY_ENTRY_BASERELOC = 5
+EFI_IMAGE_DIRECTORY_ENTRY_DEBUG = 6
+EFI_IMAGE_DEBUG_TYPE_CODEVIEW = 2
+
+EFI_IMAGE_REL_BASED_ABSOLUTE = 0
+EFI_IMAGE_REL_BASED_HIGH = 1
+EFI_IMAGE_REL_BASED_LOW = 2
+EFI_IMAGE_REL_BASED_HIGHLOW = 3
+EFI_IMAGE_REL_BASED_DIR64 = 10
+
+## Machines whose images need no machine specific fixup: IA32 and X64
+SupportedMachine = (0x014C, 0x8664)
+## EFI application, boot service driver, runtime driver and SAL runtime driver
+SupportedSubsystem = (10, 11, 12, 13)
+
+MAX_UINT32 = 0xFFFFFFFF
+MAX_UINT64 = 0xFFFFFFFFFFFFFFFF
+
+_FileHeader = struct.Struct('<HHIIIHH')
+_SectionHeader = struct.Struct('<8sIIIIIIHHI')
+_DebugDirectoryEntry = struct.Struct('<IIHHIIII')
+_DataDirectory = struct.Struct('<II')
+_SECTION_HEADER_SIZE = 40
+
+## Raised when the request must be handled by GenFw
+class _Unsupported(Exception):
+    pass
+
+def _Unpack(Format, Buffer, Offset):
+    if Offset < 0 or Offset + Format.size > len(Buffer):
+        raise _Unsupported
+    return Format.unpack_from(Buffer, Offset)
+
+## Headers of a PE32 or PE32+ image, validated in the same way as GenFw
+class _PeHeader(object):
+    def __init__(self, Buffer):
+        if len(Buffer) < 0x40 or str(Buffer[0:2]) != EFI_IMAGE_DOS_SIGNATURE:
+            raise _Unsupported
+        self.PeOffset = struct.unpack_from('<I', Buffer, 0x3C)[0]
+        if str(Buffer[self.PeOffset:self.PeOffset + 4]) != EFI_IMAGE_NT_SIGNATURE:
+            raise _Unsupported
+        (self.Machine, self.NumberOfSections, _, _, _, SizeOfOptionalHeader,
+         self.Characteristics) = _Unpack(_FileHeader, Buffer, self.PeOffset + 4)
+        if self.Machine not in SupportedMachine:
+            raise _Unsupported
+
+        self.OptionalHeaderOffset = self.PeOffset + 4 + _FileHeader.size
+        self.Magic = _Unpack(struct.Struct('<H'), Buffer, self.OptionalHeaderOffset)[0]
+        if self.Magic == EFI_IMAGE_NT_OPTIONAL_HDR32_MAGIC:
+            self.ImageBaseFormat = struct.Struct('<I')
+            self.ImageBaseOffset = self.OptionalHeaderOffset + 28
+            DataDirectoryOffset = self.OptionalHeaderOffset + 96
+            NumberOfRvaAndSizesOffset = self.OptionalHeaderOffset + 92
+        elif self.Magic == EFI_IMAGE_NT_OPTIONAL_HDR64_MAGIC:
+            self.ImageBaseFormat = struct.Struct('<Q')
+            self.ImageBaseOffset = self.OptionalHeaderOffset + 24
+            DataDirectoryOffset = self.OptionalHeaderOffset + 112
+            NumberOfRvaAndSizesOffset = self.OptionalHeaderOffset + 108
+        else:
+            raise _Unsupported
+        self.ImageBase = _Unpack(self.ImageBaseFormat, Buffer, self.ImageBaseOffset)[0]
+        self.SectionAlignment, self.FileAlignment = _Unpack(struct.Struct('<II'), Buffer, self.OptionalHeaderOffset + 32)
+        self.SizeOfImage, self.SizeOfHeaders = _Unpack(struct.Struct('<II'), Buffer, self.OptionalHeaderOffset + 56)
+        self.Subsystem = _Unpack(struct.Struct('<H'), Buffer, self.OptionalHeaderOffset + 68)[0]
+        if self.Subsystem not in SupportedSubsystem:
+            raise _Unsupported
+        # GenFw fails on images without relocations
+        if self.Characteristics & EFI_IMAGE_FILE_RELOCS_STRIPPED:
+            raise _Unsupported
+
+        NumberOfRvaAndSizes = _Unpack(struct.Struct('<I'), Buffer, NumberOfRvaAndSizesOffset)[0]
+        self.RelocDirectory = (0, 0)
+        if NumberOfRvaAndSizes > EFI_IMAGE_DIRECTORY_ENTRY_BASERELOC:
+            self.RelocDirectory = _Unpack(_DataDirectory, Buffer, DataDirectoryOffset + 8 * EFI_IMAGE_DIRECTORY_ENTRY_BASERELOC)
+        self.DebugDirectory = (0, 0)
+        if NumberOfRvaAndSizes > EFI_IMAGE_DIRECTORY_ENTRY_DEBUG:
+            self.DebugDirectory = _Unpack(_DataDirectory, Buffer, DataDirectoryOffset + 8 * EFI_IMAGE_DIRECTORY_ENTRY_DEBUG)
+
+        # (Offset of header, VirtualSize, VirtualAddress, SizeOfRawData, PointerToRawData, Characteristics)
+        self.SectionList = []
+        Offset = self.OptionalHeaderOffset + SizeOfOptionalHeader
+        for Index in range(self.NumberOfSections):
+            Header = _Unpack(_SectionHeader, Buffer, Offset)
+            self.SectionList.append((Offset, Header[1], Header[2], Header[3], Header[4], Header[9]))
+            Offset += _SECTION_HEADER_SIZE
+
+        # the image must be XIP already, otherwise GenFw converts it first
+        if self.SectionAlignment == self.FileAlignment:
+            for _, VirtualSize, VirtualAddress, SizeOfRawData, PointerToRawData, _ in self.SectionList:
+                if VirtualSize > SizeOfRawData:
+                    raise _Unsupported
+                if max(VirtualSize, SizeOfRawData) > 0 and VirtualAddress != PointerToRawData:
+                    raise _Unsupported
+
+        # the RVA of CodeView entry in debug directory, 0 if not found
+        self.CodeViewEntryRva = 0
+        DebugRva, DebugSize = self.DebugDirectory
+        if DebugRva == 0:
+            return
+        DebugOffset = 0
+        for _, VirtualSize, VirtualAddress, _, PointerToRawData, _ in self.SectionList:
+            if DebugRva >= VirtualAddress and DebugRva < VirtualAddress + VirtualSize:
+                DebugOffset = DebugRva - VirtualAddress + PointerToRawData
+                break
+        if DebugOffset == 0:
+            return
+        for Index in range(0, DebugSize, _DebugDirectoryEntry.size):
+            Entry = _Unpack(_DebugDirectoryEntry, Buffer, DebugOffset + Index)
+            if Entry[4] == EFI_IMAGE_DEBUG_TYPE_CODEVIEW:
+                # GenFw loads the debug data kept out of sections into memory
+                if Entry[6] == 0 and Entry[7] != 0:
+                    raise _Unsupported
+                self.CodeViewEntryRva = DebugRva + Index
+                return
+
+## Load image into memory in the same way as PeCoffLoaderLoadImage
+def _LoadImage(Buffer, Header):
+    ImageSize = Header.SizeOfImage
+    if Header.SectionAlignment == 0 or Header.SectionAlignment & (Header.SectionAlignment - 1) or \
+       Header.SizeOfHeaders > ImageSize or Header.SizeOfHeaders > len(Buffer):
+        raise _Unsupported
+    Memory = bytearray(ImageSize)
+    Memory[0:Header.SizeOfHeaders] = Buffer[0:Header.SizeOfHeaders]
+    for _, VirtualSize, VirtualAddress, SizeOfRawData, PointerToRawData, _ in Header.SectionList:
+        if VirtualAddress >= ImageSize or (VirtualAddress + VirtualSize - 1) & MAX_UINT32 >= ImageSize:
+            raise _Unsupported
+        Size = VirtualSize
+        if Size == 0 or Size > SizeOfRawData:
+            Size = SizeOfRawData
+        if SizeOfRawData:
+            if VirtualAddress + Size > ImageSize or PointerToRawData + Size > len(Buffer):
+                raise _Unsupported
+            Memory[VirtualAddress:VirtualAddress + Size] = Buffer[PointerToRawData:PointerToRawData + Size]
+        if Size < VirtualSize:
+            Memory[VirtualAddress + Size:VirtualAddress + VirtualSize] = '\0' * (VirtualSize - Size)
+
+    if Header.CodeViewEntryRva and Header.CodeViewEntryRva < ImageSize:
+        Entry = _Unpack(_DebugDirectoryEntry, Memory, Header.CodeViewEntryRva)
+        if Entry[6] == 0 and Entry[7] != 0:
+            raise _Unsupported
+        if Entry[6] >= ImageSize:
+            raise _Unsupported
+    return Memory
+
+## Relocate image in memory in the same way as PeCoffLoaderRelocateImage
+def _RelocateImage(Memory, Header, BaseAddress):
+    ImageSize = len(Memory)
+    OldImageBase = _Unpack(Header.ImageBaseFormat, Memory, Header.ImageBaseOffset)[0]
+    Adjust = (BaseAddress - OldImageBase) & MAX_UINT64
+    Header.ImageBaseFormat.pack_into(Memory, Header.ImageBaseOffset, BaseAddress & (MAX_UINT32 if Header.ImageBaseFormat.size == 4 else MAX_UINT64))
+
+    RelocRva, RelocSize = Header.RelocDirectory
+    if RelocSize == 0:
+        return
+    RelocEnd = (RelocRva + RelocSize - 1) & MAX_UINT32
+    if RelocRva >= ImageSize or RelocEnd >= ImageSize or RelocEnd < RelocRva:
+        raise _Unsupported
+
+    Adjust16 = Adjust & 0xFFFF
+    AdjustHigh16 = (Adjust & MAX_UINT32) >> 16
+    Adjust32 = Adjust & MAX_UINT32
+    Block = RelocRva
+    while Block < RelocEnd:
+        VirtualAddress, SizeOfBlock = _Unpack(_DataDirectory, Memory, Block)
+        # GenFw never ends on empty blocks
+        if SizeOfBlock < 8 or SizeOfBlock & 1 or VirtualAddress >= ImageSize or Block + SizeOfBlock > ImageSize:
+            raise _Unsupported
+        Count = (SizeOfBlock - 8) / 2
+        for Entry in struct.unpack_from('<%dH' % Count, Memory, Block + 8):
+            Type = Entry >> 12
+            Fixup = VirtualAddress + (Entry & 0xFFF)
+            if Type == EFI_IMAGE_REL_BASED_ABSOLUTE:
+                continue
+            elif Type == EFI_IMAGE_REL_BASED_HIGHLOW:
+                if Fixup + 4 > ImageSize:
+                    raise _Unsupported
+                struct.pack_into('<I', Memory, Fixup, (struct.unpack_from('<I', Memory, Fixup)[0] + Adjust32) & MAX_UINT32)
+            elif Type == EFI_IMAGE_REL_BASED_DIR64:
+                if Fixup + 8 > ImageSize:
+                    raise _Unsupported
+                struct.pack_into('<Q', Memory, Fixup, (struct.unpack_from('<Q', Memory, Fixup)[0] + Adjust) & MAX_UINT64)
+            elif Type == EFI_IMAGE_REL_BASED_HIGH:
+                if Fixup + 2 > ImageSize:
+                    raise _Unsupported
+                struct.pack_into('<H', Memory, Fixup, (struct.unpack_from('<H', Memory, Fixup)[0] + AdjustHigh16) & 0xFFFF)
+            elif Type == EFI_IMAGE_REL_BASED_LOW:
+                if Fixup + 2 > ImageSize:
+                    raise _Unsupported
+                struct.pack_into('<H', Memory, Fixup, (struct.unpack_from('<H', Memory, Fixup)[0] + Adjust16) & 0xFFFF)
+            else:
+                # HIGHADJ and machine specific fixups
+                raise _Unsupported
+        Block += SizeOfBlock
+
+## Set the address into the first non-code section header, as SetAddressToSectionHeader
+def _SetAddressToSectionHeader(Buffer, BaseAddress):
+    Header = _PeHeader(Buffer)
+    for Offset, _, _, _, _, Characteristics in Header.SectionList:
+        if (Characteristics & EFI_IMAGE_SCN_CNT_CODE) == 0:
+            # PointerToRelocations and PointerToLinenumbers
+            struct.pack_into('<Q', Buffer, Offset + 24, BaseAddress)
+            break
+
+## Get the address GenFw uses for the given base address
+def _GetNewBaseAddress(Header, BaseAddress):
+    Absolute = abs(BaseAddress)
+    if Absolute > MAX_UINT64:
+        raise _Unsupported
+    if Header.Magic == EFI_IMAGE_NT_OPTIONAL_HDR32_MAGIC and Absolute > MAX_UINT32:
+        raise _Unsupported
+    return BaseAddress & MAX_UINT64
+
+def _ReadImage(File):
+    try:
+        Fd = open(File, 'rb')
+        try:
+            return bytearray(Fd.read())
+        finally:
+            Fd.close()
+    except IOError:
+        raise _Unsupported
+
+## Overwrite the image only if it is changed, as GenFw -r does
+def _UpdateImage(File, Original, Buffer):
+    if Buffer != Original:
+        Fd = open(File, 'wb')
+        try:
+            Fd.write(Buffer)
+        finally:
+            Fd.close()
+
+## Rebase image to new address, the same as "GenFw --rebase BaseAddress -r File"
+#
+#   @param  File            The path of PE/COFF image
+#   @param  BaseAddress     New base address, negative value is the offset from top of memory
+#
+#   @retval True            The image is rebased
+#   @retval False           The image must be rebased by GenFw
+#
+def RebaseImage(File, BaseAddress):
+    try:
+        Original = _ReadImage(File)
+        Header = _PeHeader(Original)
+        NewBaseAddress = _GetNewBaseAddress(Header, BaseAddress)
+        Memory = _LoadImage(Original, Header)
+        _RelocateImage(Memory, Header, NewBaseAddress)
+
+        Buffer = bytearray(Original)
+        for _, _, VirtualAddress, SizeOfRawData, PointerToRawData, _ in Header.SectionList:
+            if VirtualAddress + SizeOfRawData > len(Memory) or PointerToRawData + SizeOfRawData > len(Buffer):
+                raise _Unsupported
+            Buffer[PointerToRawData:PointerToRawData + SizeOfRawData] = Memory[VirtualAddress:VirtualAddress + SizeOfRawData]
+        # section data may cover the headers
+        Header = _PeHeader(Buffer)
+        Header.ImageBaseFormat.pack_into(Buffer, Header.ImageBaseOffset,
+                                         NewBaseAddress & (MAX_UINT32 if Header.ImageBaseFormat.size == 4 else MAX_UINT64))
+        _SetAddressToSectionHeader(Buffer, NewBaseAddress)
+    except _Unsupported:
+        return False
+    _UpdateImage(File, Original, Buffer)
+    return True
+
+## Set new address into section header, the same as "GenFw --address BaseAddress -r File"
+#
+#   @param  File            The path of PE/COFF image
+#   @param  BaseAddress     New base address, negative value is the offset from top of memory
+#
+#   @retval True            The address is set
+#   @retval False           The address must be set by GenFw
+#
+def SetImageAddress(File, BaseAddress):
+    try:
+        Original = _ReadImage(File)
+        Header = _PeHeader(Original)
+        NewBaseAddress = _GetNewBaseAddress(Header, BaseAddress)
+        Buffer = bytearray(Original)
+        _SetAddressToSectionHeader(Buffer, NewBaseAddress)
+    except _Unsupported:
+        return False
+    _UpdateImage(File, Original, Buffer)
+    return True
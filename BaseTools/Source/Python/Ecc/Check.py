@@ -207,6 +207,22 @@ class Check(object):
                                 OtherMsg = "File %s has Non-ASCII char at line %s column %s" % (Record[1], IndexOfLine, IndexOfChar)
                                 EccGlobalData.gDb.TblReport.Insert(ERROR_GENERAL_CHECK_NON_ACSII, OtherMsg=OtherMsg, BelongsToTable='File', BelongsToItem=Record[0])
 
+    ## Iterate the source files to be checked one by one
+    #
+    # The errors found when checking a file are marked with the file, so that
+    # they can be kept by incremental run if the file is not changed.
+    #
+    # @param FileList:  The full paths of files
+    #
+    def IterateFile(self, FileList):
+        TblReport = EccGlobalData.gDb.TblReport
+        try:
+            for FullName in FileList:
+                TblReport.CheckedFile = FullName
+                yield FullName
+        finally:
+            TblReport.CheckedFile = ''
+
     # C Function Layout Checking
     def FunctionLayoutCheck(self):
         self.FunctionLayoutCheckReturnType()
@@ -244,7 +260,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.c', '.h'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckFuncLayoutReturnType(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 c.CheckFuncLayoutReturnType(FullName)
 
     # Check whether any optional functional modifiers exist and next to the return type
@@ -257,7 +273,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.c', '.h'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckFuncLayoutModifier(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 c.CheckFuncLayoutModifier(FullName)
 
     # Check whether the next line contains the function name, left justified, followed by the beginning of the parameter list
@@ -271,7 +287,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.c', '.h'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckFuncLayoutName(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 c.CheckFuncLayoutName(FullName)
 
     # Check whether the function prototypes in include files have the same form as function definitions
@@ -285,7 +301,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[PROTOTYPE]" + FullName)
 #                        c.CheckFuncLayoutPrototype(FullName)
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 EdkLogger.quiet("[PROTOTYPE]" + FullName)
                 c.CheckFuncLayoutPrototype(FullName)
 
@@ -299,7 +315,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckFuncLayoutBody(FullName)
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 c.CheckFuncLayoutBody(FullName)
 
     # Check whether the data declarations is the first code in a module.
@@ -315,7 +331,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckFuncLayoutLocalVariable(FullName)
 
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 c.CheckFuncLayoutLocalVariable(FullName)
 
     # Check whether no use of STATIC for functions
@@ -342,7 +358,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h', '.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckDeclNoUseCType(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 c.CheckDeclNoUseCType(FullName)
 
     # Check whether the modifiers IN, OUT, OPTIONAL, and UNALIGNED are used only to qualify arguments to a function and should not appear in a data type declaration
@@ -355,7 +371,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h', '.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        c.CheckDeclArgModifier(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 c.CheckDeclArgModifier(FullName)
 
     # Check whether the EFIAPI modifier should be used at the entry of drivers, events, and member functions of protocols
@@ -374,7 +390,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[ENUM]" + FullName)
 #                        c.CheckDeclEnumTypedef(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 EdkLogger.quiet("[ENUM]" + FullName)
                 c.CheckDeclEnumTypedef(FullName)
 
@@ -389,7 +405,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[STRUCT]" + FullName)
 #                        c.CheckDeclStructTypedef(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 EdkLogger.quiet("[STRUCT]" + FullName)
                 c.CheckDeclStructTypedef(FullName)
 
@@ -426,7 +442,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[UNION]" + FullName)
 #                        c.CheckDeclUnionTypedef(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 EdkLogger.quiet("[UNION]" + FullName)
                 c.CheckDeclUnionTypedef(FullName)
 
@@ -447,7 +463,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[BOOLEAN]" + FullName)
 #                        c.CheckBooleanValueComparison(FullName)
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 EdkLogger.quiet("[BOOLEAN]" + FullName)
                 c.CheckBooleanValueComparison(FullName)
 
@@ -462,7 +478,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[NON-BOOLEAN]" + FullName)
 #                        c.CheckNonBooleanValueComparison(FullName)
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 EdkLogger.quiet("[NON-BOOLEAN]" + FullName)
                 c.CheckNonBooleanValueComparison(FullName)
 
@@ -477,7 +493,7 @@ class Check(object):
 #                        FullName = os.path.join(Dirpath, F)
 #                        EdkLogger.quiet("[POINTER]" + FullName)
 #                        c.CheckPointerNullComparison(FullName)
-            for FullName in EccGlobalData.gCFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList):
                 EdkLogger.quiet("[POINTER]" + FullName)
                 c.CheckPointerNullComparison(FullName)
 
@@ -523,7 +539,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        MsgList = c.CheckHeaderFileIfndef(FullName)
-            for FullName in EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gHFileList):
                 MsgList = c.CheckHeaderFileIfndef(FullName)
 
     # Check whether include files NOT contain code or define data variables
@@ -536,7 +552,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        MsgList = c.CheckHeaderFileData(FullName)
-            for FullName in EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gHFileList):
                 MsgList = c.CheckHeaderFileData(FullName)
 
     # Doxygen document checking
@@ -647,7 +663,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h', '.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        MsgList = c.CheckFuncHeaderDoxygenComments(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 MsgList = c.CheckFuncHeaderDoxygenComments(FullName)
 
 
@@ -667,7 +683,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h', '.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        MsgList = c.CheckDoxygenTripleForwardSlash(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 MsgList = c.CheckDoxygenTripleForwardSlash(FullName)
 
     # Check whether only Doxygen commands allowed to mark the code are @bug and @todo.
@@ -680,7 +696,7 @@ class Check(object):
 #                    if os.path.splitext(F)[1] in ('.h', '.c'):
 #                        FullName = os.path.join(Dirpath, F)
 #                        MsgList = c.CheckDoxygenCommand(FullName)
-            for FullName in EccGlobalData.gCFileList + EccGlobalData.gHFileList:
+            for FullName in self.IterateFile(EccGlobalData.gCFileList + EccGlobalData.gHFileList):
                 MsgList = c.CheckDoxygenCommand(FullName)
 
     # Meta-Data File Processing Checking
@@ -35,6 +35,7 @@ from Table.TableFdf import TableFdf
 # Static definitions
 #
 DATABASE_PATH = "Ecc.db"
+DIGEST_TABLE = "Digest"
 
 ## Database
 #
@@ -110,19 +111,20 @@ class Database(object):
             self.TblDec.Create()
             self.TblDsc.Create()
             self.TblFdf.Create()
+        self.Cur.execute("""create table IF NOT EXISTS %s (Name VARCHAR PRIMARY KEY,
+                                                         Digest VARCHAR NOT NULL
+                                                        )""" % DIGEST_TABLE)
 
         #
         # Init each table's ID
         #
         self.TblDataModel.InitID()
-        self.TblFile.InitID()
-        self.TblFunction.InitID()
-        self.TblPcd.InitID()
-        self.TblReport.InitID()
         self.TblInf.InitID()
         self.TblDec.InitID()
         self.TblDsc.InitID()
-        self.TblFdf.InitID()
+        # records of files may be deleted by incremental run, so the maximum ID is used instead of count
+        for Table in [self.TblFile, self.TblFunction, self.TblPcd, self.TblReport, self.TblFdf]:
+            Table.ID = self.Cur.execute("select max(ID) from %s" % Table.Table).fetchone()[0] or 0
 
         #
         # Initialize table DataModel
@@ -132,6 +134,56 @@ class Database(object):
 
         EdkLogger.verbose("Initialize ECC database ... DONE!")
 
+    ## Check whether the database can be updated incrementally
+    #
+    # The database must be built by the version of ECC which records the digests
+    # of files and the file each error is found in.
+    #
+    def IsIncremental(self):
+        Columns = [Record[1] for Record in self.Cur.execute("pragma table_info(%s)" % self.TblReport.Table).fetchall()]
+        if 'CheckedFile' not in Columns:
+            return False
+        return self.Cur.execute("select count(*) from %s" % DIGEST_TABLE).fetchone()[0] > 0
+
+    ## Get the digests recorded
+    #
+    # @retval dict:  {Name : Digest}, Name is the full path of a file, or the name
+    #                of a set of files
+    #
+    def GetDigestDict(self):
+        return dict(self.Cur.execute("select Name, Digest from %s" % DIGEST_TABLE).fetchall())
+
+    ## Get the digest recorded for a file, or a set of files
+    #
+    # @retval string:  The digest, None if it's not recorded
+    #
+    def GetDigest(self, Name):
+        Record = self.Cur.execute("select Digest from %s where Name = ?" % DIGEST_TABLE, (Name,)).fetchone()
+        if Record == None:
+            return None
+        return Record[0]
+
+    ## Record the digest of a file, or a set of files
+    #
+    def SetDigest(self, Name, Digest):
+        self.Cur.execute("insert or replace into %s values(?, ?)" % DIGEST_TABLE, (Name, Digest))
+
+    ## Delete the digest of a file, or a set of files
+    #
+    def DeleteDigest(self, Name):
+        self.Cur.execute("delete from %s where Name = ?" % DIGEST_TABLE, (Name,))
+
+    ## Delete the records of meta data files, which will be parsed again
+    #
+    def ResetMetaData(self):
+        self.Cur.execute("delete from %s where Model in (%s, %s, %s, %s, %s)" % (self.TblFile.Table, DataClass.MODEL_FILE_DEC,
+                         DataClass.MODEL_FILE_DSC, DataClass.MODEL_FILE_INF, DataClass.MODEL_FILE_FDF, DataClass.MODEL_FILE_UNI))
+        self.TblInf.Create()
+        self.TblDec.Create()
+        self.TblDsc.Create()
+        self.TblFdf.Drop()
+        self.TblFdf.Create()
+
     ## Query a table
     #
     # @param Table:  The instance of the table to be queried
@@ -210,6 +262,19 @@ class Database(object):
                                    FileID, -1, Pcd.StartLine, Pcd.StartColumn, Pcd.EndLine, Pcd.EndColumn)
 
         EdkLogger.verbose("Insert information from file %s ... DONE!" % File.FullPath)
+        return FileID
+
+    ## Delete one file information
+    #
+    # Delete the records of file, and its functions, pcds and identifiers
+    #
+    # @param FileID:  The ID of file
+    #
+    def DeleteOneFile(self, FileID):
+        self.Cur.execute("drop table IF EXISTS Identifier%s" % FileID)
+        self.Cur.execute("delete from %s where BelongsToFile = %s" % (self.TblFunction.Table, FileID))
+        self.Cur.execute("delete from %s where BelongsToFile = %s" % (self.TblPcd.Table, FileID))
+        self.Cur.execute("delete from %s where ID = %s" % (self.TblFile.Table, FileID))
 
     ## UpdateIdentifierBelongsToFunction
     #
@@ -15,6 +15,8 @@
 # Import Modules
 #
 import Common.LongFilePathOs as os, time, glob, sys
+import hashlib
+import multiprocessing
 import Common.EdkLogger as EdkLogger
 import Database
 import EccGlobalData
@@ -62,6 +64,10 @@ class Ecc(object):
         self.ScanMetaData = True
         self.MetaFile = ''
         self.OnlyScan = None
+        self.Jobs = 1
+        self.Incremental = False
+        # the digests recorded after all checks are done
+        self.DigestDict = {}
 
         # Parse the options and args
         self.ParseOption()
@@ -113,8 +119,18 @@ class Ecc(object):
         EccGlobalData.gException = ExceptionCheck(self.ExceptionFile)
 
         # Init Ecc database
+        if self.Incremental and not os.path.exists(Database.DATABASE_PATH):
+            self.Incremental = False
+            self.IsInit = True
         EccGlobalData.gDb = Database.Database(Database.DATABASE_PATH)
         EccGlobalData.gDb.InitDatabase(self.IsInit)
+        if self.Incremental and not EccGlobalData.gDb.IsIncremental():
+            EdkLogger.quiet("The existing database can't be updated incrementally, building it again ...")
+            EccGlobalData.gDb.Close()
+            self.Incremental = False
+            self.IsInit = True
+            EccGlobalData.gDb = Database.Database(Database.DATABASE_PATH)
+            EccGlobalData.gDb.InitDatabase(self.IsInit)
 
         #
         # Get files real name in workspace dir
@@ -131,6 +147,10 @@ class Ecc(object):
         # Show report
         self.GenReport()
 
+        # Record digests for next incremental run
+        for Name in self.DigestDict:
+            EccGlobalData.gDb.SetDigest(Name, self.DigestDict[Name])
+
         # Close Database
         EccGlobalData.gDb.Close()
 
@@ -168,32 +188,79 @@ class Ecc(object):
     #
     def BuildDatabase(self, SpeciDirs = None):
         # Clean report table
-        EccGlobalData.gDb.TblReport.Drop()
-        EccGlobalData.gDb.TblReport.Create()
+        if self.Incremental:
+            # the errors found when checking unchanged source files are kept
+            EccGlobalData.gDb.TblReport.DeleteUncheckedFile()
+        else:
+            EccGlobalData.gDb.TblReport.Drop()
+            EccGlobalData.gDb.TblReport.Create()
+
+        # the checks of all files are done again if the settings of checkpoints are changed
+        CheckAll = self.IsDigestChanged("Settings", [self.ConfigFile, self.ExceptionFile])
+        ChangedFileList = []
 
         # Build database
-        if self.IsInit:            
+        if self.IsInit or self.Incremental:
             if self.ScanMetaData:
                 EdkLogger.quiet("Building database for Meta Data File ...")
-                self.BuildMetaDataFileDatabase(SpeciDirs)
+                if self.BuildMetaDataFileDatabase(SpeciDirs):
+                    CheckAll = True
             if self.ScanSourceCode:
                 EdkLogger.quiet("Building database for Meta Data File Done!")
                 if SpeciDirs == None:
-                    c.CollectSourceCodeDataIntoDB(EccGlobalData.gTarget)
+                    ChangedFileList += c.CollectSourceCodeDataIntoDB(EccGlobalData.gTarget, self.Jobs, self.Incremental)
                 else:
                     for specificDir in SpeciDirs:
-                        c.CollectSourceCodeDataIntoDB(os.path.join(EccGlobalData.gTarget, specificDir))
+                        ChangedFileList += c.CollectSourceCodeDataIntoDB(os.path.join(EccGlobalData.gTarget, specificDir), self.Jobs, self.Incremental)
 
         EccGlobalData.gIdentifierTableList = GetTableList((MODEL_FILE_C, MODEL_FILE_H), 'Identifier', EccGlobalData.gDb)
         EccGlobalData.gCFileList = GetFileList(MODEL_FILE_C, EccGlobalData.gDb)
         EccGlobalData.gHFileList = GetFileList(MODEL_FILE_H, EccGlobalData.gDb)
         EccGlobalData.gUFileList = GetFileList(MODEL_FILE_UNI, EccGlobalData.gDb)
 
+        if self.Incremental:
+            if CheckAll:
+                CheckFileSet = set(EccGlobalData.gCFileList + EccGlobalData.gHFileList)
+            else:
+                CheckFileSet = c.GetAffectedFileList(ChangedFileList)
+            KeepFileSet = set(EccGlobalData.gCFileList + EccGlobalData.gHFileList) - CheckFileSet
+            EdkLogger.quiet("%s source files changed, %s source files to be checked again" % (len(ChangedFileList), len(CheckFileSet)))
+            EccGlobalData.gDb.TblReport.DeleteCheckedFile(KeepFileSet)
+            EccGlobalData.gCFileList = [File for File in EccGlobalData.gCFileList if File in CheckFileSet]
+            EccGlobalData.gHFileList = [File for File in EccGlobalData.gHFileList if File in CheckFileSet]
+
+    ## IsDigestChanged
+    #
+    # Check whether a set of files is changed since last run. The new digest
+    # is recorded when all checks are done.
+    #
+    # @param Name:      The name the digest is recorded with
+    # @param FileList:  The files, the ones not existing are skipped
+    #
+    # @retval True if the digest is changed or not recorded
+    #
+    def IsDigestChanged(self, Name, FileList):
+        Md5 = hashlib.md5()
+        for File in FileList:
+            if os.path.isfile(File):
+                Md5.update(File)
+                Md5.update(c.GetFileDigest(File))
+        Digest = Md5.hexdigest()
+        if EccGlobalData.gDb.GetDigest(Name) == Digest:
+            return False
+        self.DigestDict[Name] = Digest
+        return True
+
     ## BuildMetaDataFileDatabase
     #
     # Build the database for meta data files
     #
+    # @retval True if any meta data file is changed since last run
+    #
     def BuildMetaDataFileDatabase(self, SpecificDirs = None):
+        if self.Incremental:
+            EccGlobalData.gDb.ResetMetaData()
+        MetaFileList = []
         ScanFolders = []
         if SpecificDirs == None:
             ScanFolders.append(EccGlobalData.gTarget)
@@ -225,6 +292,7 @@ class Ecc(object):
                         Filename = os.path.normpath(os.path.join(Root, File))
                         EdkLogger.quiet("Parsing %s" % Filename)
                         Op.write("%s\r" % Filename)
+                        MetaFileList.append(Filename)
                         #Dec(Filename, True, True, EccGlobalData.gWorkspace, EccGlobalData.gDb)
                         self.MetaFile = DecParser(Filename, MODEL_FILE_DEC, EccGlobalData.gDb.TblDec)
                         self.MetaFile.Start()
@@ -233,6 +301,7 @@ class Ecc(object):
                         Filename = os.path.normpath(os.path.join(Root, File))
                         EdkLogger.quiet("Parsing %s" % Filename)
                         Op.write("%s\r" % Filename)
+                        MetaFileList.append(Filename)
                         #Dsc(Filename, True, True, EccGlobalData.gWorkspace, EccGlobalData.gDb)
                         self.MetaFile = DscParser(PathClass(Filename, Root), MODEL_FILE_DSC, MetaFileStorage(EccGlobalData.gDb.TblDsc.Cur, Filename, MODEL_FILE_DSC, True))
                         # alwasy do post-process, in case of macros change
@@ -244,6 +313,7 @@ class Ecc(object):
                         Filename = os.path.normpath(os.path.join(Root, File))
                         EdkLogger.quiet("Parsing %s" % Filename)
                         Op.write("%s\r" % Filename)
+                        MetaFileList.append(Filename)
                         #Inf(Filename, True, True, EccGlobalData.gWorkspace, EccGlobalData.gDb)
                         self.MetaFile = InfParser(Filename, MODEL_FILE_INF, EccGlobalData.gDb.TblInf)
                         self.MetaFile.Start()
@@ -252,12 +322,14 @@ class Ecc(object):
                         Filename = os.path.normpath(os.path.join(Root, File))
                         EdkLogger.quiet("Parsing %s" % Filename)
                         Op.write("%s\r" % Filename)
+                        MetaFileList.append(Filename)
                         Fdf(Filename, True, EccGlobalData.gWorkspace, EccGlobalData.gDb)
                         continue
                     if len(File) > 4 and File[-4:].upper() == ".UNI":
                         Filename = os.path.normpath(os.path.join(Root, File))
                         EdkLogger.quiet("Parsing %s" % Filename)
                         Op.write("%s\r" % Filename)
+                        MetaFileList.append(Filename)
                         FileID = EccGlobalData.gDb.TblFile.InsertFile(Filename, MODEL_FILE_UNI)
                         EccGlobalData.gDb.TblReport.UpdateBelongsToItemByFile(FileID, File)
                         continue
@@ -268,6 +340,7 @@ class Ecc(object):
         EccGlobalData.gDb.Conn.commit()
 
         EdkLogger.quiet("Building database for meta data files done!")
+        return self.IsDigestChanged("MetaData", sorted(MetaFileList))
 
     ##
     #
@@ -364,6 +437,9 @@ class Ecc(object):
             EccGlobalData.gTarget = os.path.normpath(os.getenv("WORKSPACE"))
         if Options.keepdatabase != None:
             self.IsInit = False
+        if Options.Incremental != None:
+            self.IsInit = False
+            self.Incremental = True
         if Options.metadata != None and Options.sourcecode != None:
             EdkLogger.error("ECC", BuildToolError.OPTION_CONFLICT, ExtraData="-m and -s can't be specified at one time")
         if Options.metadata != None:
@@ -372,6 +448,13 @@ class Ecc(object):
             self.ScanMetaData = False
         if Options.folders != None:
             self.OnlyScan = True
+        if Options.Jobs != None:
+            if Options.Jobs < 0:
+                EdkLogger.error("ECC", BuildToolError.OPTION_VALUE_INVALID, ExtraData="Invalid number of jobs: %d" % Options.Jobs)
+            if Options.Jobs == 0:
+                self.Jobs = multiprocessing.cpu_count()
+            else:
+                self.Jobs = Options.Jobs
 
     ## SetLogLevel
     #
@@ -423,6 +506,11 @@ class Ecc(object):
         Parser.add_option("-d", "--debug", action="store", type="int", help="Enable debug messages at specified level.")
         Parser.add_option("-w", "--workspace", action="store", type="string", dest='Workspace', help="Specify workspace.")
         Parser.add_option("-f", "--folders", action="store_true", type=None, help="Only scanning specified folders which are recorded in config.ini file.")
+        Parser.add_option("--incremental", action="store_true", dest="Incremental", help="Keep the existing Ecc database, and only parse and check "\
+                                                                                              "the source files changed since last run, and the files including them. "\
+                                                                                              "The errors found in other files are kept in report.")
+        Parser.add_option("-j", "--jobs", action="store", type="int", dest="Jobs", help="The number of processes parsing source code files. "\
+                                                                                         "0 means the number of processors. Defaultly use 1.")
 
         (Opt, Args)=Parser.parse_args()
 
@@ -434,6 +522,8 @@ class Ecc(object):
 # script.
 #
 if __name__ == '__main__':
+    # Support worker processes of frozen executable on Windows
+    multiprocessing.freeze_support()
     # Initialize log system
     EdkLogger.Initialize()
     EdkLogger.IsRaiseError = False
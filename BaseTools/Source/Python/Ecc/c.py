@@ -13,8 +13,11 @@
 
 import sys
 import Common.LongFilePathOs as os
+import sys
 import re
 import string
+import hashlib
+import multiprocessing
 import CodeFragmentCollector
 import FileProfile
 from CommonDataClass import DataClass
@@ -494,8 +497,72 @@ def GetFileModificationTimeFromDB(FullFileName):
         TimeValue = Result[0]
     return TimeValue
 
-def CollectSourceCodeDataIntoDB(RootDir):
+## Parse one source file and collect its functions and identifiers
+#
+# The data of the file is returned instead of being inserted into database, so
+# that it can be called in the worker processes of CollectSourceCodeDataIntoDB.
+#
+# @param  FullName      The full path of file
+#
+# @retval tuple         (FileClass object, True if the file is parsed with the
+#                       preprocessor directives cleared because of error)
+#
+def ParseSourceCodeFile(FullName):
+    collector = None
+    ParseError = False
+    f = os.path.basename(FullName)
+    model = DataClass.MODEL_FILE_OTHERS
+    if os.path.splitext(f)[1] in ('.h', '.c'):
+        EdkLogger.info("Parsing " + FullName)
+        model = f.endswith('c') and DataClass.MODEL_FILE_C or DataClass.MODEL_FILE_H
+        collector = CodeFragmentCollector.CodeFragmentCollector(FullName)
+        try:
+            collector.ParseFile()
+        except UnicodeError:
+            ParseError = True
+            collector.CleanFileProfileBuffer()
+            collector.ParseFileWithClearedPPDirective()
+#        collector.PrintFragments()
+    BaseName = os.path.basename(f)
+    DirName = os.path.dirname(FullName)
+    Ext = os.path.splitext(f)[1].lstrip('.')
+    ModifiedTime = os.path.getmtime(FullName)
+    FileObj = DataClass.FileClass(-1, BaseName, Ext, DirName, FullName, model, ModifiedTime, GetFunctionList(), GetIdentifierList(), [])
+    if collector:
+        collector.CleanFileProfileBuffer()
+    return FileObj, ParseError
+
+## Initialize a worker process of CollectSourceCodeDataIntoDB
+#
+# Worker processes are spawned instead of forked on Windows, in which the log
+# system is not initialized yet.
+#
+# @param  LogLevel      The log level of Ecc process
+#
+def ParseSourceCodeFileInit(LogLevel):
+    if sys.platform == 'win32':
+        EdkLogger.Initialize()
+    EdkLogger.SetLevel(LogLevel)
+
+## Collect the data of source files under a directory into database
+#
+# The files are parsed in worker processes if Jobs is greater than 1. The
+# results are inserted into database by this process in the order of files
+# found, so the database is the same as the one built by single process.
+#
+# In incremental mode, the records of a file are kept if its modified time or
+# its content is not changed since last run, otherwise they are replaced.
+#
+# @param  RootDir       The directory to be scanned
+# @param  Jobs          The number of processes parsing files
+# @param  Incremental   Whether to update the records kept in database
+#
+# @retval list          The files added, changed or removed
+#
+def CollectSourceCodeDataIntoDB(RootDir, Jobs=1, Incremental=False):
+    FileList = []
     FileObjList = []
+    ChangedFileList = []
     tuple = os.walk(RootDir)
     IgnoredPattern = GetIgnoredDirListPattern()
     ParseErrorFileList = []
@@ -516,38 +583,120 @@ def CollectSourceCodeDataIntoDB(RootDir):
         for f in filenames:
             if f.lower() in EccGlobalData.gConfig.SkipFileList:
                 continue
-            collector = None
-            FullName = os.path.normpath(os.path.join(dirpath, f))
-            model = DataClass.MODEL_FILE_OTHERS
-            if os.path.splitext(f)[1] in ('.h', '.c'):
-                EdkLogger.info("Parsing " + FullName)
-                model = f.endswith('c') and DataClass.MODEL_FILE_C or DataClass.MODEL_FILE_H
-                collector = CodeFragmentCollector.CodeFragmentCollector(FullName)
-                try:
-                    collector.ParseFile()
-                except UnicodeError:
-                    ParseErrorFileList.append(FullName)
-                    collector.CleanFileProfileBuffer()
-                    collector.ParseFileWithClearedPPDirective()
-#                collector.PrintFragments()
-            BaseName = os.path.basename(f)
-            DirName = os.path.dirname(FullName)
-            Ext = os.path.splitext(f)[1].lstrip('.')
-            ModifiedTime = os.path.getmtime(FullName)
-            FileObj = DataClass.FileClass(-1, BaseName, Ext, DirName, FullName, model, ModifiedTime, GetFunctionList(), GetIdentifierList(), [])
-            FileObjList.append(FileObj)
-            if collector:
-                collector.CleanFileProfileBuffer()
+            # meta data files are recorded by BuildMetaDataFileDatabase
+            if os.path.splitext(f)[1].upper() in ['.INF', '.DEC', '.DSC', '.FDF']:
+                continue
+            FileList.append(os.path.normpath(os.path.join(dirpath, f)))
+
+    Db = GetDB()
+    if Incremental:
+        DigestDict = Db.GetDigestDict()
+        # FullPath : (ID, TimeStamp)
+        OldFileDict = {}
+        SqlCommand = """select ID, FullPath, TimeStamp from File where Model not in (%s, %s, %s, %s, %s)""" \
+                     % (DataClass.MODEL_FILE_DEC, DataClass.MODEL_FILE_DSC, DataClass.MODEL_FILE_INF, DataClass.MODEL_FILE_FDF, DataClass.MODEL_FILE_UNI)
+        for FileID, FullName, TimeStamp in Db.TblFile.Exec(SqlCommand):
+            OldFileDict[FullName] = (FileID, TimeStamp)
+
+        NewFileList = []
+        for FullName in FileList:
+            if FullName in OldFileDict:
+                FileID, TimeStamp = OldFileDict.pop(FullName)
+                ModifiedTime = os.path.getmtime(FullName)
+                if str(ModifiedTime) == TimeStamp:
+                    continue
+                if GetFileDigest(FullName) == DigestDict.get(FullName):
+                    Db.TblFile.Exec("""update File set TimeStamp = '%s' where ID = %s""" % (ModifiedTime, FileID))
+                    continue
+                Db.DeleteOneFile(FileID)
+            NewFileList.append(FullName)
+        for FullName in OldFileDict:
+            if FullName.startswith(os.path.join(RootDir, '')):
+                EdkLogger.verbose("Removing " + FullName)
+                Db.DeleteOneFile(OldFileDict[FullName][0])
+                Db.DeleteDigest(FullName)
+                ChangedFileList.append(FullName)
+        FileList = NewFileList
+
+    if Jobs > 1 and len(FileList) > 1:
+        Pool = multiprocessing.Pool(min(Jobs, len(FileList)), ParseSourceCodeFileInit, (EdkLogger.GetLevel(),))
+        try:
+            # keep the order of files, and send them in chunks to reduce the cost of IPC
+            ChunkSize = max(1, min(64, len(FileList) / (Jobs * 4)))
+            ResultList = list(Pool.imap(ParseSourceCodeFile, FileList, ChunkSize))
+            Pool.close()
+        finally:
+            Pool.terminate()
+            Pool.join()
+    else:
+        ResultList = map(ParseSourceCodeFile, FileList)
+
+    for FullName, (FileObj, ParseError) in zip(FileList, ResultList):
+        if ParseError:
+            ParseErrorFileList.append(FullName)
+        FileObjList.append(FileObj)
 
     if len(ParseErrorFileList) > 0:
         EdkLogger.info("Found unrecoverable error during parsing:\n\t%s\n" % "\n\t".join(ParseErrorFileList))
 
-    Db = GetDB()
     for file in FileObjList:
-        if file.ExtName.upper() not in ['INF', 'DEC', 'DSC', 'FDF']:
-            Db.InsertOneFile(file)
+        Db.InsertOneFile(file)
+        Db.SetDigest(file.FullPath, GetFileDigest(file.FullPath))
+        ChangedFileList.append(file.FullPath)
 
     Db.UpdateIdentifierBelongsToFunction()
+    return ChangedFileList
+
+## Get the MD5 digest of file content
+#
+# @param  FullName      The full path of file
+#
+# @retval string        Hex digest of the content
+#
+def GetFileDigest(FullName):
+    File = open(FullName, 'rb')
+    try:
+        return hashlib.md5(File.read()).hexdigest()
+    finally:
+        File.close()
+
+## Get the C source and header files affected by the files changed
+#
+# A file is affected if it is changed, or it includes an affected header file.
+# The files included are matched by name, instead of being searched in include
+# paths, so more files than necessary may be found but none is missed.
+#
+# @param  ChangedFileList   The files added, changed or removed
+#
+# @retval set               The full paths of files affected
+#
+def GetAffectedFileList(ChangedFileList):
+    Db = GetDB()
+    # FullPath : set of the names of files included
+    IncludeDict = {}
+    SqlCommand = """select ID, FullPath from File where Model in (%s, %s)""" % (DataClass.MODEL_FILE_C, DataClass.MODEL_FILE_H)
+    for FileID, FullName in Db.TblFile.Exec(SqlCommand):
+        NameSet = set()
+        SqlCommand = """select Value from Identifier%s where Model = %s""" % (FileID, DataClass.MODEL_IDENTIFIER_INCLUDE)
+        for Record in Db.TblFile.Exec(SqlCommand):
+            FileName = Record[0].lstrip('#').strip()
+            FileName = FileName.lstrip('include').strip()
+            FileName = FileName.strip('\"')
+            FileName = FileName.lstrip('<').rstrip('>').strip()
+            NameSet.add(os.path.basename(FileName).lower())
+        IncludeDict[FullName] = NameSet
+
+    AffectedFileSet = set(ChangedFileList)
+    NameSet = set([os.path.basename(F).lower() for F in ChangedFileList if os.path.splitext(F)[1].lower() == '.h'])
+    while NameSet:
+        NewNameSet = set()
+        for FullName in IncludeDict:
+            if FullName not in AffectedFileSet and IncludeDict[FullName] & NameSet:
+                AffectedFileSet.add(FullName)
+                if os.path.splitext(FullName)[1].lower() == '.h':
+                    NewNameSet.add(os.path.basename(FullName).lower())
+        NameSet = NewNameSet
+    return AffectedFileSet
 
 def GetTableID(FullFileName, ErrorMsgList=None):
     if ErrorMsgList == None:
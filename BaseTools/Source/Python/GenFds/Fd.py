@@ -20,14 +20,97 @@ import Fv
 import Common.LongFilePathOs as os
 import StringIO
 import sys
+import mmap
 from struct import *
 from GenFdsGlobalVariable import GenFdsGlobalVariable
 from CommonDataClass.FdfClass import FDClassObject
 from Common import EdkLogger
 from Common.BuildToolError import *
 from Common.Misc import SaveFileOnChange
+from Common.LongFilePathSupport import OpenLongFilePath as open
 from GenFds import GenFds
 
+## Buffer discarding all data written into it
+#
+#   It's used when regions are generated only for the images they produce.
+#
+class NullBuffer(object):
+    def write(self, Data):
+        pass
+
+    def close(self):
+        pass
+
+## Buffer of FD image which is mapped to file
+#
+#   A temporary file of the FD size is created and mapped into memory, so that
+#   the data of regions is written into its place in the file directly instead
+#   of being collected in a string first. Like SaveFileOnChange, the FD file is
+#   replaced by the temporary file only if the content is changed.
+#
+#   @param  FileName    The path of FD file
+#   @param  Size        The size of FD
+#
+class FdFileBuffer(object):
+    _BLOCK_SIZE_ = 0x100000
+
+    def __init__(self, FileName, Size):
+        self.FileName = FileName
+        self.TempFileName = FileName + '.tmp'
+        self._File = open(self.TempFileName, 'w+b')
+        self._File.truncate(Size)
+        self._Map = mmap.mmap(self._File.fileno(), Size)
+
+    def write(self, Data):
+        if self._Map.tell() + len(Data) > self._Map.size():
+            EdkLogger.error("GenFds", GENFDS_ERROR, "Data written beyond the end of FD %s" % self.FileName)
+        self._Map.write(Data)
+
+    ## Check whether the FD file has the same content as the temporary file
+    def _IsFdFileChanged(self):
+        if not os.path.exists(self.FileName):
+            return True
+        if os.path.getsize(self.FileName) != os.path.getsize(self.TempFileName):
+            return True
+        FdFile = open(self.FileName, 'rb')
+        TempFile = open(self.TempFileName, 'rb')
+        try:
+            while True:
+                Data = FdFile.read(self._BLOCK_SIZE_)
+                if Data != TempFile.read(self._BLOCK_SIZE_):
+                    return True
+                if not Data:
+                    return False
+        finally:
+            FdFile.close()
+            TempFile.close()
+
+    ## Write the FD file
+    #
+    #   The FD file ends where the data written ends, as the one written from
+    #   a string buffer does.
+    #
+    def Save(self):
+        Length = self._Map.tell()
+        self._Map.close()
+        self._File.truncate(Length)
+        self._File.close()
+        if not self._IsFdFileChanged():
+            os.remove(self.TempFileName)
+            return False
+        if os.path.exists(self.FileName):
+            os.remove(self.FileName)
+        os.rename(self.TempFileName, self.FileName)
+        return True
+
+    ## Remove the temporary file if the FD file isn't saved
+    def close(self):
+        if not self._File.closed:
+            self._Map.close()
+            self._File.close()
+        if os.path.exists(self.TempFileName):
+            os.remove(self.TempFileName)
+
 ## generate FD
 #
 #
@@ -74,7 +157,8 @@ class FD(FDClassObject):
                 HasCapsuleRegion = True
                 break
         if HasCapsuleRegion:
-            TempFdBuffer = StringIO.StringIO('')
+            # only generate the images in regions, the data is not used
+            TempFdBuffer = NullBuffer()
             PreviousRegionStart = -1
             PreviousRegionSize = 1
 
@@ -103,7 +187,35 @@ class FD(FDClassObject):
                 GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
                 RegionObj.AddToBuffer (TempFdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict)
         
-        FdBuffer = StringIO.StringIO('')
+        if Flag or self.Size == 0:
+            FdBuffer = NullBuffer()
+        else:
+            FdBuffer = FdFileBuffer(FdFileName, self.Size)
+        try:
+            self.__AddRegionsToBuffer__(FdBuffer, Flag)
+            #
+            # Write the buffer contents to Fd file
+            #
+            GenFdsGlobalVariable.VerboseLogger('Write the buffer contents to Fd file')
+            if not Flag:
+                if self.Size == 0:
+                    SaveFileOnChange(FdFileName, '')
+                else:
+                    FdBuffer.Save()
+        finally:
+            FdBuffer.close()
+        GenFds.ImageBinDict[self.FdUiName.upper() + 'fd'] = FdFileName
+        return FdFileName
+
+    ## __AddRegionsToBuffer__() method
+    #
+    #   Add data of all regions, and the padding between them, to FD buffer
+    #
+    #   @param  self        The object pointer
+    #   @param  FdBuffer    The buffer the FD image is put in
+    #   @param  Flag        True for generating makefile only
+    #
+    def __AddRegionsToBuffer__(self, FdBuffer, Flag):
         PreviousRegionStart = -1
         PreviousRegionSize = 1
         for RegionObj in self.RegionList :
@@ -137,15 +249,6 @@ class FD(FDClassObject):
             #
             GenFdsGlobalVariable.VerboseLogger('Call each region\'s AddToBuffer function')
             RegionObj.AddToBuffer (FdBuffer, self.BaseAddress, self.BlockSizeList, self.ErasePolarity, GenFds.ImageBinDict, self.vtfRawDict, self.DefineVarDict,Flag=Flag)
-        #
-        # Write the buffer contents to Fd file
-        #
-        GenFdsGlobalVariable.VerboseLogger('Write the buffer contents to Fd file')
-        if not Flag:
-            SaveFileOnChange(FdFileName, FdBuffer.getvalue())
-        FdBuffer.close()
-        GenFds.ImageBinDict[self.FdUiName.upper() + 'fd'] = FdFileName
-        return FdFileName
 
     ## generate VTF
     #
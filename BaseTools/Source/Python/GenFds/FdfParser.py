@@ -83,6 +83,15 @@ RegionSizeGuidPattern = re.compile("\s*(?P<base>\w+\.\w+)\s*\|\s*(?P<size>\w+\.\
 RegionOffsetPcdPattern = re.compile("\s*(?P<base>\w+\.\w+)\s*$")
 ShortcutPcdPattern = re.compile("\s*\w+\s*=\s*(?P<value>(?:0x|0X)?[a-fA-F0-9]+)\s*\|\s*(?P<name>\w+\.\w+)\s*")
 
+#
+# Patterns to scan the file lines, instead of stepping through them char by char
+#
+WhiteSpacePattern = re.compile("[\0\r\n \t]*")
+TokenPattern = re.compile("[^\s=|,{}]*")
+WordPattern = re.compile("[a-zA-Z_][a-zA-Z0-9_\-]*")
+OpPattern = re.compile("\S*")
+CommentCharPattern = re.compile('["/#\n]')
+
 AllIncludeFileList = []
 
 # Get the closest parent
@@ -312,13 +321,21 @@ class FdfParser:
     def __SkipWhiteSpace(self):
         Count = 0
         while not self.__EndOfFile():
-            Count += 1
-            if self.__CurrentChar() in (T_CHAR_NULL, T_CHAR_CR, T_CHAR_LF, T_CHAR_SPACE, T_CHAR_TAB):
-                self.__SkippedChars += str(self.__CurrentChar())
-                self.__GetOneChar()
-
-            else:
-                Count = Count - 1
+            Line = self.__CurrentLine()
+            Offset = self.CurrentOffsetWithinLine
+            End = WhiteSpacePattern.match(Line, Offset).end()
+            if self.CurrentLineNumber == len(self.Profile.FileLinesList):
+                # the last char of file is never skipped
+                End = min(End, len(Line) - 1)
+            elif End == len(Line):
+                # the rest of line are all white spaces, go on with next line
+                Count += End - Offset
+                self.CurrentLineNumber += 1
+                self.CurrentOffsetWithinLine = 0
+                continue
+            Count += End - Offset
+            self.CurrentOffsetWithinLine = End
+            if not self.__EndOfFile():
                 return Count
 
     ## __EndOfFile() method
@@ -410,29 +427,6 @@ class FdfParser:
     def __CurrentChar(self):
         return self.Profile.FileLinesList[self.CurrentLineNumber - 1][self.CurrentOffsetWithinLine]
 
-    ## __NextChar() method
-    #
-    #   Get the one char pass the char pointed to by the file buffer pointer
-    #
-    #   @param  self        The object pointer
-    #   @retval Char        Next char
-    #
-    def __NextChar(self):
-        if self.CurrentOffsetWithinLine == len(self.Profile.FileLinesList[self.CurrentLineNumber - 1]) - 1:
-            return self.Profile.FileLinesList[self.CurrentLineNumber][0]
-        else:
-            return self.Profile.FileLinesList[self.CurrentLineNumber - 1][self.CurrentOffsetWithinLine + 1]
-
-    ## __SetCurrentCharValue() method
-    #
-    #   Modify the value of current char
-    #
-    #   @param  self        The object pointer
-    #   @param  Value       The new value of current char
-    #
-    def __SetCurrentCharValue(self, Value):
-        self.Profile.FileLinesList[self.CurrentLineNumber - 1][self.CurrentOffsetWithinLine] = Value
-
     ## __CurrentLine() method
     #
     #   Get the list that contains current line contents
@@ -567,51 +561,76 @@ class FdfParser:
         # HashComment in quoted string " " is ignored.
         InString = False
 
-        while not self.__EndOfFile():
-
-            if self.__CurrentChar() == T_CHAR_DOUBLE_QUOTE and not InComment:
-                InString = not InString
-            # meet new line, then no longer in a comment for // and '#'
-            if self.__CurrentChar() == T_CHAR_LF:
-                self.CurrentLineNumber += 1
-                self.CurrentOffsetWithinLine = 0
-                if InComment and DoubleSlashComment:
-                    InComment = False
-                    DoubleSlashComment = False
-                if InComment and HashComment:
-                    InComment = False
-                    HashComment = False
-            # check for */ comment end
-            elif InComment and not DoubleSlashComment and not HashComment and self.__CurrentChar() == T_CHAR_STAR and self.__NextChar() == T_CHAR_SLASH:
-                self.__SetCurrentCharValue(T_CHAR_SPACE)
-                self.__GetOneChar()
-                self.__SetCurrentCharValue(T_CHAR_SPACE)
-                self.__GetOneChar()
-                InComment = False
-            # set comments to spaces
-            elif InComment:
-                self.__SetCurrentCharValue(T_CHAR_SPACE)
-                self.__GetOneChar()
-            # check for // comment
-            elif self.__CurrentChar() == T_CHAR_SLASH and self.__NextChar() == T_CHAR_SLASH and not self.__EndOfLine():
-                InComment = True
-                DoubleSlashComment = True
-            # check for '#' comment
-            elif self.__CurrentChar() == T_CHAR_HASH and not self.__EndOfLine() and not InString:
-                InComment = True
-                HashComment = True
-            # check for /* comment start
-            elif self.__CurrentChar() == T_CHAR_SLASH and self.__NextChar() == T_CHAR_STAR:
-                self.__SetCurrentCharValue( T_CHAR_SPACE)
-                self.__GetOneChar()
-                self.__SetCurrentCharValue( T_CHAR_SPACE)
-                self.__GetOneChar()
-                InComment = True
-            else:
-                self.__GetOneChar()
-
         # restore from ListOfList to ListOfString
         self.Profile.FileLinesList = ["".join(list) for list in self.Profile.FileLinesList]
+        LastLine = len(self.Profile.FileLinesList) - 1
+        for Index, Line in enumerate(self.Profile.FileLinesList):
+            # the last char of file is never checked
+            if Index == LastLine:
+                End = len(Line) - 1
+            else:
+                End = len(Line)
+            # ranges of comments to be set to spaces
+            CommentList = []
+            Offset = 0
+            while Offset < End:
+                if InComment:
+                    # meet new line, then no longer in a comment for // and '#'
+                    LineEnd = Line.find(T_CHAR_LF, Offset, End)
+                    if LineEnd == -1:
+                        LineEnd = End
+                    # check for */ comment end
+                    CommentEnd = -1
+                    if not DoubleSlashComment and not HashComment:
+                        CommentEnd = Line.find(T_CHAR_STAR + T_CHAR_SLASH, Offset, LineEnd + 1)
+                    if CommentEnd != -1:
+                        CommentList.append((Offset, CommentEnd + 2))
+                        Offset = CommentEnd + 2
+                        InComment = False
+                        continue
+                    CommentList.append((Offset, LineEnd))
+                    if LineEnd < End and (DoubleSlashComment or HashComment):
+                        InComment = False
+                        DoubleSlashComment = False
+                        HashComment = False
+                    break
+
+                Match = CommentCharPattern.search(Line, Offset, End)
+                if not Match:
+                    break
+                Offset = Match.start()
+                Char = Line[Offset]
+                if Char == T_CHAR_DOUBLE_QUOTE:
+                    InString = not InString
+                    Offset += 1
+                elif Char == T_CHAR_LF:
+                    break
+                # check for // comment
+                elif Char == T_CHAR_SLASH and Line[Offset + 1] == T_CHAR_SLASH:
+                    InComment = True
+                    DoubleSlashComment = True
+                # check for '#' comment
+                elif Char == T_CHAR_HASH and not InString:
+                    InComment = True
+                    HashComment = True
+                # check for /* comment start
+                elif Char == T_CHAR_SLASH and Line[Offset + 1] == T_CHAR_STAR:
+                    CommentList.append((Offset, Offset + 2))
+                    Offset += 2
+                    InComment = True
+                else:
+                    Offset += 1
+
+            # set comments to spaces
+            if CommentList:
+                NewLine = []
+                Start = 0
+                for CommentStart, CommentEnd in CommentList:
+                    NewLine.append(Line[Start:CommentStart])
+                    NewLine.append(T_CHAR_SPACE * (CommentEnd - CommentStart))
+                    Start = CommentEnd
+                NewLine.append(Line[Start:])
+                self.Profile.FileLinesList[Index] = "".join(NewLine)
         self.Rewind()
 
     ## PreprocessIncludeFile() method
@@ -982,14 +1001,15 @@ class FdfParser:
 
         # Only consider the same line, no multi-line token allowed
         StartPos = self.CurrentOffsetWithinLine
-        index = -1
+        Line = self.__CurrentLine()
+        EndPos = StartPos + len(String)
         if IgnoreCase:
-            index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].upper().find(String.upper())
+            Found = Line[StartPos : EndPos].upper() == String.upper()
         else:
-            index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].find(String)
-        if index == 0:
-            self.CurrentOffsetWithinLine += len(String)
-            self.__Token = self.__CurrentLine()[StartPos : self.CurrentOffsetWithinLine]
+            Found = Line.startswith(String, StartPos)
+        if Found:
+            self.CurrentOffsetWithinLine = EndPos
+            self.__Token = Line[StartPos : EndPos]
             return True
         return False
 
@@ -1009,17 +1029,18 @@ class FdfParser:
 
         # Only consider the same line, no multi-line token allowed
         StartPos = self.CurrentOffsetWithinLine
-        index = -1
+        Line = self.__CurrentLine()
+        EndPos = StartPos + len(KeyWord)
         if IgnoreCase:
-            index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].upper().find(KeyWord.upper())
+            Found = Line[StartPos : EndPos].upper() == KeyWord.upper()
         else:
-            index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].find(KeyWord)
-        if index == 0:
-            followingChar = self.__CurrentLine()[self.CurrentOffsetWithinLine + len(KeyWord)]
-            if not str(followingChar).isspace() and followingChar not in SEPERATOR_TUPLE:
+            Found = Line.startswith(KeyWord, StartPos)
+        if Found:
+            followingChar = Line[EndPos]
+            if not followingChar.isspace() and followingChar not in SEPERATOR_TUPLE:
                 return False
-            self.CurrentOffsetWithinLine += len(KeyWord)
-            self.__Token = self.__CurrentLine()[StartPos : self.CurrentOffsetWithinLine]
+            self.CurrentOffsetWithinLine = EndPos
+            self.__Token = Line[StartPos : EndPos]
             return True
         return False
 
@@ -1047,20 +1068,10 @@ class FdfParser:
         if self.__EndOfFile():
             return False
 
-        TempChar = self.__CurrentChar()
-        StartPos = self.CurrentOffsetWithinLine
-        if (TempChar >= 'a' and TempChar <= 'z') or (TempChar >= 'A' and TempChar <= 'Z') or TempChar == '_':
-            self.__GetOneChar()
-            while not self.__EndOfLine():
-                TempChar = self.__CurrentChar()
-                if (TempChar >= 'a' and TempChar <= 'z') or (TempChar >= 'A' and TempChar <= 'Z') \
-                or (TempChar >= '0' and TempChar <= '9') or TempChar == '_' or TempChar == '-':
-                    self.__GetOneChar()
-
-                else:
-                    break
-
-            self.__Token = self.__CurrentLine()[StartPos : self.CurrentOffsetWithinLine]
+        Match = WordPattern.match(self.__CurrentLine(), self.CurrentOffsetWithinLine)
+        if Match:
+            self.CurrentOffsetWithinLine = Match.end()
+            self.__Token = Match.group()
             return True
 
         return False
@@ -1081,28 +1092,20 @@ class FdfParser:
             return False
         # Record the token start position, the position of the first non-space char.
         StartPos = self.CurrentOffsetWithinLine
-        StartLine = self.CurrentLineNumber
-        while StartLine == self.CurrentLineNumber:
-            TempChar = self.__CurrentChar()
-            # Try to find the end char that is not a space and not in seperator tuple.
-            # That is, when we got a space or any char in the tuple, we got the end of token.
-            if not str(TempChar).isspace() and TempChar not in SEPERATOR_TUPLE:
-                self.__GetOneChar()
-            # if we happen to meet a seperator as the first char, we must proceed to get it.
-            # That is, we get a token that is a seperator char. nomally it is the boundary of other tokens.
-            elif StartPos == self.CurrentOffsetWithinLine and TempChar in SEPERATOR_TUPLE:
-                self.__GetOneChar()
-                break
-            else:
-                break
-#        else:
-#            return False
-
-        EndPos = self.CurrentOffsetWithinLine
-        if self.CurrentLineNumber != StartLine:
-            EndPos = len(self.Profile.FileLinesList[StartLine-1])
-        self.__Token = self.Profile.FileLinesList[StartLine-1][StartPos : EndPos]
-        if StartPos != self.CurrentOffsetWithinLine:
+        Line = self.__CurrentLine()
+        # Try to find the end char that is a space or any char in seperator tuple.
+        EndPos = TokenPattern.match(Line, StartPos).end()
+        # if we happen to meet a seperator as the first char, we must proceed to get it.
+        # That is, we get a token that is a seperator char. nomally it is the boundary of other tokens.
+        if EndPos == StartPos and Line[StartPos] in SEPERATOR_TUPLE:
+            EndPos += 1
+        self.__Token = Line[StartPos : EndPos]
+        if EndPos == len(Line):
+            self.CurrentLineNumber += 1
+            self.CurrentOffsetWithinLine = 0
+        else:
+            self.CurrentOffsetWithinLine = EndPos
+        if StartPos != EndPos:
             return True
         else:
             return False
@@ -1114,18 +1117,15 @@ class FdfParser:
             return False
         # Record the token start position, the position of the first non-space char.
         StartPos = self.CurrentOffsetWithinLine
-        while not self.__EndOfLine():
-            TempChar = self.__CurrentChar()
-            # Try to find the end char that is not a space
-            if not str(TempChar).isspace():
-                self.__GetOneChar()
-            else:
-                break
-        else:
+        Line = self.__CurrentLine()
+        # Try to find the end char that is a space
+        EndPos = OpPattern.match(Line, StartPos).end()
+        if EndPos == len(Line):
             return False
+        self.CurrentOffsetWithinLine = EndPos
 
-        if StartPos != self.CurrentOffsetWithinLine:
-            self.__Token = self.__CurrentLine()[StartPos : self.CurrentOffsetWithinLine]
+        if StartPos != EndPos:
+            self.__Token = Line[StartPos : EndPos]
             return True
         else:
             return False
@@ -1177,30 +1177,26 @@ class FdfParser:
     #
     def __UndoToken(self):
         self.__UndoOneChar()
-        while self.__CurrentChar().isspace():
-            if not self.__UndoOneChar():
+        # Go back over the spaces, to the last char of the token
+        while True:
+            Line = self.__CurrentLine()
+            EndPos = len(Line[: self.CurrentOffsetWithinLine + 1].rstrip()) - 1
+            if EndPos >= 0:
+                break
+            if self.CurrentLineNumber == 1:
+                self.CurrentOffsetWithinLine = 0
                 self.__GetOneChar()
                 return
+            self.CurrentLineNumber -= 1
+            self.CurrentOffsetWithinLine = len(self.__CurrentLine()) - 1
 
-
-        StartPos = self.CurrentOffsetWithinLine
-        CurrentLine = self.CurrentLineNumber
-        while CurrentLine == self.CurrentLineNumber:
-
-            TempChar = self.__CurrentChar()
-            # Try to find the end char that is not a space and not in seperator tuple.
-            # That is, when we got a space or any char in the tuple, we got the end of token.
-            if not str(TempChar).isspace() and not TempChar in SEPERATOR_TUPLE:
-                if not self.__UndoOneChar():
-                    return
-            # if we happen to meet a seperator as the first char, we must proceed to get it.
-            # That is, we get a token that is a seperator char. nomally it is the boundary of other tokens.
-            elif StartPos == self.CurrentOffsetWithinLine and TempChar in SEPERATOR_TUPLE:
-                return
-            else:
-                break
-
-        self.__GetOneChar()
+        # if we happen to meet a seperator as the last char, it's the token itself.
+        # Otherwise go back to the char after a space or any char in seperator tuple.
+        StartPos = EndPos
+        if Line[EndPos] not in SEPERATOR_TUPLE:
+            while StartPos > 0 and not Line[StartPos - 1].isspace() and Line[StartPos - 1] not in SEPERATOR_TUPLE:
+                StartPos -= 1
+        self.CurrentOffsetWithinLine = StartPos
 
     ## __HexDigit() method
     #
@@ -1339,17 +1335,20 @@ class FdfParser:
 
         self.__SkippedChars = ""
         while not self.__EndOfFile():
-            index = -1
+            Line = self.__CurrentLine()
+            Offset = self.CurrentOffsetWithinLine
             if IgnoreCase:
-                index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].upper().find(String.upper())
+                index = Line.upper().find(String.upper(), Offset)
             else:
-                index = self.__CurrentLine()[self.CurrentOffsetWithinLine : ].find(String)
-            if index == 0:
-                self.CurrentOffsetWithinLine += len(String)
-                self.__SkippedChars += String
+                index = Line.find(String, Offset)
+            # the last char of file is never searched
+            if index != -1 and (index < len(Line) - 1 or self.CurrentLineNumber < len(self.Profile.FileLinesList)):
+                self.CurrentOffsetWithinLine = index + len(String)
+                self.__SkippedChars += Line[Offset : index] + String
                 return True
-            self.__SkippedChars += str(self.__CurrentChar())
-            self.__GetOneChar()
+            self.__SkippedChars += Line[Offset :]
+            self.CurrentLineNumber += 1
+            self.CurrentOffsetWithinLine = 0
 
         self.SetFileBufferPos( StartPos)
         self.__SkippedChars = ""
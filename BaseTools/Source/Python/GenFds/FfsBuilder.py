@@ -0,0 +1,607 @@
+## @file
+# Generate sections and FFS files in the same way as GenSec and GenFfs, and
+# compress GUIDed section data in the same way as LzmaCompress
+#
+#  Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import re
+import struct
+import uuid
+import zlib
+import Common.LongFilePathOs as os
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+# the extension is built from Source/C/PyEfiCompressor, the C tools are used without it
+try:
+    from EfiCompressor import LzmaCompress
+except ImportError:
+    LzmaCompress = None
+
+#
+# The output of functions in this file must be byte-identical to the one of
+# GenSec, GenFfs and the GUID tools. Anything not supported here, including every case the C
+# tools report as an error, is left to the C tools, so that they still give
+# the same result and error message.
+#
+
+MAX_SECTION_SIZE = 0x1000000
+MAX_FFS_SIZE = 0x1000000
+
+EFI_SECTION_GUID_DEFINED = 0x02
+EFI_SECTION_PE32 = 0x10
+EFI_SECTION_TE = 0x12
+EFI_SECTION_VERSION = 0x14
+EFI_SECTION_FIRMWARE_VOLUME_IMAGE = 0x17
+EFI_SECTION_FREEFORM_SUBTYPE_GUID = 0x18
+EFI_SECTION_RAW = 0x19
+EFI_SECTION_COMPRESSION = 0x01
+
+EFI_GUIDED_SECTION_PROCESSING_REQUIRED = 0x01
+EFI_GUIDED_SECTION_AUTH_STATUS_VALID = 0x02
+EFI_GUIDED_SECTION_NONE = 0x80
+
+FFS_ATTRIB_LARGE_FILE = 0x01
+FFS_ATTRIB_DATA_ALIGNMENT2 = 0x02
+FFS_ATTRIB_FIXED = 0x04
+FFS_ATTRIB_CHECKSUM = 0x40
+FFS_FIXED_CHECKSUM = 0xAA
+EFI_FILE_STATE = 0x07    # HEADER_CONSTRUCTION | HEADER_VALID | DATA_VALID
+
+EFI_TE_IMAGE_HEADER_SIGNATURE = 0x5A56
+EFI_TE_IMAGE_HEADER_SIZE = 40
+EFI_IMAGE_DIRECTORY_ENTRY_DEBUG = 6
+EFI_IMAGE_DEBUG_TYPE_CODEVIEW = 2
+
+## FFS file types whose PE32 and TE sections are rebased by GenFv
+RebasedFfsType = (0x03, 0x04, 0x05, 0x06, 0x07, 0x08)
+
+## Size of CodeView entries before the PDB file name
+CodeViewEntrySize = {
+    'NB10'  : 16,
+    'RSDS'  : 24,
+    'MTOC'  : 20,
+}
+
+## Section types handled here, compression section is always left to GenSec
+SectionTypeValue = {
+    'EFI_SECTION_GUID_DEFINED'          : 0x02,
+    'EFI_SECTION_PE32'                  : 0x10,
+    'EFI_SECTION_PIC'                   : 0x11,
+    'EFI_SECTION_TE'                    : 0x12,
+    'EFI_SECTION_DXE_DEPEX'             : 0x13,
+    'EFI_SECTION_VERSION'               : 0x14,
+    'EFI_SECTION_COMPATIBILITY16'       : 0x16,
+    'EFI_SECTION_FIRMWARE_VOLUME_IMAGE' : 0x17,
+    'EFI_SECTION_FREEFORM_SUBTYPE_GUID' : 0x18,
+    'EFI_SECTION_RAW'                   : 0x19,
+    'EFI_SECTION_PEI_DEPEX'             : 0x1B,
+    'EFI_SECTION_SMM_DEPEX'             : 0x1C,
+}
+
+FfsTypeValue = {
+    'EFI_FV_FILETYPE_RAW'                   : 0x01,
+    'EFI_FV_FILETYPE_FREEFORM'              : 0x02,
+    'EFI_FV_FILETYPE_SECURITY_CORE'         : 0x03,
+    'EFI_FV_FILETYPE_PEI_CORE'              : 0x04,
+    'EFI_FV_FILETYPE_DXE_CORE'              : 0x05,
+    'EFI_FV_FILETYPE_PEIM'                  : 0x06,
+    'EFI_FV_FILETYPE_DRIVER'                : 0x07,
+    'EFI_FV_FILETYPE_COMBINED_PEIM_DRIVER'  : 0x08,
+    'EFI_FV_FILETYPE_APPLICATION'           : 0x09,
+    'EFI_FV_FILETYPE_SMM'                   : 0x0A,
+    'EFI_FV_FILETYPE_FIRMWARE_VOLUME_IMAGE' : 0x0B,
+    'EFI_FV_FILETYPE_COMBINED_SMM_DXE'      : 0x0C,
+    'EFI_FV_FILETYPE_SMM_CORE'              : 0x0D,
+    'EFI_FV_FILETYPE_MM_STANDALONE'         : 0x0E,
+    'EFI_FV_FILETYPE_MM_CORE_STANDALONE'    : 0x0F,
+}
+
+## Section alignment names accepted by both tools
+AlignmentValue = {}
+for _Index, _Name in enumerate(["1", "2", "4", "8", "16", "32", "64", "128", "256", "512",
+                                "1K", "2K", "4K", "8K", "16K", "32K", "64K", "128K", "256K",
+                                "512K", "1M", "2M", "4M", "8M", "16M"]):
+    AlignmentValue[_Name] = 1 << _Index
+
+FfsAlignName = ["8", "16", "128", "512", "1K", "4K", "32K", "64K", "128K", "256K",
+                "512K", "1M", "2M", "4M", "8M", "16M"]
+FfsAlignValue = [0, 8, 16, 128, 512, 1024, 4096, 32768, 65536, 131072, 262144,
+                 524288, 1048576, 2097152, 4194304, 8388608, 16777216]
+
+## GUID tools compressing data in process, and whether x86 converter is enabled
+GuidToolX86Convert = {
+    'LzmaCompress'      : False,
+    'LzmaF86Compress'   : True,
+}
+
+ZeroGuid = '\0' * 16
+Crc32SectionGuid = uuid.UUID('FC1BCDB0-7D31-49AA-936A-A4600D9DD083').get_bytes_le()
+FfsSectionAlignmentPaddingGuid = uuid.UUID('04132C8D-0A22-4FA8-826E-8BBFEFDB836C').get_bytes_le()
+
+gGuidPattern = re.compile('^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+# characters passed to the C tools through shell without being changed
+gPlainStringPattern = re.compile('^[\w.,:/=@%+-]+$')
+
+## Raised when the request must be handled by the C tool
+class _Unsupported(Exception):
+    pass
+
+def _ReadFile(File):
+    try:
+        Fd = open(File, 'rb')
+        try:
+            return Fd.read()
+        finally:
+            Fd.close()
+    except IOError:
+        raise _Unsupported
+
+def _WriteFile(File, Data):
+    Fd = open(File, 'wb')
+    try:
+        Fd.write(Data)
+    finally:
+        Fd.close()
+
+def _GetGuid(Guid):
+    if Guid == None or not gGuidPattern.match(Guid):
+        raise _Unsupported
+    return uuid.UUID(Guid).get_bytes_le()
+
+def _GetAlignment(AlignString):
+    if AlignString == None or AlignString.upper() not in AlignmentValue:
+        raise _Unsupported
+    return AlignmentValue[AlignString.upper()]
+
+## Common section header for given section size
+def _GetSectionHeader(Type, Size, UseHeader2=False):
+    if UseHeader2:
+        return struct.pack('<BBBBI', 0xff, 0xff, 0xff, Type, Size)
+    if Size == 0xffffff:
+        # GenSec takes it as the size of EFI_COMMON_SECTION_HEADER2
+        raise _Unsupported
+    return struct.pack('<BBBB', Size & 0xff, (Size >> 8) & 0xff, (Size >> 16) & 0xff, Type)
+
+## Concatenate section files with alignment padding
+#
+#   This is GetSectionContents() of GenSec, or of GenFfs if IsFfs is True.
+#
+#   @param  InputList       List of section files
+#   @param  AlignList       Alignment of each section data, None for no alignment
+#   @param  FfsAttrib       Attributes of FFS file
+#   @param  IsFfs           Whether the contents are for FFS file
+#
+#   @retval tuple           (Contents, MaxAlignment, PeSectionNum)
+#
+def _GetSectionContents(InputList, AlignList, FfsAttrib=0, IsFfs=False):
+    Buffer = []
+    PadList = []
+    Size = 0
+    MaxAlignment = 1
+    PeSectionNum = 0
+    for Index in range(len(InputList)):
+        # make sure section ends on a DWORD boundary
+        if Size & 0x03:
+            Buffer.append('\0' * (4 - (Size & 0x03)))
+            Size += 4 - (Size & 0x03)
+
+        Data = _ReadFile(InputList[Index])
+        FileSize = len(Data)
+        if AlignList:
+            if FileSize < 4:
+                # C tools read uninitialized header
+                raise _Unsupported
+            Alignment = AlignList[Index]
+            TeOffset = 0
+            if FileSize >= MAX_SECTION_SIZE:
+                HeaderSize = 8
+            else:
+                HeaderSize = 4
+            Type = ord(Data[3])
+            if Type == EFI_SECTION_TE:
+                PeSectionNum += 1
+                if FileSize < HeaderSize + 8:
+                    raise _Unsupported
+                Signature, StrippedSize = struct.unpack_from('<H4xH', Data, HeaderSize)
+                if Signature == EFI_TE_IMAGE_HEADER_SIGNATURE:
+                    TeOffset = (StrippedSize - EFI_TE_IMAGE_HEADER_SIZE) & 0xffffffff
+            elif Type == EFI_SECTION_PE32:
+                PeSectionNum += 1
+            elif Type == EFI_SECTION_GUID_DEFINED:
+                PeSectionNum += 1
+                if FileSize >= MAX_SECTION_SIZE:
+                    GuidHeaderOffset = 24
+                else:
+                    GuidHeaderOffset = 20
+                if FileSize < GuidHeaderOffset + 4:
+                    raise _Unsupported
+                DataOffset, Attributes = struct.unpack_from('<HH', Data, GuidHeaderOffset)
+                if (Attributes & EFI_GUIDED_SECTION_PROCESSING_REQUIRED) == 0:
+                    HeaderSize = DataOffset
+            elif Type in (EFI_SECTION_COMPRESSION, EFI_SECTION_FIRMWARE_VOLUME_IMAGE):
+                # for the encapsulated section, assume it contains Pe/Te section
+                PeSectionNum += 1
+
+            # make sure the original PE image header is at alignment
+            if TeOffset != 0:
+                TeOffset = (Alignment - (TeOffset % Alignment)) % Alignment
+
+            # make sure section data meet its alignment requirement by adding one pad section
+            if ((Size + HeaderSize + TeOffset) & 0xffffffff) % Alignment != 0:
+                Offset = (Size + 4 + HeaderSize + TeOffset + Alignment - 1) & ~(Alignment - 1) & 0xffffffff
+                Offset = (Offset - Size - HeaderSize - TeOffset) & 0xffffffff
+                if IsFfs and (FfsAttrib & FFS_ATTRIB_FIXED) != 0 and MaxAlignment <= 1 and Offset >= 20:
+                    # reducible padding section
+                    Pad = _GetSectionHeader(EFI_SECTION_FREEFORM_SUBTYPE_GUID, Offset) + FfsSectionAlignmentPaddingGuid
+                else:
+                    Pad = _GetSectionHeader(EFI_SECTION_RAW, Offset)
+                Buffer.append(Pad + '\0' * (Offset - len(Pad)))
+                Size += Offset
+                PadList.append(Size)
+
+            if MaxAlignment < Alignment:
+                MaxAlignment = Alignment
+
+        Buffer.append(Data)
+        Size += FileSize
+
+    if Size in PadList:
+        # C tools don't write the pad section at the end of buffer
+        raise _Unsupported
+    return ''.join(Buffer), MaxAlignment, PeSectionNum
+
+def _GenSection(Input, Type, Guid, GuidHdrLen, GuidAttr, Ver, InputAlign, BuildNumber):
+    Input = list(Input or [])
+    AlignList = None
+    if InputAlign != None:
+        AlignList = [_GetAlignment(Align) for Align in InputAlign]
+        if len(AlignList) != len(Input):
+            raise _Unsupported
+
+    if Type in [None, '']:
+        Data, MaxAlignment, PeSectionNum = _GetSectionContents(Input, AlignList)
+        return Data
+
+    Type = Type.upper()
+    if Type not in SectionTypeValue:
+        raise _Unsupported
+    SectType = SectionTypeValue[Type]
+
+    if SectType == EFI_SECTION_VERSION:
+        if Ver in [None, ''] or not gPlainStringPattern.match(Ver):
+            raise _Unsupported
+        VersionNumber = 0
+        if BuildNumber:
+            if not re.match('^-?[0-9]+$', BuildNumber):
+                raise _Unsupported
+            VersionNumber = int(BuildNumber)
+            if VersionNumber < 0 or VersionNumber > 65535:
+                raise _Unsupported
+        VersionString = ''.join([Char + '\0' for Char in Ver]) + '\0\0'
+        Size = 4 + 2 + len(VersionString)
+        return _GetSectionHeader(SectType, Size) + struct.pack('<H', VersionNumber) + VersionString
+
+    if SectType == EFI_SECTION_GUID_DEFINED:
+        VendorGuid = ZeroGuid
+        if Guid != None:
+            VendorGuid = _GetGuid(Guid)
+        Attributes = EFI_GUIDED_SECTION_NONE
+        for Attr in GuidAttr:
+            if Attr.upper() == 'PROCESSING_REQUIRED':
+                Attributes |= EFI_GUIDED_SECTION_PROCESSING_REQUIRED
+            elif Attr.upper() == 'AUTH_STATUS_VALID':
+                Attributes |= EFI_GUIDED_SECTION_AUTH_STATUS_VALID
+            elif Attr.upper() == 'NONE':
+                Attributes |= EFI_GUIDED_SECTION_NONE
+            else:
+                raise _Unsupported
+        Attributes &= ~EFI_GUIDED_SECTION_NONE
+        HeaderLength = 0
+        if GuidHdrLen not in [None, '']:
+            if not re.match('^[0-9]+$', GuidHdrLen):
+                raise _Unsupported
+            HeaderLength = int(GuidHdrLen)
+        if VendorGuid != ZeroGuid:
+            # alignment of unknown guided section is processed in its dummy section
+            AlignList = None
+        Data, MaxAlignment, PeSectionNum = _GetSectionContents(Input, AlignList)
+        if len(Data) == 0:
+            raise _Unsupported
+
+        if VendorGuid == ZeroGuid:
+            # default guided section is CRC32
+            Offset = 28
+            if len(Data) + Offset >= MAX_SECTION_SIZE:
+                Offset = 32
+            Header = _GetSectionHeader(SectType, len(Data) + Offset, Offset == 32)
+            Header += Crc32SectionGuid + struct.pack('<HHI', Offset, EFI_GUIDED_SECTION_AUTH_STATUS_VALID,
+                                                      zlib.crc32(Data) & 0xffffffff)
+        else:
+            Offset = 24
+            if len(Data) + Offset >= MAX_SECTION_SIZE:
+                Offset = 28
+            Header = _GetSectionHeader(SectType, len(Data) + Offset, Offset == 28)
+            Header += VendorGuid + struct.pack('<HH', (Offset + HeaderLength) & 0xffff, Attributes & 0xffff)
+        return Header + Data
+
+    # common leaf section
+    if len(Input) != 1:
+        raise _Unsupported
+    Data = _ReadFile(Input[0])
+    Size = 4 + len(Data)
+    if Size >= MAX_SECTION_SIZE:
+        return _GetSectionHeader(SectType, 8 + len(Data), True) + Data
+    return _GetSectionHeader(SectType, Size) + Data
+
+## Generate a section in the same way as GenSec
+#
+#   @param  Output          Path of output section file
+#   @param  Input           List of input files
+#   @param  Type            Section type, None for the section contents only
+#   @param  Guid            GUID of guided section
+#   @param  GuidHdrLen      Extra header length of guided section
+#   @param  GuidAttr        Attribute list of guided section
+#   @param  Ver             Version string of version section
+#   @param  InputAlign      Alignment of each input file
+#   @param  BuildNumber     Build number of version section
+#
+#   @retval True            The section is generated
+#   @retval False           The section must be generated by GenSec
+#
+def GenSection(Output, Input, Type=None, Guid=None, GuidHdrLen=None, GuidAttr=[], Ver=None,
+               InputAlign=None, BuildNumber=None):
+    try:
+        Data = _GenSection(Input, Type, Guid, GuidHdrLen, GuidAttr, Ver, InputAlign, BuildNumber)
+    except _Unsupported:
+        return False
+    _WriteFile(Output, Data)
+    return True
+
+def _GenFfs(Input, Type, Guid, Fixed, CheckSum, Align, SectionAlign):
+    if Type.upper() not in FfsTypeValue:
+        raise _Unsupported
+    FfsType = FfsTypeValue[Type.upper()]
+    FileGuid = _GetGuid(Guid)
+    if FileGuid == ZeroGuid or len(Input) == 0:
+        raise _Unsupported
+
+    FfsAttrib = 0
+    if Fixed == True:
+        FfsAttrib |= FFS_ATTRIB_FIXED
+    if CheckSum:
+        FfsAttrib |= FFS_ATTRIB_CHECKSUM
+    FfsAlign = 0
+    if Align not in [None, '']:
+        if Align.upper() in FfsAlignName:
+            FfsAlign = FfsAlignName.index(Align.upper())
+        elif Align not in ('1', '2', '4'):
+            raise _Unsupported
+
+    AlignList = []
+    for Index in range(len(Input)):
+        if SectionAlign not in [None, '', []] and SectionAlign[Index] not in [None, '']:
+            # alignment "0" is got from PE image by GenFfs
+            AlignList.append(_GetAlignment(SectionAlign[Index]))
+        else:
+            AlignList.append(1)
+
+    Data, MaxAlignment, PeSectionNum = _GetSectionContents(Input, AlignList, FfsAttrib, True)
+    if FfsType in (0x03, 0x04, 0x05) and PeSectionNum != 1:
+        raise _Unsupported
+    if FfsType in (0x06, 0x07, 0x08, 0x09) and PeSectionNum < 1:
+        raise _Unsupported
+
+    # update FFS alignment based on the max alignment required by input section files
+    for Index in range(len(FfsAlignValue) - 1):
+        if MaxAlignment > FfsAlignValue[Index] and MaxAlignment <= FfsAlignValue[Index + 1]:
+            break
+    else:
+        Index = len(FfsAlignValue) - 1
+    if FfsAlign < Index:
+        FfsAlign = Index
+
+    if len(Data) + 24 >= MAX_FFS_SIZE:
+        FfsAttrib |= FFS_ATTRIB_LARGE_FILE
+        Size = '\0\0\0'
+        Extended = struct.pack('<Q', len(Data) + 32)
+    else:
+        FileSize = len(Data) + 24
+        Size = struct.pack('<BBB', FileSize & 0xff, (FileSize >> 8) & 0xff, (FileSize >> 16) & 0xff)
+        Extended = ''
+    if FfsAlign < 8:
+        Attributes = FfsAttrib | (FfsAlign << 3)
+    else:
+        Attributes = FfsAttrib | ((FfsAlign & 0x7) << 3) | FFS_ATTRIB_DATA_ALIGNMENT2
+    Attributes &= 0xff
+
+    Header = FileGuid + '\0\0' + chr(FfsType) + chr(Attributes) + Size + '\0' + Extended
+    HeaderChecksum = (0x100 - sum(bytearray(Header))) & 0xff
+    if Attributes & FFS_ATTRIB_CHECKSUM:
+        FileChecksum = (0x100 - sum(bytearray(Data))) & 0xff
+    else:
+        FileChecksum = FFS_FIXED_CHECKSUM
+    return FileGuid + chr(HeaderChecksum) + chr(FileChecksum) + chr(FfsType) + chr(Attributes) + \
+           Size + chr(EFI_FILE_STATE) + Extended + Data
+
+## Generate a FFS file in the same way as GenFfs
+#
+#   @param  Output          Path of output FFS file
+#   @param  Input           List of section files
+#   @param  Type            FFS file type
+#   @param  Guid            File GUID
+#   @param  Fixed           Whether the file is at fixed location
+#   @param  CheckSum        Whether the checksum of file data is calculated
+#   @param  Align           FFS file alignment
+#   @param  SectionAlign    Alignment of each section file
+#
+#   @retval True            The FFS file is generated
+#   @retval False           The FFS file must be generated by GenFfs
+#
+def GenFfs(Output, Input, Type, Guid, Fixed=False, CheckSum=False, Align=None, SectionAlign=None):
+    try:
+        Data = _GenFfs(Input, Type, Guid, Fixed, CheckSum, Align, SectionAlign)
+    except _Unsupported:
+        return False
+    _WriteFile(Output, Data)
+    return True
+
+## Run GUID tool in process
+#
+# Only encoding by LZMA tools is done here.
+#
+#   @param  Output          Output file name
+#   @param  Input           List of input file names
+#   @param  ToolPath        Path of the GUID tool
+#   @param  Options         Options of the GUID tool
+#
+#   @retval True            The output is generated
+#   @retval False           The output must be generated by the GUID tool
+#
+def GuidTool(Output, Input, ToolPath, Options):
+    ToolName = os.path.splitext(os.path.basename(ToolPath))[0]
+    if LzmaCompress == None or ToolName not in GuidToolX86Convert:
+        return False
+    # other options, like -z of the first call, make the tool fail or behave differently
+    if Options.split() != ['-e'] or len(Input) != 1:
+        return False
+    try:
+        Data = _ReadFile(Input[0])
+    except _Unsupported:
+        return False
+    if not Data:
+        return False
+    _WriteFile(Output, LzmaCompress(Data, GuidToolX86Convert[ToolName]))
+    return True
+
+## Get the PDB file name of an image in the same way as PeCoffLoaderGetPdbPointer
+#
+#   @param  Image           The data of PE32 or TE image
+#
+#   @retval string          The PDB file name, None if the image has none
+#
+def _GetPdbName(Image):
+    HeaderOffset = 0
+    if Image[0:2] == 'MZ':
+        HeaderOffset = struct.unpack_from('<I', Image, 0x3C)[0] & 0xffff
+    if struct.unpack_from('<H', Image, HeaderOffset)[0] == EFI_TE_IMAGE_HEADER_SIGNATURE:
+        NumberOfSections, StrippedSize = struct.unpack_from('<BxH', Image, HeaderOffset + 4)
+        DebugRva, DebugSize = struct.unpack_from('<II', Image, HeaderOffset + 32)
+        SectionOffset = HeaderOffset + EFI_TE_IMAGE_HEADER_SIZE
+        # offsets in TE image are adjusted for the stripped headers, the debug directory is located from TE header
+        Adjust = EFI_TE_IMAGE_HEADER_SIZE - StrippedSize
+        DirectoryAdjust = HeaderOffset + Adjust
+    elif Image[HeaderOffset:HeaderOffset + 4] == 'PE\0\0':
+        Machine, NumberOfSections = struct.unpack_from('<HH', Image, HeaderOffset + 4)
+        SizeOfOptionalHeader = struct.unpack_from('<H', Image, HeaderOffset + 20)[0]
+        OptionalHeaderOffset = HeaderOffset + 24
+        Magic = struct.unpack_from('<H', Image, OptionalHeaderOffset)[0]
+        # like the C code, IA32, ARM, X64 and IPF images are known by machine type
+        if Machine in (0x014C, 0x01C2) or (Machine not in (0x8664, 0x0200) and Magic == 0x10B):
+            DirectoryOffset = OptionalHeaderOffset + 92
+        elif Magic == 0x20B:
+            DirectoryOffset = OptionalHeaderOffset + 108
+        else:
+            return None
+        NumberOfRvaAndSizes = struct.unpack_from('<I', Image, DirectoryOffset)[0]
+        if NumberOfRvaAndSizes <= EFI_IMAGE_DIRECTORY_ENTRY_DEBUG:
+            return None
+        DebugRva, DebugSize = struct.unpack_from('<II', Image, DirectoryOffset + 4 + 8 * EFI_IMAGE_DIRECTORY_ENTRY_DEBUG)
+        SectionOffset = OptionalHeaderOffset + SizeOfOptionalHeader
+        Adjust = 0
+        DirectoryAdjust = 0
+    else:
+        return None
+    if DebugRva == 0:
+        return None
+
+    SectionList = []
+    for Index in range(NumberOfSections):
+        VirtualSize, VirtualAddress, _, PointerToRawData = struct.unpack_from('<IIII', Image, SectionOffset + 40 * Index + 8)
+        SectionList.append((VirtualSize, VirtualAddress, PointerToRawData))
+    def GetOffset(Rva, Adjust):
+        for VirtualSize, VirtualAddress, PointerToRawData in SectionList:
+            if Rva >= VirtualAddress and Rva < VirtualAddress + VirtualSize:
+                return Rva - VirtualAddress + PointerToRawData + Adjust
+        return None
+
+    DebugOffset = GetOffset(DebugRva, DirectoryAdjust)
+    if DebugOffset == None:
+        return None
+    for Index in range(0, DebugSize, 28):
+        Type, SizeOfData, Rva = struct.unpack_from('<III', Image, DebugOffset + Index + 12)
+        if Type != EFI_IMAGE_DEBUG_TYPE_CODEVIEW or SizeOfData == 0:
+            continue
+        CodeViewOffset = GetOffset(Rva, Adjust)
+        if CodeViewOffset == None:
+            continue
+        Signature = Image[CodeViewOffset:CodeViewOffset + 4]
+        if Signature in CodeViewEntrySize:
+            Start = CodeViewOffset + CodeViewEntrySize[Signature]
+            End = Image.find('\0', Start)
+            if End == -1:
+                raise _Unsupported
+            return Image[Start:End]
+    return None
+
+## Get the files GenFv reads for the images in FFS files
+#
+# Besides the FFS files, GenFv reads the map file of each image it rebases,
+# whose name is got from the PDB file name in the image, and the EFI file
+# next to the FFS file if the relocations of the image are stripped.
+#
+#   @param  FfsFileList     List of FFS files
+#
+#   @retval list            Path list of the files, some of which may not exist
+#   @retval None            The files are unknown because of invalid FFS file
+#
+def GetImageFileList(FfsFileList):
+    FileList = []
+    try:
+        for FfsFile in FfsFileList:
+            Data = _ReadFile(FfsFile)
+            FfsType, Attributes = struct.unpack_from('<BB', Data, 18)
+            if FfsType not in RebasedFfsType:
+                continue
+            if Attributes & FFS_ATTRIB_LARGE_FILE:
+                Offset = 32
+                FileSize = struct.unpack_from('<Q', Data, 24)[0]
+            else:
+                Offset = 24
+                FileSize = struct.unpack_from('<I', Data[20:23] + '\0')[0]
+            FileSize = min(FileSize, len(Data))
+
+            NameList = []
+            while Offset + 4 <= FileSize:
+                SectionSize = struct.unpack_from('<I', Data[Offset:Offset + 3] + '\0')[0]
+                SectionType = ord(Data[Offset + 3])
+                HeaderSize = 4
+                if SectionSize == 0xffffff:
+                    SectionSize = struct.unpack_from('<I', Data, Offset + 4)[0]
+                    HeaderSize = 8
+                if SectionSize < HeaderSize:
+                    raise _Unsupported
+                if SectionType in (EFI_SECTION_PE32, EFI_SECTION_TE):
+                    NameList.append(_GetPdbName(Data[Offset + HeaderSize:Offset + SectionSize]) or FfsFile)
+                Offset = (Offset + SectionSize + 3) & ~3
+
+            if NameList:
+                FileList.append(os.path.splitext(FfsFile)[0] + '.efi')
+            for Name in NameList:
+                Name = Name.replace('\\', '/')
+                if Name.rfind('.') != -1:
+                    FileList.append(Name[:Name.rfind('.')] + '.map')
+    except (_Unsupported, struct.error):
+        return None
+    return FileList
@@ -59,7 +59,8 @@ class FV (FvClassObject):
     #   Generate Fv and add it to the Buffer
     #
     #   @param  self        The object pointer
-    #   @param  Buffer      The buffer generated FV data will be put
+    #   @param  Buffer      The buffer generated FV data will be put, None if
+    #                       only the FV file is needed
     #   @param  BaseAddress base address of FV
     #   @param  BlockSize   block size of FV
     #   @param  BlockNum    How many blocks in FV
@@ -201,8 +202,9 @@ class FV (FvClassObject):
                 GenFdsGlobalVariable.VerboseLogger("\nGenerate %s FV Successfully" % self.UiFvName)
                 GenFdsGlobalVariable.SharpCounter = 0
 
-                Buffer.write(FvFileObj.read())
-                FvFileObj.seek(0)
+                if Buffer != None:
+                    Buffer.write(FvFileObj.read())
+                    FvFileObj.seek(0)
                 # PI FvHeader is 0x48 byte
                 FvHeaderBuffer = FvFileObj.read(0x48)
                 # FV alignment position.
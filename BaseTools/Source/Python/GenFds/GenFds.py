@@ -42,6 +42,8 @@ from Common.Misc import CheckPcdDatum
 from Common.Misc import BuildOptionPcdValueFormat
 from Common.BuildVersion import gBUILD_VERSION
 from Common.MultipleWorkspace import MultipleWorkspace as mws
+from Common.BinaryCache import BinaryCache
+from Common.FileDigestCache import FileDigestCache
 import FfsFileStatement
 import glob
 from struct import unpack
@@ -64,27 +66,49 @@ def main():
     global Options
     Options = myOptionParser()
 
+    EdkLogger.Initialize()
+    return GenFdsApi(Options)
+
+## Generate flash images per the options
+#
+# This method is called by main() for the command line, and by build to
+# generate flash images in the build process. In the later case, the
+# workspace database and FDF parser of build are reused, and the log level
+# of build is kept.
+#
+#   @param  Options             A optparse.Values object containing the options
+#   @param  WorkSpaceDataObject The WorkspaceDatabase object of build
+#   @param  FdfParserObj        The FdfParser object of build
+#
+#   @retval 0     Tool was successful
+#   @retval 1     Tool failed
+#
+def GenFdsApi(Options, WorkSpaceDataObject=None, FdfParserObj=None):
     global Workspace
     Workspace = ""
     ArchList = None
     ReturnCode = 0
+    CurrentDir = os.getcwd()
+    CurrentWorkspace = os.environ.get("WORKSPACE")
 
-    EdkLogger.Initialize()
+    ResetFdsGlobalVariable()
     try:
         if Options.verbose != None:
-            EdkLogger.SetLevel(EdkLogger.VERBOSE)
             GenFdsGlobalVariable.VerboseMode = True
-            
         if Options.FixedAddress != None:
             GenFdsGlobalVariable.FixedLoadAddress = True
-            
-        if Options.quiet != None:
-            EdkLogger.SetLevel(EdkLogger.QUIET)
         if Options.debug != None:
-            EdkLogger.SetLevel(Options.debug + 1)
             GenFdsGlobalVariable.DebugLevel = Options.debug
-        else:
-            EdkLogger.SetLevel(EdkLogger.INFO)
+
+        if WorkSpaceDataObject == None:
+            if Options.verbose != None:
+                EdkLogger.SetLevel(EdkLogger.VERBOSE)
+            if Options.quiet != None:
+                EdkLogger.SetLevel(EdkLogger.QUIET)
+            if Options.debug != None:
+                EdkLogger.SetLevel(Options.debug + 1)
+            else:
+                EdkLogger.SetLevel(EdkLogger.INFO)
 
         if (Options.Workspace == None):
             EdkLogger.error("GenFds", OPTION_MISSING, "WORKSPACE not defined",
@@ -186,6 +210,17 @@ def main():
         else:
             EdkLogger.error("GenFds", FILE_NOT_FOUND, ExtraData=BuildConfigurationFile)
 
+        if Options.GenFdsCacheSize < 0:
+            EdkLogger.error("GenFds", OPTION_VALUE_INVALID, ExtraData="Invalid value of option --genfds-cache-size.")
+        if Options.GenFdsCache:
+            CacheDir = os.path.normpath(Options.GenFdsCache)
+            if not os.path.isabs(CacheDir):
+                CacheDir = os.path.join(GenFdsGlobalVariable.WorkSpaceDir, CacheDir)
+            if not os.path.exists(CacheDir):
+                os.makedirs(CacheDir)
+            GenFdsGlobalVariable.ArtifactCache = BinaryCache(CacheDir, Options.GenFdsCacheSize * 1024 * 1024, 'GenFds cache')
+            GenFdsGlobalVariable.DigestCache = FileDigestCache(os.path.join(CacheDir, 'FileDigest.cache'))
+
         #Set global flag for build mode
         GlobalData.gIgnoreSource = Options.IgnoreSources
 
@@ -223,16 +258,20 @@ def main():
         if "TOOL_CHAIN_TAG" not in GlobalData.gGlobalDefines.keys():
             GlobalData.gGlobalDefines['TOOL_CHAIN_TAG'] = GenFdsGlobalVariable.ToolChainTag
 
-        """call Workspace build create database"""
-        GlobalData.gDatabasePath = os.path.normpath(os.path.join(ConfDirectoryPath, GlobalData.gDatabasePath))
-        BuildWorkSpace = WorkspaceDatabase(GlobalData.gDatabasePath)
-        BuildWorkSpace.InitDatabase()
-        
-        #
-        # Get files real name in workspace dir
-        #
-        GlobalData.gAllFiles = DirCache(Workspace)
-        GlobalData.gWorkspace = Workspace
+        if WorkSpaceDataObject != None:
+            # the workspace database and the files in workspace dir are got by build
+            BuildWorkSpace = WorkSpaceDataObject
+        else:
+            """call Workspace build create database"""
+            GlobalData.gDatabasePath = os.path.normpath(os.path.join(ConfDirectoryPath, GlobalData.gDatabasePath))
+            BuildWorkSpace = WorkspaceDatabase(GlobalData.gDatabasePath)
+            BuildWorkSpace.InitDatabase()
+
+            #
+            # Get files real name in workspace dir
+            #
+            GlobalData.gAllFiles = DirCache(Workspace)
+            GlobalData.gWorkspace = Workspace
 
         if (Options.archList) :
             ArchList = Options.archList.split(',')
@@ -271,8 +310,9 @@ def main():
             GenFdsGlobalVariable.OutputDirDict[Key] = OutputDir
 
         """ Parse Fdf file, has to place after build Workspace as FDF may contain macros from DSC file """
-        FdfParserObj = FdfParser.FdfParser(FdfFilename)
-        FdfParserObj.ParseFile()
+        if FdfParserObj == None:
+            FdfParserObj = FdfParser.FdfParser(FdfFilename)
+            FdfParserObj.ParseFile()
 
         if FdfParserObj.CycleReferenceCheck():
             EdkLogger.error("GenFds", FORMAT_NOT_SUPPORTED, "Cycle Reference Detected in FDF file")
@@ -335,6 +375,12 @@ def main():
         """Display FV space info."""
         GenFds.DisplayFvSpaceInfo(FdfParserObj)
 
+        """Keep the artifact cache within its size limit and display hit rate."""
+        if GenFdsGlobalVariable.ArtifactCache != None:
+            GenFdsGlobalVariable.ArtifactCache.Evict()
+            GenFdsGlobalVariable.DigestCache.Save()
+            GenFdsGlobalVariable.InfLogger("\n" + GenFdsGlobalVariable.ArtifactCache.GetSummary())
+
     except FdfParser.Warning, X:
         EdkLogger.error(X.ToolName, FORMAT_INVALID, File=X.FileName, Line=X.LineNumber, ExtraData=X.Message, RaiseError=False)
         ReturnCode = FORMAT_INVALID
@@ -356,8 +402,112 @@ def main():
         ReturnCode = CODE_ERROR
     finally:
         ClearDuplicatedInf()
+        os.chdir(CurrentDir)
+        # WORKSPACE is changed to the normalized one
+        if CurrentWorkspace == None:
+            os.environ.pop("WORKSPACE", None)
+        else:
+            os.environ["WORKSPACE"] = CurrentWorkspace
     return ReturnCode
 
+## Reset the global data of GenFds
+#
+# The global data is left by last generation of flash images, or by the
+# generation of FFS makefiles in build. It must be reset before GenFds is
+# called again in the same process.
+#
+def ResetFdsGlobalVariable():
+    GenFdsGlobalVariable.FvDir = ''
+    GenFdsGlobalVariable.OutputDirDict = {}
+    GenFdsGlobalVariable.BinDir = ''
+    GenFdsGlobalVariable.FfsDir = ''
+    GenFdsGlobalVariable.FdfParser = None
+    GenFdsGlobalVariable.LibDir = ''
+    GenFdsGlobalVariable.WorkSpace = None
+    GenFdsGlobalVariable.WorkSpaceDir = ''
+    GenFdsGlobalVariable.ConfDir = ''
+    GenFdsGlobalVariable.EdkSourceDir = ''
+    GenFdsGlobalVariable.OutputDirFromDscDict = {}
+    GenFdsGlobalVariable.TargetName = ''
+    GenFdsGlobalVariable.ToolChainTag = ''
+    GenFdsGlobalVariable.RuleDict = {}
+    GenFdsGlobalVariable.ArchList = None
+    GenFdsGlobalVariable.VtfDict = {}
+    GenFdsGlobalVariable.ActivePlatform = None
+    GenFdsGlobalVariable.FvAddressFileName = ''
+    GenFdsGlobalVariable.VerboseMode = False
+    GenFdsGlobalVariable.DebugLevel = -1
+    GenFdsGlobalVariable.SharpCounter = 0
+    GenFdsGlobalVariable.FdfFile = ''
+    GenFdsGlobalVariable.FdfFileTimeStamp = 0
+    GenFdsGlobalVariable.FixedLoadAddress = False
+    GenFdsGlobalVariable.PlatformName = ''
+    GenFdsGlobalVariable.GuidToolDefinition = {}
+    GenFdsGlobalVariable.FfsCmdDict = {}
+    GenFdsGlobalVariable.SecCmdList = []
+    GenFdsGlobalVariable.CopyList = []
+    GenFdsGlobalVariable.ModuleFile = ''
+    GenFdsGlobalVariable.EnableGenfdsMultiThread = False
+    GenFdsGlobalVariable.ArtifactCache = None
+    GenFdsGlobalVariable.DigestCache = None
+    GenFdsGlobalVariable.ToolStampDict = {}
+    GenFdsGlobalVariable.LargeFileInFvFlags = []
+
+    GenFds.ImageBinDict = {}
+    GenFds.OnlyGenerateThisFd = None
+    GenFds.OnlyGenerateThisFv = None
+    GenFds.OnlyGenerateThisCap = None
+
+## Generate flash images in build process
+#
+# The options are got from the platform the same way as the GenFds command in
+# top level makefile, except that the macros and PCDs given in command line of
+# build have been kept in GlobalData.
+#
+# The FDF file is parsed again if the FFS makefiles have been generated by
+# build, because the objects in FDF parser are changed by the generation.
+#
+#   @param  Wa                  The WorkspaceAutoGen object of the platform
+#   @param  FdfParserObj        The FdfParser object of build
+#   @param  WorkSpaceDataObject The WorkspaceDatabase object of build
+#
+#   @retval 0     Tool was successful
+#   @retval 1     Tool failed
+#
+def GenFdsInBuild(Wa, FdfParserObj, WorkSpaceDataObject):
+    BuildOptions = myOptionParser([])
+    BuildOptions.filename = str(Wa.FdfFile)
+    BuildOptions.ConfDirectory = GlobalData.gConfDirectory
+    BuildOptions.outputDir = Wa.BuildDir
+    BuildOptions.ToolChain = Wa.ToolChain
+    BuildOptions.BuildTarget = Wa.BuildTarget
+    BuildOptions.activePlatform = str(Wa)
+    BuildOptions.archList = ','.join(Wa.ArchList)
+    # only the last one of each option takes effect in command line
+    if Wa.FdTargetList:
+        BuildOptions.uiFdName = Wa.FdTargetList[-1]
+    if Wa.FvTargetList:
+        BuildOptions.uiFvName = Wa.FvTargetList[-1]
+    if Wa.CapTargetList:
+        BuildOptions.uiCapName = Wa.CapTargetList[-1]
+
+    LogLevel = EdkLogger.GetLevel()
+    if LogLevel == EdkLogger.VERBOSE:
+        BuildOptions.verbose = True
+    elif LogLevel <= EdkLogger.DEBUG_9:
+        BuildOptions.debug = LogLevel - 1
+    elif LogLevel == EdkLogger.QUIET:
+        BuildOptions.quiet = True
+
+    BuildOptions.GenfdsMultiThread = GlobalData.gEnableGenfdsMultiThread
+    BuildOptions.GenFdsCache = GlobalData.gGenFdsCache
+    if GlobalData.gGenFdsCacheSize:
+        BuildOptions.GenFdsCacheSize = GlobalData.gGenFdsCacheSize
+    BuildOptions.IgnoreSources = GlobalData.gIgnoreSource
+    if GlobalData.gEnableGenfdsMultiThread:
+        FdfParserObj = None
+    return GenFdsApi(BuildOptions, WorkSpaceDataObject, FdfParserObj)
+
 gParamCheck = []
 def SingleCheckCallback(option, opt_str, value, parser):
     if option not in gParamCheck:
@@ -422,7 +572,13 @@ def CheckBuildOptionPcd():
 #  @param  NameGuid         The Guid name
 #
 def FindExtendTool(KeyStringList, CurrentArchList, NameGuid):
-    ToolDb = ToolDefClassObject.ToolDefDict(GenFdsGlobalVariable.ConfDir).ToolsDefTxtDatabase
+    # loading tools_def.txt takes much longer than generating a section, do it once for each GUID
+    if GenFdsGlobalVariable.GuidToolDefinition:
+        if NameGuid in GenFdsGlobalVariable.GuidToolDefinition.keys():
+            return GenFdsGlobalVariable.GuidToolDefinition[NameGuid]
+
+    ToolDef = ToolDefClassObject.ToolDefDict(GenFdsGlobalVariable.ConfDir)
+    ToolDb = ToolDef.ToolsDefTxtDatabase
     # if user not specify filter, try to deduce it from global data.
     if KeyStringList == None or KeyStringList == []:
         Target = GenFdsGlobalVariable.TargetName
@@ -434,11 +590,7 @@ def FindExtendTool(KeyStringList, CurrentArchList, NameGuid):
             if Target + '_' + ToolChain + '_' + Arch not in KeyStringList:
                 KeyStringList.append(Target + '_' + ToolChain + '_' + Arch)
 
-    if GenFdsGlobalVariable.GuidToolDefinition:
-        if NameGuid in GenFdsGlobalVariable.GuidToolDefinition.keys():
-            return GenFdsGlobalVariable.GuidToolDefinition[NameGuid]
-
-    ToolDefinition = ToolDefClassObject.ToolDefDict(GenFdsGlobalVariable.ConfDir).ToolsDefTxtDictionary
+    ToolDefinition = ToolDef.ToolsDefTxtDictionary
     ToolPathTmp = None
     ToolOption = None
     ToolPathKey = None
@@ -509,10 +661,12 @@ def FindExtendTool(KeyStringList, CurrentArchList, NameGuid):
 #
 # Using standard Python module optparse to parse command line option of this tool.
 #
+#   @param  Args  The arguments to parse, sys.argv[1:] if it's None
+#
 #   @retval Opt   A optparse.Values object containing the parsed options
-#   @retval Args  Target of build command
 #
-def myOptionParser():
+def myOptionParser(Args=None):
+    del gParamCheck[:]
     usage = "%prog [options] -f input_file -a arch_list -b build_target -p active_platform -t tool_chain_tag -D \"MacroName [= MacroValue]\""
     Parser = OptionParser(usage=usage, description=__copyright__, version="%prog " + str(versionNumber))
     Parser.add_option("-f", "--file", dest="filename", type="string", help="Name of FDF file to convert", action="callback", callback=SingleCheckCallback)
@@ -539,8 +693,12 @@ def myOptionParser():
     Parser.add_option("--ignore-sources", action="store_true", dest="IgnoreSources", default=False, help="Focus to a binary build and ignore all source files")
     Parser.add_option("--pcd", action="append", dest="OptionPcd", help="Set PCD value by command line. Format: \"PcdName=Value\" ")
     Parser.add_option("--genfds-multi-thread", action="store_true", dest="GenfdsMultiThread", default=False, help="Enable GenFds multi thread to generate ffs file.")
+    Parser.add_option("--genfds-cache", action="store", type="string", dest="GenFdsCache",
+        help="Keep the outputs of tools called by GenFds in the specified directory, and reuse them for the same command and input files.")
+    Parser.add_option("--genfds-cache-size", action="store", type="int", dest="GenFdsCacheSize", default=0,
+        help="Maximum size in MB of the GenFds cache. Least recently used outputs are removed from the cache at the end. Default is 0, no limit.")
 
-    (Options, args) = Parser.parse_args()
+    (Options, args) = Parser.parse_args(Args)
     return Options
 
 ## The class implementing the EDK2 flash image generation process
@@ -20,6 +20,7 @@ import sys
 import subprocess
 import struct
 import array
+import shlex
 
 from Common.BuildToolError import *
 from Common import EdkLogger
@@ -32,6 +33,8 @@ import Common.DataType as DataType
 from Common.Misc import PathClass
 from Common.LongFilePathSupport import OpenLongFilePath as open
 from Common.MultipleWorkspace import MultipleWorkspace as mws
+from Common.BinaryCache import BinaryCache
+import FfsBuilder
 
 ## Global variables
 #
@@ -74,6 +77,18 @@ class GenFdsGlobalVariable:
     CopyList   = []
     ModuleFile = ''
     EnableGenfdsMultiThread = False
+
+    #
+    # Common.BinaryCache.BinaryCache object keeping the outputs of external
+    # tools, and Common.FileDigestCache.FileDigestCache object for the digests
+    # of their inputs. None if the cache is not enabled.
+    #
+    ArtifactCache = None
+    DigestCache = None
+    # bump it if the way outputs are generated is changed
+    ARTIFACT_CACHE_VERSION = 2
+    # tool in command and its stamp in the key of outputs
+    ToolStampDict = {}
     
     #
     # The list whose element are flags to indicate if large FFS or SECTION files exist in FV.
@@ -491,7 +506,8 @@ class GenFdsGlobalVariable:
             else:
                 if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
                     return
-                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                if not FfsBuilder.GenSection(Output, Input, Type, Ver=Ver, BuildNumber=BuildNumber):
+                    GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to generate section", list(Input), [Output])
         else:
             Cmd += ["-o", Output]
             Cmd += Input
@@ -502,7 +518,13 @@ class GenFdsGlobalVariable:
                     GenFdsGlobalVariable.SecCmdList.append(' '.join(Cmd).strip())
             elif GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
                 GenFdsGlobalVariable.DebugLogger(EdkLogger.DEBUG_5, "%s needs update because of newer %s" % (Output, Input))
-                GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate section")
+                # sections GenSec reads a dummy file for, or compresses, are left to GenSec
+                if DummyFile != None or CompressionType not in [None, ''] or \
+                   not FfsBuilder.GenSection(Output, Input, Type, Guid, GuidHdrLen, GuidAttr, InputAlign=InputAlign):
+                    InputList = list(Input)
+                    if DummyFile != None:
+                        InputList.append(DummyFile)
+                    GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to generate section", InputList, [Output])
                 if (os.path.getsize(Output) >= GenFdsGlobalVariable.LARGE_FILE_SIZE and
                     GenFdsGlobalVariable.LargeFileInFvFlags):
                     GenFdsGlobalVariable.LargeFileInFvFlags[-1] = True
@@ -554,7 +576,8 @@ class GenFdsGlobalVariable:
         else:
             if not GenFdsGlobalVariable.NeedsUpdate(Output, list(Input) + [CommandFile]):
                 return
-            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FFS")
+            if not FfsBuilder.GenFfs(Output, Input, Type, Guid, Fixed, CheckSum, Align, SectionAlign):
+                GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to generate FFS", list(Input), [Output])
 
     @staticmethod
     def GenerateFirmwareVolume(Output, Input, BaseAddress=None, ForceRebase=None, Capsule=False, Dump=False,
@@ -586,7 +609,76 @@ class GenFdsGlobalVariable:
         for I in Input:
             Cmd += ["-i", I]
 
-        GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate FV")
+        # GenFv reads the files listed in the INF files, and the map and EFI files of images it rebases
+        InputList = Input + FfsList + GenFdsGlobalVariable.__GetFileListInInf(Input)
+        OptionalInputList = []
+        if not Capsule:
+            OptionalInputList = FfsBuilder.GetImageFileList(FfsList)
+            if OptionalInputList == None:
+                InputList = None
+        OutputList = [Output, Output + '.map', Output + '.txt']
+        ExtraKeyList = []
+        if AddressFile not in [None, '']:
+            # GenFv rewrites the address file if the FV has FV images, so its
+            # content before the call is a part of the key, not its digest
+            if not os.path.isfile(AddressFile):
+                InputList = None
+            else:
+                AddressFileObj = open(AddressFile, 'rb')
+                ExtraKeyList.append(AddressFileObj.read())
+                AddressFileObj.close()
+            OutputList.append(AddressFile)
+        if MapFile not in [None, '']:
+            OutputList.append(MapFile)
+        GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to generate FV", InputList, OutputList,
+                                            OptionalInputList=OptionalInputList, ExtraKeyList=ExtraKeyList)
+
+    ## Get the files given in the INF files of GenFv
+    #
+    #   @param  InfList         Path list of INF files
+    #
+    #   @retval list            Path list of files
+    #
+    @staticmethod
+    def __GetFileListInInf(InfList):
+        FileList = []
+        for Inf in InfList:
+            if not os.path.isfile(Inf):
+                continue
+            InfFile = open(Inf, 'r')
+            for Line in InfFile:
+                Name, Sep, Value = Line.partition('=')
+                if Sep and Name.strip().endswith('FILE_NAME'):
+                    FileList.append(Value.strip())
+            InfFile.close()
+        return FileList
+
+    ## Get the files given in the options of GUID tool
+    #
+    #   The options are split in the same way as shell does. An argument is
+    #   taken as a file if it, or the value of an "Name=Value" argument, is an
+    #   existing file.
+    #
+    #   @param  Options         The options of GUID tool
+    #
+    #   @retval list            Path list of files
+    #   @retval None            The options can't be split
+    #
+    @staticmethod
+    def __GetFileListInOptions(Options):
+        try:
+            # backslashes in Windows path are not escape characters
+            ArgList = shlex.split(Options, posix=(os.name != 'nt'))
+        except ValueError:
+            return None
+        FileList = []
+        for Arg in ArgList:
+            Arg = Arg.strip('"')
+            if os.path.isfile(Arg):
+                FileList.append(Arg)
+            elif '=' in Arg and os.path.isfile(Arg.split('=', 1)[1]):
+                FileList.append(Arg.split('=', 1)[1])
+        return FileList
 
     @staticmethod
     def GenerateVtf(Output, Input, BaseAddress=None, FvSize=None):
@@ -640,7 +732,7 @@ class GenFdsGlobalVariable:
             if " ".join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                 GenFdsGlobalVariable.SecCmdList.append(" ".join(Cmd).strip())
         else:
-            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to generate firmware image")
+            GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to generate firmware image", list(Input), [Output])
 
     @staticmethod
     def GenerateOptionRom(Output, EfiInput, BinaryInput, Compress=False, ClassCode=None,
@@ -699,7 +791,111 @@ class GenFdsGlobalVariable:
             if " ".join(Cmd).strip() not in GenFdsGlobalVariable.SecCmdList:
                 GenFdsGlobalVariable.SecCmdList.append(" ".join(Cmd).strip())
         else:
-            GenFdsGlobalVariable.CallExternalTool(Cmd, "Failed to call " + ToolPath, returnValue)
+            if FfsBuilder.GuidTool(Output, Input, ToolPath, Options):
+                if returnValue != []:
+                    returnValue[0] = 0
+                return
+            # files given in options, like certificates, are inputs as well
+            InputList = None
+            FileList = GenFdsGlobalVariable.__GetFileListInOptions(Options)
+            if FileList != None:
+                InputList = list(Input) + FileList
+            GenFdsGlobalVariable.CallCachedTool(Cmd, "Failed to call " + ToolPath, InputList, [Output], returnValue)
+
+    ## Call external tool, or restore its outputs from artifact cache
+    #
+    #   The key of outputs in the cache is made of the command and the stamp
+    #   of tool, in which the workspace path is replaced so that the cache can
+    #   be shared by workspaces, and the digests of input files.
+    #
+    #   @param  Cmd             The command of tool
+    #   @param  ErrorMess       The message shown if the tool fails
+    #   @param  InputList       Path list of files read by the tool, None if
+    #                           they are unknown and the outputs can't be cached
+    #   @param  OutputList      Path list of files the tool may generate
+    #   @param  returnValue     The same as CallExternalTool
+    #   @param  OptionalInputList   Path list of files read by the tool if they exist
+    #   @param  ExtraKeyList    Other data the outputs depend on
+    #
+    @staticmethod
+    def CallCachedTool(Cmd, ErrorMess, InputList, OutputList, returnValue=[], OptionalInputList=[], ExtraKeyList=[]):
+        Cache = GenFdsGlobalVariable.ArtifactCache
+        Key = None
+        NameList = [os.path.basename(File) for File in OutputList]
+        ToolStamp = None
+        # outputs are restored by name; missing inputs make the tool fail
+        if Cache != None and InputList != None and len(set(NameList)) == len(NameList) and \
+           not [File for File in InputList if not os.path.isfile(File)]:
+            ToolStamp = GenFdsGlobalVariable.__GetToolStamp(Cmd[0])
+        if ToolStamp != None:
+            KeyList = [str(GenFdsGlobalVariable.ARTIFACT_CACHE_VERSION)]
+            for Arg in Cmd + [ToolStamp]:
+                if GenFdsGlobalVariable.WorkSpaceDir:
+                    Arg = Arg.replace(GenFdsGlobalVariable.WorkSpaceDir, '$(WORKSPACE)')
+                KeyList.append(Arg)
+            KeyList += [GenFdsGlobalVariable.DigestCache.GetDigest(File) for File in InputList]
+            for File in OptionalInputList:
+                if os.path.isfile(File):
+                    KeyList.append(GenFdsGlobalVariable.DigestCache.GetDigest(File))
+                else:
+                    KeyList.append('')
+            KeyList += ExtraKeyList
+            Key = BinaryCache.GetKey(*KeyList)
+
+            DirDict = dict([(os.path.basename(File), os.path.dirname(File)) for File in OutputList])
+            if Cache.Retrieve(Key, lambda Name: DirDict[Name]):
+                # make restored files newer than their inputs, as if they were just generated
+                for File in OutputList:
+                    if os.path.exists(File):
+                        os.utime(File, None)
+                if returnValue != []:
+                    returnValue[0] = 0
+                return
+
+        GenFdsGlobalVariable.CallExternalTool(Cmd, ErrorMess, returnValue)
+        if Key != None and (returnValue == [] or returnValue[0] == 0):
+            Cache.Store(Key, [(os.path.basename(File), File) for File in OutputList if os.path.exists(File)])
+
+    ## Get the stamp of tool, which is a part of the key of its outputs
+    #
+    #   The stamp is made of the path, size and modified time of the tool found
+    #   in the same way as shell does. The wrappers of BaseTools C tools run
+    #   the binary of the same name in Conf/BaseToolsCBinaries or Source/C/bin,
+    #   so the stamps of those binaries are added as well.
+    #
+    #   @param  Tool            The tool in command, a name or a path
+    #
+    #   @retval string          The stamp of tool, None if the tool isn't found
+    #
+    @staticmethod
+    def __GetToolStamp(Tool):
+        if Tool in GenFdsGlobalVariable.ToolStampDict:
+            return GenFdsGlobalVariable.ToolStampDict[Tool]
+
+        if os.path.dirname(Tool):
+            PathList = [Tool]
+        else:
+            ExtList = ['']
+            if 'PATHEXT' in os.environ and not os.path.splitext(Tool)[1]:
+                ExtList = os.environ['PATHEXT'].split(os.pathsep)
+            PathList = [os.path.join(Dir, Tool + Ext) for Dir in os.environ.get('PATH', '').split(os.pathsep) for Ext in ExtList]
+        ToolFileList = [Path for Path in PathList if os.path.isfile(Path)][:1]
+        if ToolFileList:
+            Name = os.path.basename(ToolFileList[0])
+            ToolFileList.append(os.path.join(GenFdsGlobalVariable.WorkSpaceDir, 'Conf', 'BaseToolsCBinaries', Name))
+            if 'EDK_TOOLS_PATH' in os.environ:
+                ToolFileList.append(os.path.join(os.environ['EDK_TOOLS_PATH'], 'Source', 'C', 'bin', Name))
+
+        StampList = []
+        for ToolFile in ToolFileList:
+            if os.path.isfile(ToolFile):
+                Stat = os.stat(ToolFile)
+                StampList.append('%s %s' % (ToolFile, (Stat.st_size, Stat.st_mtime)))
+        Stamp = None
+        if StampList:
+            Stamp = '\n'.join(StampList)
+        GenFdsGlobalVariable.ToolStampDict[Tool] = Stamp
+        return Stamp
 
     def CallExternalTool (cmd, errorMess, returnValue=[]):
 
@@ -56,8 +56,30 @@ class Region(RegionClassObject):
                 PadByte = pack('B', 0xFF)
             else:
                 PadByte = pack('B', 0)
-            PadData = ''.join(PadByte for i in xrange(0, Size))
-            Buffer.write(PadData)
+            PadData = PadByte * min(Size, 0x100000)
+            while Size > len(PadData):
+                Buffer.write(PadData)
+                Size = Size - len(PadData)
+            Buffer.write(PadData[:Size])
+
+    ## CopyFileToBuffer()
+    #
+    #   Add the content of a file to the Buffer, block by block
+    #
+    #   @param Buffer         The buffer the generated region data will be put
+    #                         in
+    #   @param FileName       The file to be added
+    #
+    def CopyFileToBuffer(self, Buffer, FileName):
+        BinFile = open(FileName, 'rb')
+        try:
+            while True:
+                Data = BinFile.read(0x100000)
+                if not Data:
+                    break
+                Buffer.write(Data)
+        finally:
+            BinFile.close()
 
     ## AddToBuffer()
     #
@@ -126,25 +148,23 @@ class Region(RegionClassObject):
                         if self.FvAddress % FvAlignValue != 0:
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "FV (%s) is NOT %s Aligned!" % (FvObj.UiFvName, FvObj.FvAlignment))
-                        FvBuffer = StringIO.StringIO('')
                         FvBaseAddress = '0x%X' % self.FvAddress
                         BlockSize = None
                         BlockNum = None
-                        FvObj.AddToBuffer(FvBuffer, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, vtfDict, Flag=Flag)
+                        FvFileName = FvObj.AddToBuffer(None, FvBaseAddress, BlockSize, BlockNum, ErasePolarity, vtfDict, Flag=Flag)
                         if Flag:
                             continue
 
-                        if FvBuffer.len > Size:
-                            FvBuffer.close()
+                        FvLength = os.stat(FvFileName)[ST_SIZE]
+                        if FvLength > Size:
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "Size of FV (%s) is larger than Region Size 0x%X specified." % (RegionData, Size))
                         #
                         # Put the generated image into FD buffer.
                         #
-                        Buffer.write(FvBuffer.getvalue())
-                        FvBuffer.close()
-                        FvOffset = FvOffset + FvBuffer.len
-                        Size = Size - FvBuffer.len
+                        self.CopyFileToBuffer(Buffer, FvFileName)
+                        FvOffset = FvOffset + FvLength
+                        Size = Size - FvLength
                         continue
                     else:
                         EdkLogger.error("GenFds", GENFDS_ERROR, "FV (%s) is NOT described in FDF file!" % (RegionData))
@@ -158,9 +178,7 @@ class Region(RegionClassObject):
                             EdkLogger.error("GenFds", GENFDS_ERROR,
                                             "Size of FV File (%s) is larger than Region Size 0x%X specified." \
                                             % (RegionData, Size))
-                        BinFile = open(FileName, 'rb')
-                        Buffer.write(BinFile.read())
-                        BinFile.close()
+                        self.CopyFileToBuffer(Buffer, FileName)
                         Size = Size - FileLength
             #
             # Pad the left buffer
@@ -212,9 +230,7 @@ class Region(RegionClassObject):
                     EdkLogger.error("GenFds", GENFDS_ERROR,
                                     "Size 0x%X of Capsule File (%s) is larger than Region Size 0x%X specified." \
                                     % (FileLength, RegionData, Size))
-                BinFile = open(FileName, 'rb')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                self.CopyFileToBuffer(Buffer, FileName)
                 Size = Size - FileLength
             #
             # Pad the left buffer
@@ -244,9 +260,7 @@ class Region(RegionClassObject):
                                     "Size of File (%s) is larger than Region Size 0x%X specified." \
                                     % (RegionData, Size))
                 GenFdsGlobalVariable.InfLogger('   Region File Name = %s' % RegionData)
-                BinFile = open(RegionData, 'rb')
-                Buffer.write(BinFile.read())
-                BinFile.close()
+                self.CopyFileToBuffer(Buffer, RegionData)
                 Size = Size - FileLength
             #
             # Pad the left buffer
@@ -33,6 +33,8 @@ class TableReport(Table):
     def __init__(self, Cursor):
         Table.__init__(self, Cursor)
         self.Table = 'Report'
+        # the source file being checked, empty if the checkpoint is not for one file
+        self.CheckedFile = ''
     
     ## Create table
     #
@@ -44,6 +46,7 @@ class TableReport(Table):
     # @param BelongsToItem:  The error belongs to which item
     # @param Enabled:        If this error enabled
     # @param Corrected:      if this error corrected
+    # @param CheckedFile:    The source file being checked when the error is found
     #
     def Create(self):
         SqlCommand = """create table IF NOT EXISTS %s (ID INTEGER PRIMARY KEY,
@@ -52,7 +55,8 @@ class TableReport(Table):
                                                        BelongsToTable TEXT NOT NULL,
                                                        BelongsToItem SINGLE NOT NULL,
                                                        Enabled INTEGER DEFAULT 0,
-                                                       Corrected INTEGER DEFAULT -1
+                                                       Corrected INTEGER DEFAULT -1,
+                                                       CheckedFile VARCHAR DEFAULT ''
                                                       )""" % self.Table
         Table.Create(self, SqlCommand)
 
@@ -70,8 +74,9 @@ class TableReport(Table):
     #
     def Insert(self, ErrorID, OtherMsg='', BelongsToTable='', BelongsToItem= -1, Enabled=0, Corrected= -1):
         self.ID = self.ID + 1
-        SqlCommand = """insert into %s values(%s, %s, '%s', '%s', %s, %s, %s)""" \
-                     % (self.Table, self.ID, ErrorID, ConvertToSqlString2(OtherMsg), BelongsToTable, BelongsToItem, Enabled, Corrected)
+        SqlCommand = """insert into %s values(%s, %s, '%s', '%s', %s, %s, %s, '%s')""" \
+                     % (self.Table, self.ID, ErrorID, ConvertToSqlString2(OtherMsg), BelongsToTable, BelongsToItem, Enabled, Corrected,
+                        ConvertToSqlString2(self.CheckedFile))
         Table.Insert(self, SqlCommand)
 
         return self.ID
@@ -85,6 +90,22 @@ class TableReport(Table):
                         where Enabled > -1 order by ErrorID, BelongsToItem""" % (self.Table)
         return self.Exec(SqlCommand)
 
+    ## Delete the errors not found when checking a single file
+    #
+    def DeleteUncheckedFile(self):
+        SqlCommand = """delete from %s where CheckedFile = ''""" % self.Table
+        return self.Exec(SqlCommand)
+
+    ## Delete the errors found when checking files
+    #
+    # @param KeepFileSet:    The files whose errors are kept
+    #
+    def DeleteCheckedFile(self, KeepFileSet=set()):
+        SqlCommand = """select distinct CheckedFile from %s where CheckedFile != ''""" % self.Table
+        for Record in self.Exec(SqlCommand):
+            if Record[0] not in KeepFileSet:
+                self.Exec("""delete from %s where CheckedFile = '%s'""" % (self.Table, ConvertToSqlString2(Record[0])))
+
     ## Update table
     #
     def UpdateBelongsToItemByFile(self, ItemID=-1, File=""):
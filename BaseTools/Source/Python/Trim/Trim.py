@@ -18,6 +18,8 @@ import Common.LongFilePathOs as os
 import sys
 import re
 import StringIO
+import time
+from os import getpid
 
 from optparse import OptionParser
 from optparse import make_option
@@ -26,6 +28,7 @@ from Common.Misc import *
 from Common.BuildVersion import gBUILD_VERSION
 import Common.EdkLogger as EdkLogger
 from Common.LongFilePathSupport import OpenLongFilePath as open
+from Common.FileDigestCache import FileDigestCache
 
 # Version and Copyright
 __version_number__ = ("0.10" + " " + gBUILD_VERSION)
@@ -128,16 +131,205 @@ gImportCodePatterns = [
 ## file cache to avoid circular include in ASL file
 gIncludedAslFile = []
 
+## Raised when the streaming trim has to go back to a line written to file already
+class _LineFlushed(Exception):
+    pass
+
+## Lines of trimmed file, written to file as they are added
+#
+# The preprocessor may emit a line control directive with a line number
+# smaller than the lines trimmed, in which case the line is replaced. Only
+# the last lines are kept for that, so that memory doesn't grow with the
+# size of file.
+#
+# @param  File      The file object to write the lines to
+#
+class _TrimmedLines(object):
+    _WINDOW_ = 4096
+
+    def __init__(self, File):
+        self.File = File
+        self.Lines = []
+        self.FlushedCount = 0
+
+    def __len__(self):
+        return self.FlushedCount + len(self.Lines)
+
+    def append(self, Line):
+        self.Lines.append(Line)
+        if len(self.Lines) >= 2 * self._WINDOW_:
+            self.File.writelines(self.Lines[:self._WINDOW_])
+            del self.Lines[:self._WINDOW_]
+            self.FlushedCount += self._WINDOW_
+
+    def __setitem__(self, Index, Line):
+        if Index < self.FlushedCount:
+            raise _LineFlushed
+        self.Lines[Index - self.FlushedCount] = Line
+
+    def Flush(self):
+        self.File.writelines(self.Lines)
+        self.FlushedCount += len(self.Lines)
+        self.Lines = []
+
+## Convert number formats in a line of preprocessed source code
+#
+# The patterns are applied only to the lines containing their literal parts,
+# which is much faster than applying them to every line.
+#
+def _ConvertNumbers(Line, ConvertHex, TrimLong):
+    if TrimLong and 'LL' in Line:
+        Line = gLongNumberPattern.sub(r"\1", Line)
+    if '0x' in Line or '0X' in Line:
+        # convert HEX number format if indicated
+        if ConvertHex:
+            Line = gHexNumberPattern.sub(r"0\2h", Line)
+        else:
+            Line = gHexNumberPattern.sub(r"\1\2", Line)
+    if 'U' in Line:
+        # convert Decimal number format
+        Line = gDecNumberPattern.sub(r"\1", Line)
+    return Line
+
+## Keep the lines out of "typedef struct" and "#pragma pack"
+#
+# It's used for the preprocessed file without line directive or linemarker.
+#
+# @param  Lines     Iterable lines of preprocessed file
+# @param  NewLines  The list to append the lines kept
+#
+def _TrimTypedef(Lines, NewLines):
+    MulPatternFlag = False
+    SinglePatternFlag = False
+    Brace = 0
+    for Line in Lines:
+        if MulPatternFlag == False and gTypedef_MulPattern.search(Line) == None:
+            if SinglePatternFlag == False and gTypedef_SinglePattern.search(Line) == None:
+                # remove "#pragram pack" directive
+                if gPragmaPattern.search(Line) == None:
+                    NewLines.append(Line)
+                continue
+            elif SinglePatternFlag == False:
+                SinglePatternFlag = True
+            if Line.find(";") >= 0:
+                SinglePatternFlag = False
+        elif MulPatternFlag == False:
+            # found "typedef struct, typedef union, union, struct", keep its position and set a flag
+            MulPatternFlag = True
+
+        # match { and } to find the end of typedef definition
+        if Line.find("{") >= 0:
+            Brace += 1
+        elif Line.find("}") >= 0:
+            Brace -= 1
+
+        # "typedef struct, typedef union, union, struct" must end with a ";"
+        if Brace == 0 and Line.find(";") >= 0:
+            MulPatternFlag = False
+
 ## Trim preprocessed source code
 #
 # Remove extra content made by preprocessor. The preprocessor must enable the
 # line number generation option when preprocessing.
 #
+# The file is trimmed in a single pass while it's read, and the trimmed lines
+# are written as they are made, so the memory used doesn't depend on the size
+# of file. The file is trimmed in memory by TrimPreprocessedFileInMemory if
+# the source is the target, or a line written already needs to be replaced.
+#
 # @param  Source    File to be trimmed
 # @param  Target    File to store the trimmed content
 # @param  Convert   If True, convert standard HEX format to MASM format
 #
 def TrimPreprocessedFile(Source, Target, ConvertHex, TrimLong):
+    if os.path.normcase(os.path.abspath(Source)) == os.path.normcase(os.path.abspath(Target)):
+        return TrimPreprocessedFileInMemory(Source, Target, ConvertHex, TrimLong)
+    CreateDirectory(os.path.dirname(Target))
+    try:
+        f = open (Source, 'r')
+    except:
+        EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Source)
+    try:
+        TargetFile = open (Target, 'wb')
+    except:
+        f.close()
+        EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Target)
+
+    try:
+        PreprocessedFile = ""
+        InjectedFile = ""
+        LineIndexOfOriginalFile = None
+        NewLines = _TrimmedLines(TargetFile)
+        LineControlDirectiveFound = False
+        for Index, Line in enumerate(f):
+            #
+            # Find out the name of files injected by preprocessor from the lines
+            # with Line Control directive
+            #
+            if '#' in Line:
+                MatchList = gLineControlDirective.findall(Line)
+            else:
+                MatchList = []
+            if MatchList != []:
+                MatchList = MatchList[0]
+                if len(MatchList) == 2:
+                    LineNumber = int(MatchList[0], 0)
+                    InjectedFile = MatchList[1]
+                    # The first injetcted file must be the preprocessed file itself
+                    if PreprocessedFile == "":
+                        PreprocessedFile = InjectedFile
+                LineControlDirectiveFound = True
+                continue
+            elif PreprocessedFile == "" or InjectedFile != PreprocessedFile:
+                continue
+
+            if LineIndexOfOriginalFile == None:
+                #
+                # Any non-empty lines must be from original preprocessed file.
+                # And this must be the first one.
+                #
+                LineIndexOfOriginalFile = Index
+                EdkLogger.verbose("Found original file content starting from line %d"
+                                  % (LineIndexOfOriginalFile + 1))
+
+            Line = _ConvertNumbers(Line, ConvertHex, TrimLong)
+
+            if LineNumber != None:
+                EdkLogger.verbose("Got line directive: line=%d" % LineNumber)
+                # in case preprocessor removed some lines, like blank or comment lines
+                if LineNumber <= len(NewLines):
+                    # possible?
+                    NewLines[LineNumber - 1] = Line
+                else:
+                    if LineNumber > (len(NewLines) + 1):
+                        for LineIndex in range(len(NewLines), LineNumber-1):
+                            NewLines.append(os.linesep)
+                    NewLines.append(Line)
+                LineNumber = None
+                EdkLogger.verbose("Now we have lines: %d" % len(NewLines))
+            else:
+                NewLines.append(Line)
+
+        # in case there's no line directive or linemarker found
+        if (not LineControlDirectiveFound) and len(NewLines) == 0:
+            f.seek(0)
+            _TrimTypedef(f, NewLines)
+        NewLines.Flush()
+    except _LineFlushed:
+        f.close()
+        TargetFile.close()
+        TrimPreprocessedFileInMemory(Source, Target, ConvertHex, TrimLong)
+        return
+    f.close()
+    TargetFile.close()
+
+## Trim preprocessed source code with the whole file in memory
+#
+# @param  Source    File to be trimmed
+# @param  Target    File to store the trimmed content
+# @param  Convert   If True, convert standard HEX format to MASM format
+#
+def TrimPreprocessedFileInMemory(Source, Target, ConvertHex, TrimLong):
     CreateDirectory(os.path.dirname(Target))
     try:
         f = open (Source, 'r')
@@ -211,34 +403,7 @@ def TrimPreprocessedFile(Source, Target, ConvertHex, TrimLong):
 
     # in case there's no line directive or linemarker found
     if (not LineControlDirectiveFound) and NewLines == []:
-        MulPatternFlag = False
-        SinglePatternFlag = False
-        Brace = 0
-        for Index in range(len(Lines)):
-            Line = Lines[Index]
-            if MulPatternFlag == False and gTypedef_MulPattern.search(Line) == None:
-                if SinglePatternFlag == False and gTypedef_SinglePattern.search(Line) == None:
-                    # remove "#pragram pack" directive
-                    if gPragmaPattern.search(Line) == None:
-                        NewLines.append(Line)
-                    continue
-                elif SinglePatternFlag == False:
-                    SinglePatternFlag = True
-                if Line.find(";") >= 0:
-                    SinglePatternFlag = False
-            elif MulPatternFlag == False:
-                # found "typedef struct, typedef union, union, struct", keep its position and set a flag
-                MulPatternFlag = True
-
-            # match { and } to find the end of typedef definition
-            if Line.find("{") >= 0:
-                Brace += 1
-            elif Line.find("}") >= 0:
-                Brace -= 1
-
-            # "typedef struct, typedef union, union, struct" must end with a ";"
-            if Brace == 0 and Line.find(";") >= 0:
-                MulPatternFlag = False
+        _TrimTypedef(Lines, NewLines)
 
     # save to file
     try:
@@ -253,10 +418,82 @@ def TrimPreprocessedFile(Source, Target, ConvertHex, TrimLong):
 # Remove extra content made by preprocessor. The preprocessor doesn't need to
 # enable line number generation option when preprocessing.
 #
+# The file is trimmed while it's read. Only the lines of a "typedef struct"
+# are kept in memory until its end is found.
+#
 # @param  Source    File to be trimmed
 # @param  Target    File to store the trimmed content
 #
 def TrimPreprocessedVfr(Source, Target):
+    if os.path.normcase(os.path.abspath(Source)) == os.path.normcase(os.path.abspath(Target)):
+        return TrimPreprocessedVfrInMemory(Source, Target)
+    CreateDirectory(os.path.dirname(Target))
+
+    try:
+        f = open (Source,'r')
+    except:
+        EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Source)
+    try:
+        TargetFile = open (Target,'w')
+    except:
+        f.close()
+        EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Target)
+
+    try:
+        FoundTypedef = False
+        Brace = 0
+        # lines of current "typedef struct"
+        TypedefLines = []
+        for Line in f:
+            # don't trim the lines from "formset" definition to the end of file
+            if Line.strip() == 'formset':
+                TargetFile.writelines(TypedefLines)
+                TargetFile.write(Line)
+                TargetFile.writelines(f)
+                TypedefLines = []
+                break
+
+            if FoundTypedef == False and (Line.find('#line') == 0 or Line.find('# ') == 0):
+                # empty the line number directive if it's not aomong "typedef struct"
+                TargetFile.write("\n")
+                continue
+
+            if FoundTypedef == False and gTypedefPattern.search(Line) == None:
+                # keep "#pragram pack" directive
+                if gPragmaPattern.search(Line) == None:
+                    Line = "\n"
+                TargetFile.write(Line)
+                continue
+            elif FoundTypedef == False:
+                # found "typedef struct", keept its position and set a flag
+                FoundTypedef = True
+
+            TypedefLines.append(Line)
+            # match { and } to find the end of typedef definition
+            if Line.find("{") >= 0:
+                Brace += 1
+            elif Line.find("}") >= 0:
+                Brace -= 1
+
+            # "typedef struct" must end with a ";"
+            if Brace == 0 and Line.find(";") >= 0:
+                FoundTypedef = False
+                # keep all "typedef struct" except to GUID, EFI_PLABEL and PAL_CALL_RETURN
+                if Line.strip("} ;\r\n") in ["GUID", "EFI_PLABEL", "PAL_CALL_RETURN"]:
+                    TypedefLines = ["\n"] * len(TypedefLines)
+                TargetFile.writelines(TypedefLines)
+                TypedefLines = []
+        TargetFile.writelines(TypedefLines)
+    finally:
+        f.close()
+        TargetFile.close()
+
+## Trim preprocessed VFR file with the whole file in memory
+#
+# @param  Source    File to be trimmed
+# @param  Target    File to store the trimmed content
+#
+def TrimPreprocessedVfrInMemory(Source, Target):
     CreateDirectory(os.path.dirname(Target))
     
     try:
@@ -315,68 +552,211 @@ def TrimPreprocessedVfr(Source, Target):
     f.writelines(Lines)
     f.close()
 
-## Read the content  ASL file, including ASL included, recursively
+## Resolve and expand the files included by ASL file
+#
+# The file found for each include name, the content of each file with its
+# include statements parsed, and the expanded content of each file are cached,
+# so that a file included several times is searched, read and expanded only
+# once. The parsed content is kept together with the modified time and size of
+# file, and can be saved into a cache file shared by all ASL files in a build,
+# so that each file is only read again after it's changed. Like FileDigestCache,
+# the content of a file modified in last seconds is not kept.
 #
-# @param  Source            File to be read
-# @param  Indent            Spaces before the Include() statement
 # @param  IncludePathList   The list of external include file
-# @param  LocalSearchPath   If LocalSearchPath is specified, this path will be searched
-#                           first for the included file; otherwise, only the path specified
-#                           in the IncludePathList will be searched.
+# @param  CacheFile         The file to restore the parsed content from and save it to
 #
-def DoInclude(Source, Indent='', IncludePathList=[], LocalSearchPath=None):
-    NewFileContent = []
-
-    try:
+class AslIncludeResolver(object):
+    ## Bump it if the layout of parsed content is changed
+    _VERSION_ = 2
+
+    def __init__(self, IncludePathList=[], CacheFile=None):
+        self.IncludePathList = IncludePathList
+        self.CacheFile = CacheFile
+        # the files read, including the ASL file itself, in the order they are included
+        self.DependencyList = []
+        # (include name, local search path) : file found
+        self._FileCache = {}
+        # file : ([(indented, line), ...], [files read])
+        self._ExpandedCache = {}
+        # file : (modified time, size, [line or (indent, include name, local search path), ...])
+        self._ContentCache = self._Restore()
+        # the entries of _ContentCache added by this resolver
+        self._NewContent = {}
+
+    ## Restore the parsed content from cache file
+    def _Restore(self):
+        if self.CacheFile and os.path.isfile(self.CacheFile):
+            Data = DataRestore(self.CacheFile)
+            if type(Data) == type(()) and len(Data) == 2 and Data[0] == self._VERSION_:
+                return Data[1]
+        return {}
+
+    ## Find the file included
+    #
+    # @param  Source            The name in include statement
+    # @param  LocalSearchPath   If LocalSearchPath is specified, this path will be searched
+    #                           first for the included file; otherwise, only the path specified
+    #                           in the IncludePathList will be searched.
+    #
+    # @retval string            The absolute path of file found
+    #
+    def FindFile(self, Source, LocalSearchPath=None):
+        Key = (Source, LocalSearchPath)
+        if Key in self._FileCache:
+            return self._FileCache[Key]
         #
         # Search LocalSearchPath first if it is specified.
         #
         if LocalSearchPath:
-            SearchPathList = [LocalSearchPath] + IncludePathList
+            SearchPathList = [LocalSearchPath] + self.IncludePathList
         else:
-            SearchPathList = IncludePathList
-  
+            SearchPathList = self.IncludePathList
+
         for IncludePath in SearchPathList:
             IncludeFile = os.path.join(IncludePath, Source)
             if os.path.isfile(IncludeFile):
-                F = open(IncludeFile, "r")
+                IncludeFile = os.path.abspath(os.path.normpath(IncludeFile))
                 break
         else:
-            EdkLogger.error("Trim", "Failed to find include file %s" % Source)
-    except:
-        EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Source)
+            EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=Source)
+        self._FileCache[Key] = IncludeFile
+        return IncludeFile
 
-    
-    # avoid A "include" B and B "include" A
-    IncludeFile = os.path.abspath(os.path.normpath(IncludeFile))
-    if IncludeFile in gIncludedAslFile:
-        EdkLogger.warn("Trim", "Circular include",
-                       ExtraData= "%s -> %s" % (" -> ".join(gIncludedAslFile), IncludeFile))
-        return []
-    gIncludedAslFile.append(IncludeFile)
-    
-    for Line in F:
-        LocalSearchPath = None
-        Result = gAslIncludePattern.findall(Line)
-        if len(Result) == 0:
-            Result = gAslCIncludePattern.findall(Line)
-            if len(Result) == 0 or os.path.splitext(Result[0][1])[1].lower() not in [".asl", ".asi"]:
-                NewFileContent.append("%s%s" % (Indent, Line))
+    ## Get the content of file with the include statements parsed
+    def _GetContent(self, File):
+        try:
+            Stat = os.stat(File)
+            Entry = self._ContentCache.get(File)
+            if Entry and Entry[0] == Stat.st_mtime and Entry[1] == Stat.st_size:
+                return Entry[2]
+            F = open(File, "r")
+        except:
+            EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=File)
+
+        Content = []
+        for Line in F:
+            LocalSearchPath = None
+            Result = gAslIncludePattern.findall(Line)
+            if len(Result) == 0:
+                Result = gAslCIncludePattern.findall(Line)
+                if len(Result) == 0 or os.path.splitext(Result[0][1])[1].lower() not in [".asl", ".asi"]:
+                    Content.append(Line)
+                    continue
+                #
+                # We should first search the local directory if current file are using pattern #include "XXX"
+                #
+                if Result[0][2] == '"':
+                    LocalSearchPath = os.path.dirname(File)
+            Content.append((Result[0][0], Result[0][1], LocalSearchPath))
+        F.close()
+
+        if Stat.st_mtime < time.time() - FileDigestCache._RACY_TIME_:
+            self._ContentCache[File] = (Stat.st_mtime, Stat.st_size, Content)
+            self._NewContent[File] = self._ContentCache[File]
+        return Content
+
+    ## Expand the content of file, and the files it includes recursively
+    #
+    # @retval tuple     ([(indented, line), ...], [files read], complete)
+    #                   Lines not indented are the ones separating the content
+    #                   of included files. The result is not complete if any
+    #                   circular include is skipped.
+    #
+    def _Expand(self, File):
+        Cached = self._ExpandedCache.get(File)
+        # the cached content can't be used if it would include a file being expanded
+        if Cached and not set(Cached[1]).intersection(gIncludedAslFile):
+            return Cached[0], Cached[1], True
+
+        gIncludedAslFile.append(File)
+        Lines = []
+        FileList = [File]
+        Complete = True
+        for Item in self._GetContent(File):
+            if type(Item) == type(''):
+                Lines.append((True, Item))
                 continue
-            #
-            # We should first search the local directory if current file are using pattern #include "XXX" 
-            #
-            if Result[0][2] == '"':
-                LocalSearchPath = os.path.dirname(IncludeFile)
-        CurrentIndent = Indent + Result[0][0]
-        IncludedFile = Result[0][1]
-        NewFileContent.extend(DoInclude(IncludedFile, CurrentIndent, IncludePathList, LocalSearchPath))
-        NewFileContent.append("\n")
-
-    gIncludedAslFile.pop()
-    F.close()
+            Indent, Source, LocalSearchPath = Item
+            IncludeFile = self.FindFile(Source, LocalSearchPath)
+            # avoid A "include" B and B "include" A
+            if IncludeFile in gIncludedAslFile:
+                EdkLogger.warn("Trim", "Circular include",
+                               ExtraData= "%s -> %s" % (" -> ".join(gIncludedAslFile), IncludeFile))
+                Complete = False
+            else:
+                IncludedLines, IncludedFileList, IncludedComplete = self._Expand(IncludeFile)
+                for Indented, Line in IncludedLines:
+                    if Indented:
+                        Line = Indent + Line
+                    Lines.append((Indented, Line))
+                for IncludedFile in IncludedFileList:
+                    if IncludedFile not in FileList:
+                        FileList.append(IncludedFile)
+                Complete = Complete and IncludedComplete
+            Lines.append((False, "\n"))
+        gIncludedAslFile.pop()
+
+        if Complete:
+            self._ExpandedCache[File] = (Lines, FileList)
+        return Lines, FileList, Complete
+
+    ## Read the content of ASL file, including ASL included, recursively
+    #
+    # @param  Source            File to be read
+    # @param  Indent            Spaces before the Include() statement
+    # @param  LocalSearchPath   The path searched first for the file
+    #
+    # @retval list              The lines of content
+    #
+    def Expand(self, Source, Indent='', LocalSearchPath=None):
+        IncludeFile = self.FindFile(Source, LocalSearchPath)
+        # avoid A "include" B and B "include" A
+        if IncludeFile in gIncludedAslFile:
+            EdkLogger.warn("Trim", "Circular include",
+                           ExtraData= "%s -> %s" % (" -> ".join(gIncludedAslFile), IncludeFile))
+            return []
+        Lines, FileList, Complete = self._Expand(IncludeFile)
+        for File in FileList:
+            if File not in self.DependencyList:
+                self.DependencyList.append(File)
+        return [Indented and Indent + Line or Line for Indented, Line in Lines]
+
+    ## Save the parsed content into cache file
+    #
+    # The entries added are merged into the ones in cache file, which may be
+    # saved by other ASL files trimmed at the same time. The cache file is
+    # written into a temporary file first and then renamed, so that they never
+    # read a partial file.
+    #
+    def Save(self):
+        if not self.CacheFile or not self._NewContent:
+            return
+        CreateDirectory(os.path.dirname(self.CacheFile))
+        ContentCache = self._Restore()
+        ContentCache.update(self._NewContent)
+        TempFile = "%s.%d" % (self.CacheFile, getpid())
+        DataDump((self._VERSION_, ContentCache), TempFile)
+        try:
+            if os.path.exists(self.CacheFile):
+                os.remove(self.CacheFile)
+            os.rename(TempFile, self.CacheFile)
+        except OSError, X:
+            EdkLogger.verbose("Failed to save [%s]\n\t%s" % (self.CacheFile, str(X)))
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
+        self._NewContent = {}
 
-    return NewFileContent
+## Read the content  ASL file, including ASL included, recursively
+#
+# @param  Source            File to be read
+# @param  Indent            Spaces before the Include() statement
+# @param  IncludePathList   The list of external include file
+# @param  LocalSearchPath   If LocalSearchPath is specified, this path will be searched
+#                           first for the included file; otherwise, only the path specified
+#                           in the IncludePathList will be searched.
+#
+def DoInclude(Source, Indent='', IncludePathList=[], LocalSearchPath=None):
+    return AslIncludeResolver(IncludePathList).Expand(Source, Indent, LocalSearchPath)
 
 
 ## Trim ASL file
@@ -386,8 +766,10 @@ def DoInclude(Source, Indent='', IncludePathList=[], LocalSearchPath=None):
 # @param  Source          File to be trimmed
 # @param  Target          File to store the trimmed content
 # @param  IncludePathFile The file to log the external include path 
+# @param  CacheFile       The file to cache the content of ASL files in
+# @param  DependencyFile  The file to store the list of files included
 #
-def TrimAslFile(Source, Target, IncludePathFile):
+def TrimAslFile(Source, Target, IncludePathFile, CacheFile=None, DependencyFile=None):
     CreateDirectory(os.path.dirname(Target))
     
     SourceDir = os.path.dirname(Source)
@@ -415,7 +797,9 @@ def TrimAslFile(Source, Target, IncludePathFile):
         except:
             EdkLogger.error("Trim", FILE_OPEN_FAILURE, ExtraData=IncludePathFile)
 
-    Lines = DoInclude(Source, '', IncludePathList)
+    Resolver = AslIncludeResolver(IncludePathList, CacheFile)
+    Lines = Resolver.Expand(Source)
+    Resolver.Save()
 
     #
     # Undef MIN and MAX to avoid collision in ASL source code
@@ -431,6 +815,9 @@ def TrimAslFile(Source, Target, IncludePathFile):
     f.writelines(Lines)
     f.close()
 
+    if DependencyFile:
+        SaveFileOnChange(DependencyFile, "\n".join(Resolver.DependencyList) + "\n", False)
+
 def GenerateVfrBinSec(ModuleName, DebugDir, OutputFile):
     VfrNameList = []
     if os.path.isdir(DebugDir):
@@ -610,10 +997,16 @@ def Options():
 
         make_option("-l", "--trim-long", dest="TrimLong", action="store_true",
                           help="Remove postfix of long number"),
+        make_option("--in-memory", dest="InMemory", action="store_true",
+                          help="Trim preprocessed source code or VFR file with the whole file in memory, instead of streaming it"),
         make_option("-i", "--include-path-file", dest="IncludePathFile",
                           help="The input file is include path list to search for ASL include file"),
         make_option("-o", "--output", dest="OutputFile",
                           help="File to store the trimmed content"),
+        make_option("--include-cache", dest="IncludeCacheFile",
+                          help="File to cache the content of ASL include files in, which can be shared by all ASL files in a build"),
+        make_option("--dependency-file", dest="DependencyFile",
+                          help="File to store the list of ASL files included"),
         make_option("--ModuleName", dest="ModuleName", help="The module's BASE_NAME"),
         make_option("--DebugDir", dest="DebugDir",
                           help="Debug Output directory to store the output files"),
@@ -627,11 +1020,12 @@ def Options():
     ]
 
     # use clearer usage to override default usage message
-    UsageString = "%prog [-s|-r|-a|--Vfr-Uni-Offset] [-c] [-v|-d <debug_level>|-q] [-i <include_path_file>] [-o <output_file>] [--ModuleName <ModuleName>] [--DebugDir <DebugDir>] [<input_file>]"
+    UsageString = "%prog [-s|-r|-a|--Vfr-Uni-Offset] [-c] [--in-memory] [-v|-d <debug_level>|-q] [-i <include_path_file>] [--include-cache <cache_file>] [--dependency-file <dependency_file>] [-o <output_file>] [--ModuleName <ModuleName>] [--DebugDir <DebugDir>] [<input_file>]"
 
     Parser = OptionParser(description=__copyright__, version=__version__, option_list=OptionList, usage=UsageString)
     Parser.set_defaults(FileType="Vfr")
     Parser.set_defaults(ConvertHex=False)
+    Parser.set_defaults(InMemory=False)
     Parser.set_defaults(LogLevel=EdkLogger.INFO)
 
     Options, Args = Parser.parse_args()
@@ -674,11 +1068,15 @@ def Main():
         if CommandOptions.FileType == "Vfr":
             if CommandOptions.OutputFile == None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
-            TrimPreprocessedVfr(InputFile, CommandOptions.OutputFile)
+            if CommandOptions.InMemory:
+                TrimPreprocessedVfrInMemory(InputFile, CommandOptions.OutputFile)
+            else:
+                TrimPreprocessedVfr(InputFile, CommandOptions.OutputFile)
         elif CommandOptions.FileType == "Asl":
             if CommandOptions.OutputFile == None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
-            TrimAslFile(InputFile, CommandOptions.OutputFile, CommandOptions.IncludePathFile)
+            TrimAslFile(InputFile, CommandOptions.OutputFile, CommandOptions.IncludePathFile,
+                        CommandOptions.IncludeCacheFile, CommandOptions.DependencyFile)
         elif CommandOptions.FileType == "EdkSourceCode":
             TrimEdkSources(InputFile, CommandOptions.OutputFile)
         elif CommandOptions.FileType == "VfrOffsetBin":
@@ -686,7 +1084,10 @@ def Main():
         else :
             if CommandOptions.OutputFile == None:
                 CommandOptions.OutputFile = os.path.splitext(InputFile)[0] + '.iii'
-            TrimPreprocessedFile(InputFile, CommandOptions.OutputFile, CommandOptions.ConvertHex, CommandOptions.TrimLong)
+            if CommandOptions.InMemory:
+                TrimPreprocessedFileInMemory(InputFile, CommandOptions.OutputFile, CommandOptions.ConvertHex, CommandOptions.TrimLong)
+            else:
+                TrimPreprocessedFile(InputFile, CommandOptions.OutputFile, CommandOptions.ConvertHex, CommandOptions.TrimLong)
     except FatalError, X:
         import platform
         import traceback
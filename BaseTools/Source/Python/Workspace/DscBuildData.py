@@ -33,10 +33,13 @@ from WorkspaceCommon import GetDeclaredPcd
 from Common.Misc import AnalyzeDscPcd
 from Common.Misc import ProcessDuplicatedInf
 import re
+import hashlib
+from os import getpid
 from Common.Parsing import IsValidWord
 from Common.VariableAttributes import VariableAttributes
 import Common.GlobalData as GlobalData
 import subprocess
+from AutoGen.GenMake import GetDependencyList
 from Workspace.BuildClassObject import PlatformBuildClassObject, StructurePcd, PcdClassObject, ModuleBuildClassObject
 
 #
@@ -94,6 +97,15 @@ MAKEROOT ?= $(EDK_TOOLS_PATH)/Source/C
 LIBS = -lCommon
 '''
 
+#
+# The PcdValueInit application is built again only if the digest of its source,
+# included headers and toolchain is changed, and run again only if its input
+# is changed too. Bump the version if the content of cache file is changed.
+#
+PcdValueInitCacheVersion = 1
+# the environment variables used by makefiles of the application
+PcdValueInitEnvList = ['BUILD_CC', 'BUILD_CFLAGS', 'BUILD_CPPFLAGS', 'BUILD_LFLAGS', 'HOST_ARCH', 'INCLUDE', 'LIB']
+
 class DscBuildData(PlatformBuildClassObject):
     # dict used to convert PCD type in database to string used by build tool
     _PCD_TYPE_STRING_ = {
@@ -1817,9 +1829,7 @@ class DscBuildData(PlatformBuildClassObject):
         if not os.path.exists(self.OutputPath):
             os.makedirs(self.OutputPath)
         CAppBaseFileName = os.path.join(self.OutputPath, PcdValueInitName)
-        File = open (CAppBaseFileName + '.c', 'w')
-        File.write(CApp)
-        File.close()
+        SaveFileOnChange(CAppBaseFileName + '.c', CApp, False)
 
         MakeApp = PcdMakefileHeader
         if sys.platform == "win32":
@@ -1846,11 +1856,13 @@ class DscBuildData(PlatformBuildClassObject):
                 if Package not in PcdDependDEC:
                     PcdDependDEC.append(Package)
 
+        IncludePathList = []
         if PlatformInc and PcdDependDEC:
             for pkg in PcdDependDEC:
                 if pkg in PlatformInc:
                     for inc in PlatformInc[pkg]:
                         MakeApp += '-I'  + str(inc) + ' '
+                        IncludePathList.append(str(inc))
         MakeApp = MakeApp + '\n'
 
         CC_FLAGS = LinuxCFLAGS
@@ -1899,23 +1911,89 @@ class DscBuildData(PlatformBuildClassObject):
         if sys.platform == "win32":
             MakeApp = MakeApp + PcdMakefileEnd
         MakeFileName = os.path.join(self.OutputPath, 'Makefile')
-        File = open (MakeFileName, 'w')
-        File.write(MakeApp)
-        File.close()
+        SaveFileOnChange(MakeFileName, MakeApp, False)
 
         InputValueFile = os.path.join(self.OutputPath, 'Input.txt')
         OutputValueFile = os.path.join(self.OutputPath, 'Output.txt')
-        File = open (InputValueFile, 'w')
-        File.write(InitByteValue)
-        File.close()
+        SaveFileOnChange(InputValueFile, InitByteValue, False)
 
+        if sys.platform == "win32":
+            PcdValueInitExe = PcdValueInitName
+            ObjectFile = CAppBaseFileName + '.obj'
+            ExeFile = os.path.join(os.getenv("BASE_TOOLS_PATH", ""), 'Bin', 'Win32', PcdValueInitName + '.exe')
+        else:
+            PcdValueInitExe = os.path.join(os.getenv("EDK_TOOLS_PATH"), 'Source', 'C', 'bin', PcdValueInitName)
+            ObjectFile = CAppBaseFileName + '.o'
+            ExeFile = PcdValueInitExe
+
+        CacheFile = CAppBaseFileName + '.cache'
+        Cache = {}
+        if os.path.isfile(CacheFile):
+            Data = DataRestore(CacheFile)
+            if type(Data) == type(()) and len(Data) == 2 and Data[0] == PcdValueInitCacheVersion:
+                Cache = Data[1]
+        AppDigest = self._GetPcdValueInitDigest(CAppBaseFileName + '.c', MakeApp, IncludePathList)
+        InputDigest = hashlib.md5(InitByteValue).hexdigest()
+
+        if Cache.get('App') != AppDigest or Cache.get('Exe') != self._GetFileStamp(ExeFile):
+            #
+            # The makefile has no dependency on headers, remove the object
+            # file so that it's compiled again for the changed headers or
+            # toolchain. The executable is shared by all workspaces and
+            # platforms, and may be replaced by the one built for another
+            # platform, which is newer than the object file. So remove it
+            # too, to make sure it's linked again for this platform.
+            #
+            for File in (ObjectFile, ExeFile):
+                if os.path.exists(File):
+                    os.remove(File)
+            Cache = {}
+            self._BuildPcdValueInit(MakeFileName)
+            Cache['App'] = AppDigest
+            Cache['Exe'] = self._GetFileStamp(ExeFile)
+
+        if Cache.get('Input') == InputDigest and Cache.get('Output') == self._GetFileStamp(OutputValueFile):
+            EdkLogger.verbose("Skip running %s for the unchanged structure PCD values" % PcdValueInitName)
+            File = open (OutputValueFile, 'r')
+            FileBuffer = File.readlines()
+            File.close()
+        else:
+            Command = PcdValueInitExe + ' -i %s -o %s' % (InputValueFile, OutputValueFile)
+            returncode, StdOut, StdErr = self.ExecuteCommand (Command)
+            if returncode <> 0:
+                EdkLogger.warn('Build', COMMAND_FAILURE, 'Can not collect output from command: %s' % Command)
+                FileBuffer = []
+                Cache.pop('Input', None)
+            else:
+                File = open (OutputValueFile, 'r')
+                FileBuffer = File.readlines()
+                File.close()
+                Cache['Input'] = InputDigest
+                Cache['Output'] = self._GetFileStamp(OutputValueFile)
+        self._SavePcdValueInitCache(CacheFile, Cache)
+
+        StructurePcdSet = []
+        for Pcd in FileBuffer:
+            PcdValue = Pcd.split ('|')
+            PcdInfo = PcdValue[0].split ('.')
+            StructurePcdSet.append((PcdInfo[0],PcdInfo[1], PcdInfo[2], PcdInfo[3], PcdValue[2].strip()))
+        return StructurePcdSet
+
+    ## Build the PcdValueInit application with its makefile
+    #
+    #   The compiler messages about the generated C file are converted to the
+    # DSC lines the values come from.
+    #
+    #   @param  MakeFileName    The path of makefile
+    #
+    def _BuildPcdValueInit(self, MakeFileName):
         Messages = ''
         if sys.platform == "win32":
-            MakeCommand = 'nmake clean & nmake -f %s' % (MakeFileName)
+            MakeCommand = 'nmake -f %s' % (MakeFileName)
             returncode, StdOut, StdErr = self.ExecuteCommand (MakeCommand)
             Messages = StdOut
         else:
-            MakeCommand = 'make clean & make -f %s' % (MakeFileName)
+            MakeCommand = 'make -f %s' % (MakeFileName)
             returncode, StdOut, StdErr = self.ExecuteCommand (MakeCommand)
             Messages = StdErr
         Messages = Messages.split('\n')
@@ -1960,26 +2038,76 @@ class DscBuildData(PlatformBuildClassObject):
             else:
                 EdkLogger.error('Build', COMMAND_FAILURE, 'Can not execute command: %s' % MakeCommand)
 
-        PcdValueInitExe = PcdValueInitName
-        if not sys.platform == "win32":
-            PcdValueInitExe = os.path.join(os.getenv("EDK_TOOLS_PATH"), 'Source', 'C', 'bin', PcdValueInitName)
-
-        Command = PcdValueInitExe + ' -i %s -o %s' % (InputValueFile, OutputValueFile)
-        returncode, StdOut, StdErr = self.ExecuteCommand (Command)
-        if returncode <> 0:
-            EdkLogger.warn('Build', COMMAND_FAILURE, 'Can not collect output from command: %s' % Command)
-            FileBuffer = []
+    ## Get the digest of the PcdValueInit application sources and toolchain
+    #
+    #   The digest covers the generated C file and makefile, the headers they
+    # include, the makefiles and library of BaseTools used to build it, the
+    # compiler found in PATH and the environment variables used by makefiles.
+    #
+    #   @param  CAppFileName    The path of generated C file
+    #   @param  MakeApp         The content of generated makefile
+    #   @param  IncludePathList The include paths of packages the PCDs depend on
+    #
+    #   @retval string          Hex digest
+    #
+    def _GetPcdValueInitDigest(self, CAppFileName, MakeApp, IncludePathList):
+        ToolsSourcePath = os.path.join(os.getenv("EDK_TOOLS_PATH", ""), 'Source', 'C')
+        if sys.platform == "win32":
+            ToolFileList = [os.path.join(ToolsSourcePath, 'Makefiles', Name) for Name in ['ms.common', 'ms.app', 'ms.rule']]
+            ToolFileList.append(os.path.join(os.getenv("BASE_TOOLS_PATH", ""), 'Lib', 'Win32', 'Common.lib'))
+            Compiler = 'cl.exe'
         else:
-            File = open (OutputValueFile, 'r')
-            FileBuffer = File.readlines()
-            File.close()
+            ToolFileList = [os.path.join(ToolsSourcePath, 'Makefiles', Name) for Name in ['header.makefile', 'app.makefile', 'footer.makefile']]
+            ToolFileList.append(os.path.join(ToolsSourcePath, 'libs', 'libCommon.a'))
+            Compiler = os.getenv('BUILD_CC', 'gcc')
+
+        SearchPathList = IncludePathList + [os.path.join(ToolsSourcePath, 'Include'), os.path.join(ToolsSourcePath, 'Common')]
+        CAppFile = PathClass(CAppFileName)
+        DependencyList = GetDependencyList(None, {}, CAppFile, [], SearchPathList)
+
+        Md5 = hashlib.md5()
+        Md5.update(sys.platform)
+        Md5.update(MakeApp)
+        for Name in PcdValueInitEnvList:
+            Md5.update('%s=%s\n' % (Name, os.getenv(Name, '')))
+        for File in [CAppFile.Path] + sorted([Dependency.Path for Dependency in DependencyList]) + ToolFileList:
+            Md5.update(File)
+            if os.path.isfile(File):
+                Fd = open(File, 'rb')
+                Md5.update(Fd.read())
+                Fd.close()
+        for Path in os.getenv('PATH', '').split(os.pathsep):
+            CompilerPath = os.path.join(Path, Compiler)
+            if os.path.isfile(CompilerPath):
+                Md5.update('%s %s' % (CompilerPath, self._GetFileStamp(CompilerPath)))
+                break
+        return Md5.hexdigest()
+
+    ## Get the size and modified time of a file
+    #
+    #   @retval tuple           (Size, ModifiedTime), or None if the file doesn't exist
+    #
+    def _GetFileStamp(self, File):
+        if not os.path.isfile(File):
+            return None
+        Stat = os.stat(File)
+        return (Stat.st_size, Stat.st_mtime)
 
-        StructurePcdSet = []
-        for Pcd in FileBuffer:
-            PcdValue = Pcd.split ('|')
-            PcdInfo = PcdValue[0].split ('.')
-            StructurePcdSet.append((PcdInfo[0],PcdInfo[1], PcdInfo[2], PcdInfo[3], PcdValue[2].strip()))
-        return StructurePcdSet
+    ## Save the cache of PcdValueInit application
+    #
+    #   The cache file is written into a temporary file first and then renamed.
+    #
+    def _SavePcdValueInitCache(self, CacheFile, Cache):
+        TempFile = "%s.%d" % (CacheFile, getpid())
+        DataDump((PcdValueInitCacheVersion, Cache), TempFile)
+        try:
+            if os.path.exists(CacheFile):
+                os.remove(CacheFile)
+            os.rename(TempFile, CacheFile)
+        except OSError, X:
+            EdkLogger.verbose("Failed to save [%s]\n\t%s" % (CacheFile, str(X)))
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
 
     ## Retrieve dynamic PCD settings
     #
@@ -0,0 +1,212 @@
+## @file
+# This file is used to keep the query results of INF/DEC meta files across builds
+#
+# Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+# This program and the accompanying materials
+# are licensed and made available under the terms and conditions of the BSD License
+# which accompanies this distribution.  The full text of the license may be found at
+# http://opensource.org/licenses/bsd-license.php
+#
+# THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+# WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import hashlib
+import Common.LongFilePathOs as os
+from os import getpid
+import Common.EdkLogger as EdkLogger
+import Common.GlobalData as GlobalData
+from Common.Misc import DataDump
+from Common.Misc import DataRestore
+from CommonDataClass.DataClass import MODEL_META_DATA_HEADER
+from Common.LongFilePathSupport import OpenLongFilePath as open
+
+## Persistent cache of meta file records
+#
+#   The records of INF and DEC files depend only on the content of the file
+# and the default arch of the parser. The complete records of each file,
+# comments included, are stored here, keyed by the MD5 digest of the file
+# content, so that a later build can answer queries without parsing the file
+# again.
+#
+#   @param      CacheFile       The path of file the cache is stored in
+#
+class MetaFileRecordCache(object):
+    # bump it if the layout of records in parser tables is changed
+    _VERSION_ = 2
+
+    def __init__(self, CacheFile):
+        self.CacheFile = CacheFile
+        # (FilePath, Arch) : (Digest, [complete record])
+        self._Records = {}
+        self._Digests = {}
+        self._Modified = False
+        self.HitCount = 0
+        self.MissCount = 0
+        if os.path.exists(CacheFile):
+            Data = DataRestore(CacheFile)
+            if type(Data) == type(()) and len(Data) == 2 and Data[0] == self._VERSION_:
+                self._Records = Data[1]
+
+    ## Calculate the key of file content
+    #
+    # Global macro names are part of the key because parsers reject files
+    # re-defining them; their values are never expanded in INF/DEC records.
+    #
+    def _GetDigest(self, FilePath):
+        Path = str(FilePath)
+        if Path not in self._Digests:
+            Md5 = hashlib.md5()
+            Md5.update(' '.join(sorted(GlobalData.gGlobalDefines.keys())))
+            try:
+                Fd = open(Path, 'rb')
+                try:
+                    Md5.update(Fd.read())
+                finally:
+                    Fd.close()
+                self._Digests[Path] = Md5.hexdigest()
+            except IOError:
+                self._Digests[Path] = None
+        return self._Digests[Path]
+
+    ## Get the cached records of a file, None if not cached or out of date
+    def Get(self, FilePath, Arch):
+        Digest = self._GetDigest(FilePath)
+        Entry = self._Records.get((str(FilePath), Arch))
+        if Digest and Entry and Entry[0] == Digest:
+            self.HitCount += 1
+            return Entry[1]
+        self.MissCount += 1
+        return None
+
+    ## Remember the complete records of a file
+    def Set(self, FilePath, Arch, RecordList):
+        Digest = self._GetDigest(FilePath)
+        if not Digest:
+            return
+        self._Records[str(FilePath), Arch] = (Digest, RecordList)
+        self._Modified = True
+
+    ## Write the cache back to file system
+    #
+    # The cache is written into a temporary file first and then renamed, so
+    # that concurrent builds never read a partial file.
+    #
+    def Save(self):
+        EdkLogger.verbose("Meta file record cache: %d hit(s), %d miss(es)" % (self.HitCount, self.MissCount))
+        if not self._Modified:
+            return
+        TempFile = "%s.%d" % (self.CacheFile, getpid())
+        DataDump((self._VERSION_, self._Records), TempFile)
+        try:
+            if os.path.exists(self.CacheFile):
+                os.remove(self.CacheFile)
+            os.rename(TempFile, self.CacheFile)
+        except OSError, X:
+            EdkLogger.verbose("Failed to save [%s]\n\t%s" % (self.CacheFile, str(X)))
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
+        self._Modified = False
+
+## Meta file parser wrapper answering queries from MetaFileRecordCache
+#
+#   The cached records of the file are loaded into a new table, and queries
+# are answered from it in the same way as the parser does. The real parser is
+# created only when the file is not cached. All records of a file in one build
+# come from either of them, so that the ID in a record can be used to query the
+# records belonging to it.
+#
+#   @param      Cache           MetaFileRecordCache object
+#   @param      ParserClass     Class of the real parser (InfParser or DecParser)
+#   @param      FilePath        The path of meta file
+#   @param      FileType        The type of meta file
+#   @param      Arch            Default Arch value for filtering sections
+#   @param      TableCreator    Callable returning the table of the real parser
+#
+class CachedMetaFile(object):
+    # One file, one wrapper, the same as parser objects
+    MetaFiles = {}
+
+    def __new__(Class, Cache, ParserClass, FilePath, *args, **kwargs):
+        if FilePath in Class.MetaFiles:
+            return Class.MetaFiles[FilePath]
+        Object = super(CachedMetaFile, Class).__new__(Class)
+        Class.MetaFiles[FilePath] = Object
+        return Object
+
+    def __init__(self, Cache, ParserClass, FilePath, FileType, Arch, TableCreator):
+        # prevent re-initialization
+        if hasattr(self, "MetaFile"):
+            return
+        self._Cache = Cache
+        self._ParserClass = ParserClass
+        self._FileType = FileType
+        self._Arch = Arch
+        self._TableCreator = TableCreator
+        self._Parser = None
+        self._RecordTable = None
+        self.MetaFile = FilePath
+
+    ## Get the table loaded with cached records, None if the file is parsed
+    def _GetRecordTable(self):
+        if self._RecordTable == None and self._Parser == None:
+            RecordList = self._Cache.Get(self.MetaFile, self._Arch)
+            if RecordList == None:
+                return None
+            Table = self._TableCreator()
+            if not Table.IsIntegrity():
+                # IDs are given by the table, so the items comments belong to are mapped
+                IdMap = {}
+                for Record in RecordList:
+                    Args = list(Record[1:])
+                    Args[6] = IdMap.get(Args[6], Args[6])
+                    IdMap[Record[0]] = Table.Insert(*Args)
+                Table.SetEndFlag()
+            self._RecordTable = Table
+        return self._RecordTable
+
+    ## Create the real parser on demand, and keep its complete records
+    def _GetParser(self):
+        if self._Parser == None:
+            self._Parser = self._ParserClass(self.MetaFile, self._FileType, self._Arch, self._TableCreator())
+            self._Parser.DoPostProcess()
+            # parse the file, then all records are in the table
+            self._Parser[MODEL_META_DATA_HEADER]
+            self._Cache.Set(self.MetaFile, self._Arch, self._Parser._RawTable.GetAll())
+        return self._Parser
+
+    ## Table the records are got from
+    def _GetTable(self):
+        if self._Parser == None:
+            return self._RecordTable
+        return self._Parser._Table
+
+    ## Notify a post-process is needed
+    def DoPostProcess(self):
+        if self._Parser != None:
+            self._Parser.DoPostProcess()
+
+    ## Query records in the same way as MetaFileParser
+    def __getitem__(self, DataInfo):
+        if type(DataInfo) != type(()):
+            DataInfo = (DataInfo,)
+        Table = self._GetRecordTable()
+        if Table == None:
+            return self._GetParser()[DataInfo]
+        # No specific ARCH given, records of default arch are returned
+        if len(DataInfo) == 1 or DataInfo[1] == None:
+            FilterArch = self._Arch
+        else:
+            FilterArch = DataInfo[1]
+        return [Record for Record in Table.Query(*DataInfo) if Record[3] in ('COMMON', FilterArch)]
+
+    def GetValidExpression(self, TokenSpaceGuid, PcdCName):
+        Table = self._GetRecordTable()
+        if Table == None:
+            return self._GetParser().GetValidExpression(TokenSpaceGuid, PcdCName)
+        return Table.GetValidExpression(TokenSpaceGuid, PcdCName)
+
+    _Table = property(_GetTable)
@@ -15,8 +15,10 @@
 # Import Modules
 #
 import uuid
+from array import array
 
 import Common.EdkLogger as EdkLogger
+import Common.GlobalData as GlobalData
 from Common.BuildToolError import FORMAT_INVALID
 
 from MetaDataTable import Table, TableFile
@@ -230,38 +232,51 @@ class PackageTable(MetaFileTable):
     def GetValidExpression(self, TokenSpaceGuid, PcdCName):
         SqlCommand = "select Value1,StartLine from %s WHERE Value2='%s' and Value3='%s'" % (self.Table, TokenSpaceGuid, PcdCName)
         self.Cur.execute(SqlCommand)
-        validateranges = []
-        validlists = []
-        expressions = []
-        try:
-            for row in self.Cur:
-                comment = row[0]
-                
-                LineNum = row[1]
-                comment = comment.strip("#")
-                comment = comment.strip()
-                oricomment = comment
-                if comment.startswith("@ValidRange"):
-                    comment = comment.replace("@ValidRange", "", 1)
-                    validateranges.append(comment.split("|")[1].strip())
-                if comment.startswith("@ValidList"):
-                    comment = comment.replace("@ValidList", "", 1)
-                    validlists.append(comment.split("|")[1].strip())
-                if comment.startswith("@Expression"):
-                    comment = comment.replace("@Expression", "", 1)
-                    expressions.append(comment.split("|")[1].strip())
-        except Exception, Exc:
-            ValidType = ""
-            if oricomment.startswith("@ValidRange"):
-                ValidType = "@ValidRange"
-            if oricomment.startswith("@ValidList"):
-                ValidType = "@ValidList"
-            if oricomment.startswith("@Expression"):
-                ValidType = "@Expression"
-            EdkLogger.error('Parser', FORMAT_INVALID, "The syntax for %s of PCD %s.%s is incorrect" % (ValidType,TokenSpaceGuid, PcdCName),
-                            ExtraData=oricomment,File=self.MetaFile, Line=LineNum)
-            return set(), set(), set()
-        return set(validateranges), set(validlists), set(expressions)
+        return ParseValidExpression(self.Cur, self.MetaFile, TokenSpaceGuid, PcdCName)
+
+## Get @ValidRange, @ValidList and @Expression of a PCD from its comments
+#
+# @param    RecordList:     (Comment, LineNumber) of comments of the PCD
+# @param    MetaFile:       The DEC file the PCD is declared in
+# @param    TokenSpaceGuid: Token space GUID C name of the PCD
+# @param    PcdCName:       C name of the PCD
+#
+# @retval:  (validateranges, validlists, expressions)
+#
+def ParseValidExpression(RecordList, MetaFile, TokenSpaceGuid, PcdCName):
+    validateranges = []
+    validlists = []
+    expressions = []
+    try:
+        for row in RecordList:
+            comment = row[0]
+            
+            LineNum = row[1]
+            comment = comment.strip("#")
+            comment = comment.strip()
+            oricomment = comment
+            if comment.startswith("@ValidRange"):
+                comment = comment.replace("@ValidRange", "", 1)
+                validateranges.append(comment.split("|")[1].strip())
+            if comment.startswith("@ValidList"):
+                comment = comment.replace("@ValidList", "", 1)
+                validlists.append(comment.split("|")[1].strip())
+            if comment.startswith("@Expression"):
+                comment = comment.replace("@Expression", "", 1)
+                expressions.append(comment.split("|")[1].strip())
+    except Exception, Exc:
+        ValidType = ""
+        if oricomment.startswith("@ValidRange"):
+            ValidType = "@ValidRange"
+        if oricomment.startswith("@ValidList"):
+            ValidType = "@ValidList"
+        if oricomment.startswith("@Expression"):
+            ValidType = "@Expression"
+        EdkLogger.error('Parser', FORMAT_INVALID, "The syntax for %s of PCD %s.%s is incorrect" % (ValidType,TokenSpaceGuid, PcdCName),
+                        ExtraData=oricomment,File=MetaFile, Line=LineNum)
+        return set(), set(), set()
+    return set(validateranges), set(validlists), set(expressions)
+
 ## Python class representation of table storing platform data
 class PlatformTable(MetaFileTable):
     _COLUMN_ = '''
@@ -363,7 +378,232 @@ class PlatformTable(MetaFileTable):
         SqlCommand = "SELECT %s FROM %s WHERE %s" % (ValueString, self.Table, ConditionString)
         return self.Exec(SqlCommand)
 
+## Python class representation of meta file records kept in memory
+#
+#   It provides the same interface as MetaFileTable, but keeps the records of
+# a meta file in one array per column instead of in a database table. Rows of
+# each Model are indexed so that a query only visits the rows of the Model
+# asked for, without building and running any SQL command.
+#
+#   Records in memory are not kept across builds, so IsIntegrity() is true
+# only after the file has been parsed in current build.
+#
+class MetaFileRecordStore(object):
+    # column name and array type code ('' for strings), ID excluded
+    _COLUMN_ = []
+    _ID_STEP_ = 0.00000001
+    _ID_MAX_ = 0.99999999
+
+    ## Constructor
+    def __init__(self, Cursor, MetaFile, FileType, Temporary):
+        self.Cur = Cursor
+        self.MetaFile = MetaFile
+        self.Temporary = Temporary
+
+        # keep file ID the same as the one used by database tables
+        self._FileIndexTable = TableFile(Cursor)
+        self._FileIndexTable.Create(False)
+        FileId = self._FileIndexTable.GetFileId(MetaFile)
+        if not FileId:
+            FileId = self._FileIndexTable.InsertFile(MetaFile, FileType)
+
+        if Temporary:
+            self.Table = "_%s_%s_%s" % (FileType, FileId, uuid.uuid4().hex)
+        else:
+            self.Table = "_%s_%s" % (FileType, FileId)
+        self.IdBase = int(FileId)
+        self.Create()
+
+    def __str__(self):
+        return self.Table
+
+    ## Remove all records
+    def Create(self, NewTable=True):
+        self.ID = self.IdBase
+        self._Id = array('d')
+        self._Columns = []
+        for Name, TypeCode in self._COLUMN_:
+            if TypeCode:
+                self._Columns.append(array(TypeCode))
+            else:
+                self._Columns.append([])
+        self._ModelIndex = {}
+        self._Integrity = False
+
+    def Drop(self):
+        self.Create()
+
+    ## Append a record, in the order of _COLUMN_
+    def Insert(self, *Args):
+        self.ID = self.ID + self._ID_STEP_
+        if self.ID >= (self.IdBase + self._ID_MAX_):
+            self.ID = self.IdBase + self._ID_STEP_
+        self._Id.append(self.ID)
+        for Index in range(len(Args)):
+            self._Columns[Index].append(Args[Index])
+        Model = Args[0]
+        if Model not in self._ModelIndex:
+            self._ModelIndex[Model] = array('l')
+        self._ModelIndex[Model].append(len(self._Id) - 1)
+        return self.ID
+
+    def SetEndFlag(self):
+        self._Integrity = True
+
+    def IsIntegrity(self):
+        return self._Integrity
+
+    def GetCount(self):
+        return len(self._Id)
+
+    def GetId(self):
+        if not self._Id:
+            return self.IdBase
+        return max(self._Id)
+
+    ## Get complete records, ordered by ID
+    def GetAll(self):
+        RecordList = [self._GetRecord(Row) for Row in range(len(self._Id))]
+        RecordList.sort(key=lambda Record: Record[0])
+        return RecordList
+
+    def _GetRecord(self, Row):
+        return tuple([self._Id[Row]] + [Column[Row] for Column in self._Columns])
+
+    ## Get rows of given Model
+    def _GetRows(self, Model):
+        return self._ModelIndex.get(Model, ())
+
+## Python class representation of module data kept in memory
+class ModuleRecordStore(MetaFileRecordStore):
+    _COLUMN_ = [
+        ('Model', 'l'), ('Value1', ''), ('Value2', ''), ('Value3', ''), ('Scope1', ''), ('Scope2', ''),
+        ('BelongsToItem', 'd'), ('StartLine', 'l'), ('StartColumn', 'l'), ('EndLine', 'l'),
+        ('EndColumn', 'l'), ('Enabled', 'l')
+        ]
+
+    ## Constructor
+    def __init__(self, Cursor, MetaFile, Temporary):
+        MetaFileRecordStore.__init__(self, Cursor, MetaFile, MODEL_FILE_INF, Temporary)
+
+    ## Insert a record, the same as ModuleTable.Insert
+    def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON',
+               BelongsToItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=0):
+        return MetaFileRecordStore.Insert(self, Model, Value1, Value2, Value3, Scope1, Scope2,
+                                          BelongsToItem, StartLine, StartColumn, EndLine, EndColumn, Enabled)
+
+    ## Query records, the same as ModuleTable.Query
+    def Query(self, Model, Arch=None, Platform=None, BelongsToItem=None):
+        Value1, Value2, Value3, Scope1, Scope2, Belongs, StartLine = self._Columns[1:8]
+        Enabled = self._Columns[11]
+        if Arch == 'COMMON':
+            Arch = None
+        if Platform == 'COMMON':
+            Platform = None
+        RecordList = []
+        for Row in self._GetRows(Model):
+            if Enabled[Row] < 0:
+                continue
+            if Arch != None and Scope1[Row] not in (Arch, 'COMMON'):
+                continue
+            if Platform != None and Scope2[Row] not in (Platform, 'COMMON', 'DEFAULT'):
+                continue
+            if BelongsToItem != None and Belongs[Row] != BelongsToItem:
+                continue
+            RecordList.append((Value1[Row], Value2[Row], Value3[Row], Scope1[Row], Scope2[Row], self._Id[Row], StartLine[Row]))
+        return RecordList
+
+## Python class representation of package data kept in memory
+class PackageRecordStore(MetaFileRecordStore):
+    _COLUMN_ = ModuleRecordStore._COLUMN_
+
+    ## Constructor
+    def __init__(self, Cursor, MetaFile, Temporary):
+        MetaFileRecordStore.__init__(self, Cursor, MetaFile, MODEL_FILE_DEC, Temporary)
+
+    ## Insert a record, the same as PackageTable.Insert
+    def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON',
+               BelongsToItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=0):
+        return MetaFileRecordStore.Insert(self, Model, Value1, Value2, Value3, Scope1, Scope2,
+                                          BelongsToItem, StartLine, StartColumn, EndLine, EndColumn, Enabled)
+
+    ## Query records, the same as PackageTable.Query
+    def Query(self, Model, Arch=None):
+        Value1, Value2, Value3, Scope1, Scope2 = self._Columns[1:6]
+        StartLine = self._Columns[7]
+        Enabled = self._Columns[11]
+        if Arch == 'COMMON':
+            Arch = None
+        RecordList = []
+        for Row in self._GetRows(Model):
+            if Enabled[Row] < 0:
+                continue
+            if Arch != None and Scope1[Row] not in (Arch, 'COMMON'):
+                continue
+            RecordList.append((Value1[Row], Value2[Row], Value3[Row], Scope1[Row], Scope2[Row], self._Id[Row], StartLine[Row]))
+        return RecordList
+
+    def GetValidExpression(self, TokenSpaceGuid, PcdCName):
+        Value1, Value2, Value3 = self._Columns[1:4]
+        StartLine = self._Columns[7]
+        RecordList = [(Value1[Row], StartLine[Row]) for Row in range(len(self._Id))
+                      if Value2[Row] == TokenSpaceGuid and Value3[Row] == PcdCName]
+        return ParseValidExpression(RecordList, self.MetaFile, TokenSpaceGuid, PcdCName)
+
+## Python class representation of platform data kept in memory
+class PlatformRecordStore(MetaFileRecordStore):
+    _COLUMN_ = [
+        ('Model', 'l'), ('Value1', ''), ('Value2', ''), ('Value3', ''), ('Scope1', ''), ('Scope2', ''),
+        ('Scope3', ''), ('BelongsToItem', 'd'), ('FromItem', 'd'), ('StartLine', 'l'), ('StartColumn', 'l'),
+        ('EndLine', 'l'), ('EndColumn', 'l'), ('Enabled', 'l')
+        ]
+
+    ## Constructor
+    def __init__(self, Cursor, MetaFile, Temporary):
+        MetaFileRecordStore.__init__(self, Cursor, MetaFile, MODEL_FILE_DSC, Temporary)
+
+    ## Insert a record, the same as PlatformTable.Insert
+    def Insert(self, Model, Value1, Value2, Value3, Scope1='COMMON', Scope2='COMMON', Scope3=TAB_DEFAULT_STORES_DEFAULT,BelongsToItem=-1,
+               FromItem=-1, StartLine=-1, StartColumn=-1, EndLine=-1, EndColumn=-1, Enabled=1):
+        return MetaFileRecordStore.Insert(self, Model, Value1, Value2, Value3, Scope1, Scope2, Scope3,
+                                          BelongsToItem, FromItem, StartLine, StartColumn, EndLine, EndColumn, Enabled)
+
+    ## Query records, the same as PlatformTable.Query
+    def Query(self, Model, Scope1=None, Scope2=None, BelongsToItem=None, FromItem=None):
+        Value1, Value2, Value3, Arch, ModuleType, DefaultStore, Belongs, From, StartLine = self._Columns[1:10]
+        Enabled = self._Columns[13]
+        if Scope1 == 'COMMON':
+            Scope1 = None
+        Scope2List = None
+        if Scope2 != None and Scope2 != 'COMMON':
+            Scope2List = [Scope2, 'COMMON', 'DEFAULT']
+            # Cover the case that CodeBase is 'COMMON' for BuildOptions section
+            if '.' in Scope2:
+                Scope2List.append('COMMON' + Scope2[Scope2.index('.'):])
+        RecordList = []
+        for Row in self._GetRows(Model):
+            if Enabled[Row] <= 0:
+                continue
+            if Scope1 != None and Arch[Row] not in (Scope1, 'COMMON'):
+                continue
+            if Scope2List != None and ModuleType[Row] not in Scope2List:
+                continue
+            if BelongsToItem != None:
+                if Belongs[Row] != BelongsToItem:
+                    continue
+            elif Belongs[Row] >= 0:
+                continue
+            if FromItem != None and From[Row] != FromItem:
+                continue
+            RecordList.append((Value1[Row], Value2[Row], Value3[Row], Arch[Row], ModuleType[Row], DefaultStore[Row],
+                               self._Id[Row], StartLine[Row]))
+        return RecordList
+
 ## Factory class to produce different storage for different type of meta-file
+#
+#   Records are kept in database tables, or in memory if
+# GlobalData.gMetaFileStorage is 'memory'.
+#
 class MetaFileStorage(object):
     _FILE_TABLE_ = {
         MODEL_FILE_INF      :   ModuleTable,
@@ -372,6 +612,12 @@ class MetaFileStorage(object):
         MODEL_FILE_OTHERS   :   MetaFileTable,
     }
 
+    _FILE_STORE_ = {
+        MODEL_FILE_INF      :   ModuleRecordStore,
+        MODEL_FILE_DEC      :   PackageRecordStore,
+        MODEL_FILE_DSC      :   PlatformRecordStore,
+    }
+
     _FILE_TYPE_ = {
         ".inf"  : MODEL_FILE_INF,
         ".dec"  : MODEL_FILE_DEC,
@@ -394,5 +640,7 @@ class MetaFileStorage(object):
             Args = (Cursor, MetaFile, Temporary)
 
         # create the storage object and return it to caller
+        if GlobalData.gMetaFileStorage == 'memory' and FileType in Class._FILE_STORE_:
+            return Class._FILE_STORE_[FileType](*Args)
         return Class._FILE_TABLE_[FileType](*Args)
 
@@ -24,6 +24,8 @@ from types import *
 from MetaDataTable import *
 from MetaFileTable import *
 from MetaFileParser import *
+from MetaFileCache import MetaFileRecordCache
+from MetaFileCache import CachedMetaFile
 
 from Workspace.DecBuildData import DecBuildData
 from Workspace.DscBuildData import DscBuildData
@@ -113,12 +115,24 @@ class WorkspaceDatabase(object):
                 return None
 
             # get the parser ready for this file
-            MetaFile = self._FILE_PARSER_[FileType](
-                                FilePath, 
-                                FileType, 
+            if self.WorkspaceDb.RecordCache and FileType != MODEL_FILE_DSC \
+               and not (GlobalData.gOptions and GlobalData.gOptions.CheckUsage):
+                # queries of INF/DEC files are answered from persistent cache if possible
+                MetaFile = CachedMetaFile(
+                                self.WorkspaceDb.RecordCache,
+                                self._FILE_PARSER_[FileType],
+                                FilePath,
+                                FileType,
                                 Arch,
-                                MetaFileStorage(self.WorkspaceDb.Cur, FilePath, FileType)
+                                lambda: MetaFileStorage(self.WorkspaceDb.Cur, FilePath, FileType)
                                 )
+            else:
+                MetaFile = self._FILE_PARSER_[FileType](
+                                    FilePath,
+                                    FileType,
+                                    Arch,
+                                    MetaFileStorage(self.WorkspaceDb.Cur, FilePath, FileType)
+                                    )
             # alwasy do post-process, in case of macros change
             MetaFile.DoPostProcess()
             # object the build is based on
@@ -150,18 +164,21 @@ class WorkspaceDatabase(object):
     #
     def __init__(self, DbPath, RenewDb=False):
         self._DbClosedFlag = False
+        self.RecordCache = None
         if not DbPath:
             DbPath = os.path.normpath(mws.join(GlobalData.gWorkspace, 'Conf', GlobalData.gDatabasePath))
-
         # don't create necessary path for db in memory
         if DbPath != ':memory:':
             DbDir = os.path.split(DbPath)[0]
             if not os.path.exists(DbDir):
                 os.makedirs(DbDir)
-
+            RecordCacheFile = os.path.join(DbDir, 'MetaFileRecord.cache')
             # remove db file in case inconsistency between db and file in file system
             if self._CheckWhetherDbNeedRenew(RenewDb, DbPath):
                 os.remove(DbPath)
+                if os.path.exists(RecordCacheFile):
+                    os.remove(RecordCacheFile)
+            self.RecordCache = MetaFileRecordCache(RecordCacheFile)
         
         # create db with optimized parameters
         self.Conn = sqlite3.connect(DbPath, isolation_level='DEFERRED')
@@ -274,6 +291,8 @@ determine whether database file is out of date!\n")
             self.Conn.commit()
             self.Cur.close()
             self.Conn.close()
+            if self.RecordCache:
+                self.RecordCache.Save()
             self._DbClosedFlag = True
 
     ## Summarize all packages in the database
@@ -1961,8 +1961,9 @@ class PlatformReport(object):
     # @param MakeTime        The total time of Make Phase
     # @param GenFdsTime      The total time of GenFds Phase
     # @param ReportType      The kind of report items in the final report file
+    # @param PredictedMakeTime  The predicted time of Make Phase
     #
-    def GenerateReport(self, File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, ReportType):
+    def GenerateReport(self, File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, ReportType, PredictedMakeTime=None):
         FileWrite(File, "Platform Summary")
         FileWrite(File, "Platform Name:        %s" % self.PlatformName)
         FileWrite(File, "Platform DSC Path:    %s" % self.PlatformDscPath)
@@ -1980,6 +1981,8 @@ class PlatformReport(object):
             FileWrite(File, "AutoGen Duration:     %s" % AutoGenTime)
         if MakeTime:
             FileWrite(File, "Make Duration:        %s" % MakeTime)
+        if PredictedMakeTime:
+            FileWrite(File, "Make Duration (Est):  %s" % PredictedMakeTime)
         if GenFdsTime:
             FileWrite(File, "GenFds Duration:      %s" % GenFdsTime)
         FileWrite(File, "Report Content:       %s" % ", ".join(ReportType))
@@ -2059,13 +2062,14 @@ class BuildReport(object):
     # @param AutoGenTime     The total time of AutoGen phase
     # @param MakeTime        The total time of Make phase
     # @param GenFdsTime      The total time of GenFds phase
+    # @param PredictedMakeTime  The predicted time of Make phase
     #
-    def GenerateReport(self, BuildDuration, AutoGenTime, MakeTime, GenFdsTime):
+    def GenerateReport(self, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, PredictedMakeTime=None):
         if self.ReportFile:
             try:
                 File = StringIO('')
                 for (Wa, MaList) in self.ReportList:
-                    PlatformReport(Wa, MaList, self.ReportType).GenerateReport(File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, self.ReportType)
+                    PlatformReport(Wa, MaList, self.ReportType).GenerateReport(File, BuildDuration, AutoGenTime, MakeTime, GenFdsTime, self.ReportType, PredictedMakeTime)
                 Content = FileLinesSplit(File.getvalue(), gLineMaxLength)
                 SaveFileOnChange(self.ReportFile, Content, True)
                 EdkLogger.quiet("Build report can be found at %s" % os.path.abspath(self.ReportFile))
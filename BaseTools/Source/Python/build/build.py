@@ -17,6 +17,7 @@
 # Import Modules
 #
 import Common.LongFilePathOs as os
+from os import getpid
 import re
 import StringIO
 import sys
@@ -26,7 +27,9 @@ import platform
 import traceback
 import encodings.ascii
 import itertools
+import heapq
 import multiprocessing
+import logging
 
 from struct import *
 from threading import *
@@ -41,9 +44,15 @@ from Common.ToolDefClassObject import *
 from Common.DataType import *
 from Common.BuildVersion import gBUILD_VERSION
 from AutoGen.AutoGen import *
+from AutoGen import GenMake
 from Common.BuildToolError import *
 from Workspace.WorkspaceDatabase import *
 from Common.MultipleWorkspace import MultipleWorkspace as mws
+from Common.BinaryCache import BinaryCache
+from Common.FileDigestCache import FileDigestCache
+from Common.PeCoffRebase import RebaseImage
+from Common.PeCoffRebase import SetImageAddress
+from multiprocessing.pool import ThreadPool
 
 from BuildReport import BuildReport
 from GenPatchPcdTable.GenPatchPcdTable import *
@@ -52,6 +61,7 @@ from PatchPcdValue.PatchPcdValue import *
 import Common.EdkLogger
 import Common.GlobalData as GlobalData
 from GenFds.GenFds import GenFds
+from GenFds.GenFds import GenFdsInBuild
 
 # Version and Copyright
 VersionNumber = "0.60" + ' ' + gBUILD_VERSION
@@ -326,6 +336,51 @@ def LaunchCommand(Command, WorkingDir):
         EdkLogger.error("build", COMMAND_FAILURE, ExtraData="%s [%s]" % (Command, WorkingDir))
     return "%dms" % (int(round((time.time() - BeginTime) * 1000)))
 
+## The work list of AutoGen worker processes
+#
+# Each item is a tuple of (ModuleAutoGen, GenFfsList, CreateCodeFile, CreateMakeFile).
+# The worker processes are forked from the build process, so they inherit the
+# platform, PCD and module information already in memory at once, instead of
+# receiving them in serialized form for each module.
+#
+gAutoGenWorkList = []
+
+## Initialize an AutoGen worker process
+#
+# The locks of log handlers might be held by other threads of the build process
+# when it's forked. Re-create them to avoid dead lock in worker process.
+#
+# The entries added into the include index are recorded, so that they're sent
+# back and kept by the build process.
+#
+def AutoGenWorkerInit():
+    logging._lock = threading.RLock()
+    for Logger in logging.Logger.manager.loggerDict.values():
+        for Handler in getattr(Logger, 'handlers', []):
+            Handler.createLock()
+    GenMake.StartIncludeIndexUpdates()
+
+## Generate AutoGen code and makefile of one module in AutoGen worker process
+#
+# @param  Index     The index of the module in gAutoGenWorkList
+#
+# @retval tuple     (Index, ErrorCode, ErrorInfo, IsCodeFileCreated, IsMakeFileCreated, DepexGenerated,
+#                   entries added into include index)
+#
+def AutoGenWorker(Index):
+    Ma, GenFfsList, CreateCodeFile, CreateMakeFile = gAutoGenWorkList[Index]
+    try:
+        if CreateCodeFile:
+            Ma.CreateCodeFile(False)
+        if CreateMakeFile:
+            Ma.CreateMakeFile(False, GenFfsList or [])
+    except FatalError, X:
+        return (Index, X.args[0], None, False, False, False, GenMake.GetIncludeIndexUpdates())
+    except:
+        return (Index, CODE_ERROR, traceback.format_exc(), False, False, False, GenMake.GetIncludeIndexUpdates())
+    return (Index, 0, None, Ma.IsCodeFileCreated, Ma.IsMakeFileCreated, Ma.DepexGenerated,
+            GenMake.GetIncludeIndexUpdates())
+
 ## The smallest unit that can be built in multi-thread build mode
 #
 # This is the base class of build unit. The "Obj" parameter must provide
@@ -436,29 +491,59 @@ class PlatformMakeUnit(BuildUnit):
 # This class manages the build tasks in multi-thread build mode. Its jobs include
 # scheduling thread running, catching thread error, monitor the thread status, etc.
 #
+# Scheduling is event driven. Each task keeps a counter of its uncompleted
+# dependencies and a list of the tasks depending on it. When a task completes,
+# the counters of its dependents are decreased, and the ones reaching zero are
+# moved into the ready queue at once. All queues are protected by one condition
+# variable, which is notified whenever the scheduler has something to do.
+#
+# Among the ready tasks, the one with the longest estimated remaining critical
+# path is started first, so that long-running modules don't stretch the tail of
+# the build. The estimation is based on the make duration of each module in
+# previous builds, which is kept in a small statistics file in build directory.
+#
 class BuildTask:
     # queue for tasks waiting for schedule
     _PendingQueue = sdict()
-    _PendingQueueLock = threading.Lock()
 
     # queue for tasks ready for running
     _ReadyQueue = sdict()
-    _ReadyQueueLock = threading.Lock()
+    # heap of (negative critical path, sequence, task) of ready tasks, the entries
+    # of tasks started or whose critical path became longer are skipped when popped
+    _ReadyHeap = []
+    _ReadySequence = itertools.count()
 
     # queue for run tasks
     _RunningQueue = sdict()
-    _RunningQueueLock = threading.Lock()
 
     # queue containing all build tasks, in case duplicate build
     _TaskQueue = sdict()
 
+    # condition variable protecting all above queues and waking up the scheduler
+    _SchedulerCondition = threading.Condition()
+
     # flag indicating error occurs in a running thread
     _ErrorFlag = threading.Event()
     _ErrorFlag.clear()
     _ErrorMessage = ""
 
-    # BoundedSemaphore object used to control the number of running threads
-    _Thread = None
+    # the maximum number of running threads
+    _MaxThreadNumber = 1
+
+    # file keeping the make duration of build objects between builds
+    _StatisticsFile = None
+    # estimated make duration (in seconds) of build objects, from previous builds
+    _EstimatedTime = {}
+    _DefaultEstimatedTime = 1.0
+    # actual make duration (in seconds) of build objects in current build
+    _ActualTime = {}
+    # start time of the first task and end time of the last task
+    _StartTime = None
+    _EndTime = None
+
+    # predicted and actual makespan (in seconds) of last scheduler session
+    PredictedMakespan = 0
+    ActualMakespan = 0
 
     # flag indicating if the scheduler is started or not
     _SchedulerStopped = threading.Event()
@@ -468,103 +553,241 @@ class BuildTask:
     #
     #   @param  MaxThreadNumber     The maximum thread number
     #   @param  ExitFlag            Flag used to end the scheduler
+    #   @param  StatisticsFile      File keeping the make duration of modules
     #
     @staticmethod
-    def StartScheduler(MaxThreadNumber, ExitFlag):
-        SchedulerThread = Thread(target=BuildTask.Scheduler, args=(MaxThreadNumber, ExitFlag))
+    def StartScheduler(MaxThreadNumber, ExitFlag, StatisticsFile=None):
+        # mark the scheduler as started before the thread runs, so that no
+        # caller can see it stopped in between
+        BuildTask._SchedulerStopped.clear()
+        SchedulerThread = Thread(target=BuildTask.Scheduler, args=(MaxThreadNumber, ExitFlag, StatisticsFile))
         SchedulerThread.setName("Build-Task-Scheduler")
         SchedulerThread.setDaemon(False)
         SchedulerThread.start()
-        # wait for the scheduler to be started, especially useful in Linux
-        while not BuildTask.IsOnGoing():
-            time.sleep(0.01)
 
     ## Scheduler method
     #
+    #   The scheduler sleeps on the condition variable until a task becomes
+    #   ready, a running task completes, an error occurs, or it's asked to exit.
+    #
     #   @param  MaxThreadNumber     The maximum thread number
     #   @param  ExitFlag            Flag used to end the scheduler
+    #   @param  StatisticsFile      File keeping the make duration of modules
     #
     @staticmethod
-    def Scheduler(MaxThreadNumber, ExitFlag):
+    def Scheduler(MaxThreadNumber, ExitFlag, StatisticsFile=None):
         BuildTask._SchedulerStopped.clear()
+        BuildTask._SchedulerCondition.acquire()
         try:
-            # use BoundedSemaphore to control the maximum running threads
-            BuildTask._Thread = BoundedSemaphore(MaxThreadNumber)
-            #
-            # scheduling loop, which will exits when no pending/ready task and
-            # indicated to do so, or there's error in running thread
-            #
-            while (len(BuildTask._PendingQueue) > 0 or len(BuildTask._ReadyQueue) > 0 \
-                   or not ExitFlag.isSet()) and not BuildTask._ErrorFlag.isSet():
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Pending Queue (%d), Ready Queue (%d)"
-                                % (len(BuildTask._PendingQueue), len(BuildTask._ReadyQueue)))
-
-                # get all pending tasks
-                BuildTask._PendingQueueLock.acquire()
-                BuildObjectList = BuildTask._PendingQueue.keys()
+            try:
+                BuildTask._MaxThreadNumber = max(MaxThreadNumber, 1)
+                BuildTask._LoadStatistics(StatisticsFile)
                 #
-                # check if their dependency is resolved, and if true, move them
-                # into ready queue
+                # scheduling loop, which will exits when no pending/ready task and
+                # indicated to do so, or there's error in running thread
                 #
-                for BuildObject in BuildObjectList:
-                    Bt = BuildTask._PendingQueue[BuildObject]
-                    if Bt.IsReady():
-                        BuildTask._ReadyQueue[BuildObject] = BuildTask._PendingQueue.pop(BuildObject)
-                BuildTask._PendingQueueLock.release()
-
-                # launch build thread until the maximum number of threads is reached
                 while not BuildTask._ErrorFlag.isSet():
-                    # empty ready queue, do nothing further
-                    if len(BuildTask._ReadyQueue) == 0:
+                    EdkLogger.debug(EdkLogger.DEBUG_8, "Pending Queue (%d), Ready Queue (%d), Running Queue (%d)"
+                                    % (len(BuildTask._PendingQueue), len(BuildTask._ReadyQueue), len(BuildTask._RunningQueue)))
+
+                    # launch build thread until the maximum number of threads is reached
+                    while len(BuildTask._ReadyQueue) > 0 and len(BuildTask._RunningQueue) < BuildTask._MaxThreadNumber:
+                        # start the task on the longest critical path first
+                        Bt = BuildTask._PopReady()
+                        BuildTask._RunningQueue[Bt.BuildItem] = Bt
+                        if BuildTask._StartTime == None:
+                            BuildTask._StartTime = time.time()
+                        Bt.Start()
+
+                    if len(BuildTask._PendingQueue) == 0 and len(BuildTask._ReadyQueue) == 0 and ExitFlag.isSet():
                         break
 
-                    # wait for active thread(s) exit
-                    BuildTask._Thread.acquire(True)
-
-                    # start a new build thread
-                    Bo = BuildTask._ReadyQueue.keys()[0]
-                    Bt = BuildTask._ReadyQueue.pop(Bo)
-
-                    # move into running queue
-                    BuildTask._RunningQueueLock.acquire()
-                    BuildTask._RunningQueue[Bo] = Bt
-                    BuildTask._RunningQueueLock.release()
-
-                    Bt.Start()
-                    # avoid tense loop
-                    time.sleep(0.01)
-
-                # avoid tense loop
-                time.sleep(0.01)
-
-            # wait for all running threads exit
-            if BuildTask._ErrorFlag.isSet():
-                EdkLogger.quiet("\nWaiting for all build threads exit...")
-            # while not BuildTask._ErrorFlag.isSet() and \
-            while len(BuildTask._RunningQueue) > 0:
-                EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
-                EdkLogger.debug(EdkLogger.DEBUG_8, "Threads [%s]" % ", ".join([Th.getName() for Th in threading.enumerate()]))
-                # avoid tense loop
-                time.sleep(0.1)
-        except BaseException, X:
-            #
-            # TRICK: hide the output of threads left runing, so that the user can
-            #        catch the error message easily
-            #
-            EdkLogger.SetLevel(EdkLogger.ERROR)
-            BuildTask._ErrorFlag.set()
-            BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
-
-        BuildTask._PendingQueue.clear()
-        BuildTask._ReadyQueue.clear()
-        BuildTask._RunningQueue.clear()
-        BuildTask._TaskQueue.clear()
+                    # wait for the next event: new/ready task, completed task, exit or error
+                    BuildTask._SchedulerCondition.wait()
+
+                # wait for all running threads exit
+                if BuildTask._ErrorFlag.isSet():
+                    EdkLogger.quiet("\nWaiting for all build threads exit...")
+                while len(BuildTask._RunningQueue) > 0:
+                    EdkLogger.verbose("Waiting for thread ending...(%d)" % len(BuildTask._RunningQueue))
+                    EdkLogger.debug(EdkLogger.DEBUG_8, "Threads [%s]" % ", ".join([Th.getName() for Th in threading.enumerate()]))
+                    BuildTask._SchedulerCondition.wait()
+
+                if not BuildTask._ErrorFlag.isSet():
+                    BuildTask._ReportMakespan()
+                    BuildTask._SaveStatistics()
+            except BaseException, X:
+                #
+                # TRICK: hide the output of threads left runing, so that the user can
+                #        catch the error message easily
+                #
+                EdkLogger.SetLevel(EdkLogger.ERROR)
+                BuildTask._ErrorFlag.set()
+                BuildTask._ErrorMessage = "build thread scheduler error\n\t%s" % str(X)
+
+            BuildTask._PendingQueue.clear()
+            BuildTask._ReadyQueue.clear()
+            BuildTask._RunningQueue.clear()
+            BuildTask._TaskQueue.clear()
+            del BuildTask._ReadyHeap[:]
+        finally:
+            BuildTask._SchedulerCondition.release()
         BuildTask._SchedulerStopped.set()
 
+    ## Load the make duration of build objects recorded in previous builds
+    #
+    #   Each line of the statistics file is in the format of "<build object>|<seconds>".
+    #   Build objects never built before are estimated with the average duration.
+    #
+    #   @param  StatisticsFile      File keeping the make duration of modules
+    #
+    @staticmethod
+    def _LoadStatistics(StatisticsFile):
+        BuildTask._StatisticsFile = StatisticsFile
+        BuildTask._EstimatedTime = {}
+        BuildTask._ActualTime = {}
+        BuildTask._StartTime = None
+        BuildTask._EndTime = None
+        BuildTask.PredictedMakespan = 0
+        BuildTask.ActualMakespan = 0
+        if StatisticsFile and os.path.isfile(StatisticsFile):
+            try:
+                for Line in open(StatisticsFile, 'r'):
+                    Key, Duration = Line.rstrip().rsplit('|', 1)
+                    BuildTask._EstimatedTime[Key] = float(Duration)
+            except:
+                EdkLogger.verbose("Ignore the broken build time statistics file %s" % StatisticsFile)
+                BuildTask._EstimatedTime = {}
+        if BuildTask._EstimatedTime:
+            BuildTask._DefaultEstimatedTime = sum(BuildTask._EstimatedTime.values()) / len(BuildTask._EstimatedTime)
+        else:
+            BuildTask._DefaultEstimatedTime = 1.0
+
+        #
+        # The tasks created before the scheduler starts were estimated without
+        # the statistics, calculate their critical paths again
+        #
+        for Bt in BuildTask._TaskQueue.values():
+            Bt.CriticalPath = BuildTask._EstimatedDuration(Bt)
+        for Bt in BuildTask._TaskQueue.values():
+            if not Bt.DependentList:
+                for DepTask in Bt.DependencyList:
+                    BuildTask._ExtendCriticalPath(DepTask, Bt.CriticalPath)
+        del BuildTask._ReadyHeap[:]
+        for Bt in BuildTask._ReadyQueue.values():
+            BuildTask._PushReady(Bt)
+
+    ## Save the make duration of build objects for next builds
+    #
+    #   The new estimation is the average of the old estimation and the actual
+    #   duration, in order to smooth the noise of one build.
+    #
+    @staticmethod
+    def _SaveStatistics():
+        if not BuildTask._StatisticsFile or not BuildTask._ActualTime:
+            return
+        Statistics = dict(BuildTask._EstimatedTime)
+        for Key in BuildTask._ActualTime:
+            if Key in Statistics:
+                Statistics[Key] = (Statistics[Key] + BuildTask._ActualTime[Key]) / 2
+            else:
+                Statistics[Key] = BuildTask._ActualTime[Key]
+        Content = ''.join(["%s|%.3f\n" % (Key, Statistics[Key]) for Key in sorted(Statistics)])
+        try:
+            SaveFileOnChange(BuildTask._StatisticsFile, Content, False)
+        except:
+            EdkLogger.verbose("Failed to save build time statistics file %s" % BuildTask._StatisticsFile)
+
+    ## Get the estimated make duration of a task
+    #
+    #   @param  Bt      The BuildTask object
+    #
+    @staticmethod
+    def _EstimatedDuration(Bt):
+        return BuildTask._EstimatedTime.get(repr(Bt.BuildItem), BuildTask._DefaultEstimatedTime)
+
+    ## Update the critical paths for a new task depending on a task
+    #
+    #   The critical path of a task is its estimated duration plus the longest
+    #   critical path of the tasks depending on it. A new dependent can only make
+    #   it longer, and the change is passed on to the tasks it depends on, until
+    #   a task's critical path isn't changed. The ready tasks got a longer critical
+    #   path are pushed into the heap again. The caller must hold the _SchedulerCondition.
+    #
+    #   @param  Bt              The BuildTask object the new task depends on
+    #   @param  DependentPath   The critical path of the new task
+    #
+    @staticmethod
+    def _ExtendCriticalPath(Bt, DependentPath):
+        TaskList = [(Bt, DependentPath)]
+        while TaskList:
+            Bt, DependentPath = TaskList.pop()
+            Length = BuildTask._EstimatedDuration(Bt) + DependentPath
+            if Bt.CompleteFlag or Length <= Bt.CriticalPath:
+                continue
+            Bt.CriticalPath = Length
+            if BuildTask._ReadyQueue.get(Bt.BuildItem) is Bt:
+                BuildTask._PushReady(Bt)
+            for DepTask in Bt.DependencyList:
+                TaskList.append((DepTask, Length))
+
+    ## Add a task into the heap of ready tasks
+    #
+    #   The tasks with the same critical path are started in the order they're added.
+    #   The caller must hold the _SchedulerCondition.
+    #
+    #   @param  Bt      The BuildTask object
+    #
+    @staticmethod
+    def _PushReady(Bt):
+        heapq.heappush(BuildTask._ReadyHeap, (-Bt.CriticalPath, next(BuildTask._ReadySequence), Bt))
+
+    ## Remove the ready task with the longest critical path from the ready queue
+    #
+    #   The caller must hold the _SchedulerCondition, and make sure the ready queue is not empty.
+    #
+    #   @retval Bt      The BuildTask object
+    #
+    @staticmethod
+    def _PopReady():
+        while True:
+            Length, Sequence, Bt = heapq.heappop(BuildTask._ReadyHeap)
+            if -Length == Bt.CriticalPath and BuildTask._ReadyQueue.get(Bt.BuildItem) is Bt:
+                return BuildTask._ReadyQueue.pop(Bt.BuildItem)
+
+    ## Report the predicted and actual makespan of current scheduler session
+    #
+    #   The predicted makespan is the longer one of the critical path and the
+    #   total estimated duration shared by all threads.
+    #
+    @staticmethod
+    def _ReportMakespan():
+        TaskList = BuildTask._TaskQueue.values()
+        if not TaskList or BuildTask._StartTime == None:
+            return
+        CriticalPath = max([Bt.CriticalPath for Bt in TaskList])
+        TotalTime = sum([BuildTask._EstimatedDuration(Bt) for Bt in TaskList])
+        BuildTask.PredictedMakespan = max(CriticalPath, TotalTime / BuildTask._MaxThreadNumber)
+        BuildTask.ActualMakespan = BuildTask._EndTime - BuildTask._StartTime
+        EdkLogger.verbose("Makespan of %d build tasks: predicted %.2fs, actual %.2fs"
+                          % (len(TaskList), BuildTask.PredictedMakespan, BuildTask.ActualMakespan))
+
+    ## Wake up the scheduler to re-check the queues and the exit/error flags
+    #
+    @staticmethod
+    def _Notify():
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            BuildTask._SchedulerCondition.notify()
+        finally:
+            BuildTask._SchedulerCondition.release()
+
     ## Wait for all running method exit
     #
     @staticmethod
     def WaitForComplete():
+        # the exit flag may have been set just before, let scheduler know it
+        BuildTask._Notify()
         BuildTask._SchedulerStopped.wait()
 
     ## Check if the scheduler is running or not
@@ -603,29 +826,39 @@ class BuildTask:
     #   This method will check if a module is building or has been built. And if
     #   true, just return the associated BuildTask object in the _TaskQueue. If
     #   not, create and return a new BuildTask object. The new BuildTask object
-    #   will be appended to the _PendingQueue for scheduling later.
+    #   will be appended to the _PendingQueue, or to the _ReadyQueue directly if
+    #   all its dependencies have been completed.
     #
     #   @param  BuildItem       A BuildUnit object representing a build object
     #   @param  Dependency      The dependent build object of BuildItem
     #
     @staticmethod
     def New(BuildItem, Dependency=None):
-        if BuildItem in BuildTask._TaskQueue:
-            Bt = BuildTask._TaskQueue[BuildItem]
-            return Bt
-
-        Bt = BuildTask()
-        Bt._Init(BuildItem, Dependency)
-        BuildTask._TaskQueue[BuildItem] = Bt
-
-        BuildTask._PendingQueueLock.acquire()
-        BuildTask._PendingQueue[BuildItem] = Bt
-        BuildTask._PendingQueueLock.release()
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            if BuildItem in BuildTask._TaskQueue:
+                Bt = BuildTask._TaskQueue[BuildItem]
+                return Bt
+
+            Bt = BuildTask()
+            Bt._Init(BuildItem, Dependency)
+            BuildTask._TaskQueue[BuildItem] = Bt
+
+            if Bt.IsReady():
+                BuildTask._ReadyQueue[BuildItem] = Bt
+                BuildTask._PushReady(Bt)
+                BuildTask._SchedulerCondition.notify()
+            else:
+                BuildTask._PendingQueue[BuildItem] = Bt
+        finally:
+            BuildTask._SchedulerCondition.release()
 
         return Bt
 
     ## The real constructor of BuildTask
     #
+    #   The caller must hold the _SchedulerCondition.
+    #
     #   @param  BuildItem       A BuildUnit object representing a build object
     #   @param  Dependency      The dependent build object of BuildItem
     #
@@ -633,34 +866,53 @@ class BuildTask:
         self.BuildItem = BuildItem
 
         self.DependencyList = []
+        # the tasks depending on this task
+        self.DependentList = []
+        # number of dependent build tasks not completed yet
+        self.PendingDependency = 0
+        # flag indicating build completes, used to avoid unnecessary re-build
+        self.CompleteFlag = False
+        # estimated length of the critical path starting from this task
+        self.CriticalPath = BuildTask._EstimatedDuration(self)
+
         if Dependency == None:
             Dependency = BuildItem.Dependency
         else:
             Dependency.extend(BuildItem.Dependency)
         self.AddDependency(Dependency)
-        # flag indicating build completes, used to avoid unnecessary re-build
-        self.CompleteFlag = False
 
     ## Check if all dependent build tasks are completed or not
     #
     def IsReady(self):
-        ReadyFlag = True
-        for Dep in self.DependencyList:
-            if Dep.CompleteFlag == True:
-                continue
-            ReadyFlag = False
-            break
-
-        return ReadyFlag
+        return self.PendingDependency == 0
 
     ## Add dependent build task
     #
+    #   The caller must hold the _SchedulerCondition.
+    #
     #   @param  Dependency      The list of dependent build objects
     #
     def AddDependency(self, Dependency):
         for Dep in Dependency:
             if not Dep.BuildObject.IsBinaryModule:
-                self.DependencyList.append(BuildTask.New(Dep))    # BuildTask list
+                DepTask = BuildTask.New(Dep)
+                self.DependencyList.append(DepTask)    # BuildTask list
+                if not DepTask.CompleteFlag:
+                    self.PendingDependency += 1
+                    DepTask.DependentList.append(self)
+                    BuildTask._ExtendCriticalPath(DepTask, self.CriticalPath)
+
+    ## Mark the task as completed and release the tasks depending on it
+    #
+    #   The caller must hold the _SchedulerCondition.
+    #
+    def _Complete(self):
+        self.CompleteFlag = True
+        for Bt in self.DependentList:
+            Bt.PendingDependency -= 1
+            if Bt.PendingDependency == 0 and Bt.BuildItem in BuildTask._PendingQueue:
+                BuildTask._ReadyQueue[Bt.BuildItem] = BuildTask._PendingQueue.pop(Bt.BuildItem)
+                BuildTask._PushReady(Bt)
 
     ## The thread wrapper of LaunchCommand function
     #
@@ -668,9 +920,11 @@ class BuildTask:
     # @param  WorkingDir            The directory in which the program will be running
     #
     def _CommandThread(self, Command, WorkingDir):
+        Succeeded = False
+        BeginTime = time.time()
         try:
             self.BuildItem.BuildObject.BuildTime = LaunchCommand(Command, WorkingDir)
-            self.CompleteFlag = True
+            Succeeded = True
         except:
             #
             # TRICK: hide the output of threads left runing, so that the user can
@@ -683,14 +937,20 @@ class BuildTask:
                                                                   self.BuildItem.BuildObject.BuildTarget
                                                                  )
             EdkLogger.SetLevel(EdkLogger.ERROR)
-            BuildTask._ErrorFlag.set()
             BuildTask._ErrorMessage = "%s broken\n    %s [%s]" % \
                                       (threading.currentThread().getName(), Command, WorkingDir)
+            BuildTask._ErrorFlag.set()
         # indicate there's a thread is available for another build task
-        BuildTask._RunningQueueLock.acquire()
-        BuildTask._RunningQueue.pop(self.BuildItem)
-        BuildTask._RunningQueueLock.release()
-        BuildTask._Thread.release()
+        BuildTask._SchedulerCondition.acquire()
+        try:
+            if Succeeded:
+                BuildTask._EndTime = time.time()
+                BuildTask._ActualTime[repr(self.BuildItem)] = BuildTask._EndTime - BeginTime
+                self._Complete()
+            BuildTask._RunningQueue.pop(self.BuildItem)
+            BuildTask._SchedulerCondition.notify()
+        finally:
+            BuildTask._SchedulerCondition.release()
 
     ## Start build task thread
     #
@@ -760,6 +1020,8 @@ class Build():
         self.SilentMode     = BuildOptions.SilentMode
         self.ThreadNumber   = BuildOptions.ThreadNumber
         self.SkipAutoGen    = BuildOptions.SkipAutoGen
+        self.AutoGenMultiProcess = BuildOptions.AutoGenMultiProcess
+        self.PipelineMake   = BuildOptions.PipelineMake
         self.Reparse        = BuildOptions.Reparse
         self.SkuId          = BuildOptions.SkuId
         if self.SkuId:
@@ -771,6 +1033,7 @@ class Build():
         self.ToolDef        = ToolDefClassObject()
         self.AutoGenTime    = 0
         self.MakeTime       = 0
+        self.PredictedMakeTime = 0
         self.GenFdsTime     = 0
         GlobalData.BuildOptionPcd     = BuildOptions.OptionPcd if BuildOptions.OptionPcd else {}
         #Set global flag for build mode
@@ -779,6 +1042,7 @@ class Build():
         GlobalData.gBinCacheDest   = BuildOptions.BinCacheDest
         GlobalData.gBinCacheSource = BuildOptions.BinCacheSource
         GlobalData.gEnableGenfdsMultiThread = BuildOptions.GenfdsMultiThread
+        GlobalData.gMetaFileStorage = BuildOptions.MetaFileStorage
 
         if GlobalData.gBinCacheDest and not GlobalData.gUseHashCache:
             EdkLogger.error("build", OPTION_NOT_SUPPORTED, ExtraData="--binary-destination must be used together with --hash.")
@@ -807,6 +1071,21 @@ class Build():
             if GlobalData.gBinCacheDest != None:
                 EdkLogger.error("build", OPTION_VALUE_INVALID, ExtraData="Invalid value of option --binary-destination.")
 
+        if BuildOptions.BinCacheSize < 0:
+            EdkLogger.error("build", OPTION_VALUE_INVALID, ExtraData="Invalid value of option --binary-cache-size.")
+        if GlobalData.gBinCacheSource or GlobalData.gBinCacheDest:
+            GlobalData.gBinCache = BinaryCache(GlobalData.gBinCacheSource or GlobalData.gBinCacheDest,
+                                               BuildOptions.BinCacheSize * 1024 * 1024)
+
+        if BuildOptions.GenFdsCacheSize < 0:
+            EdkLogger.error("build", OPTION_VALUE_INVALID, ExtraData="Invalid value of option --genfds-cache-size.")
+        if BuildOptions.GenFdsCache:
+            GenFdsCache = os.path.normpath(BuildOptions.GenFdsCache)
+            if not os.path.isabs(GenFdsCache):
+                GenFdsCache = mws.join(self.WorkspaceDir, GenFdsCache)
+            GlobalData.gGenFdsCache = GenFdsCache
+            GlobalData.gGenFdsCacheSize = BuildOptions.GenFdsCacheSize
+
         if self.ConfDirectory:
             # Get alternate Conf location, if it is absolute, then just use the absolute directory name
             ConfDirectoryPath = os.path.normpath(self.ConfDirectory)
@@ -858,6 +1137,14 @@ class Build():
         EdkLogger.quiet("%-16s = %s" % ("CONF_PATH", GlobalData.gConfDirectory))
         self.InitPreBuild()
         self.InitPostBuild()
+        if GlobalData.gUseHashCache:
+            DigestCacheFile = None
+            if not BuildOptions.DisableCache:
+                DigestCacheFile = os.path.join(os.path.dirname(GlobalData.gDatabasePath), 'FileDigest.cache')
+            GlobalData.gFileDigestCache = FileDigestCache(DigestCacheFile, self.ThreadNumber)
+        self.DisableCache = BuildOptions.DisableCache
+        if not self.DisableCache:
+            self.RestoreBuildData()
         if self.Prebuild:
             EdkLogger.quiet("%-16s = %s" % ("PREBUILD", self.Prebuild))
         if self.Postbuild:
@@ -1389,7 +1676,7 @@ class Build():
 
         # genfds
         if Target == 'fds':
-            LaunchCommand(AutoGenObject.GenFdsCommand, AutoGenObject.MakeFileDir)
+            self._GenFds(AutoGenObject)
             return True
 
         # run
@@ -1416,6 +1703,38 @@ class Build():
                 EdkLogger.error("build", FILE_DELETE_FAILURE, ExtraData=str(X))
         return True
 
+    ## Update module images to new base address
+    #
+    # The images are updated in process, in the same way as GenFw does. GenFw
+    # is still launched for the images which can't be updated in process.
+    #
+    #   @param  ImageList   [(Image, WorkingDir, BaseAddress), ...]
+    #   @param  ModeIsSmm   Only set the address into section header, for SMM driver
+    #
+    def _RebaseImageList (self, ImageList, ModeIsSmm):
+        def RebaseOne(Item):
+            Image, WorkingDir, BaseAddress = Item
+            if not ModeIsSmm:
+                if not RebaseImage(Image, BaseAddress):
+                    LaunchCommand(["GenFw", "--rebase", str(BaseAddress), "-r", Image], WorkingDir)
+            else:
+                #
+                # Set new address to the section header only for SMM driver.
+                #
+                if not SetImageAddress(Image, BaseAddress):
+                    LaunchCommand(["GenFw", "--address", str(BaseAddress), "-r", Image], WorkingDir)
+
+        if self.ThreadNumber <= 1 or len(ImageList) <= 1:
+            for Item in ImageList:
+                RebaseOne(Item)
+            return
+        Pool = ThreadPool(min(self.ThreadNumber, len(ImageList)))
+        try:
+            Pool.map(RebaseOne, ImageList)
+        finally:
+            Pool.close()
+            Pool.join()
+
     ## Rebase module image and Get function address for the input module list.
     #
     def _RebaseModule (self, MapBuffer, BaseAddress, ModuleList, AddrIsOffset = True, ModeIsSmm = False):
@@ -1423,27 +1742,32 @@ class Build():
             AddrIsOffset = False
         InfFileNameList = ModuleList.keys()
         #InfFileNameList.sort()
+        #
+        # Get the base address of all modules first, then update all images at once
+        #
+        ModuleAddressList = []
+        ImageList = []
         for InfFile in InfFileNameList:
             sys.stdout.write (".")
             sys.stdout.flush()
             ModuleInfo = ModuleList[InfFile]
-            ModuleName = ModuleInfo.BaseName
             ModuleOutputImage = ModuleInfo.Image.FileName
             ModuleDebugImage  = os.path.join(ModuleInfo.DebugDir, ModuleInfo.BaseName + '.efi')
             ## for SMM module in SMRAM, the SMRAM will be allocated from base to top.
             if not ModeIsSmm:
                 BaseAddress = BaseAddress - ModuleInfo.Image.Size
-                #
-                # Update Image to new BaseAddress by GenFw tool
-                #
-                LaunchCommand(["GenFw", "--rebase", str(BaseAddress), "-r", ModuleOutputImage], ModuleInfo.OutputDir)
-                LaunchCommand(["GenFw", "--rebase", str(BaseAddress), "-r", ModuleDebugImage], ModuleInfo.DebugDir)
+                ModuleAddressList.append((ModuleInfo, BaseAddress))
             else:
-                #
-                # Set new address to the section header only for SMM driver.
-                #
-                LaunchCommand(["GenFw", "--address", str(BaseAddress), "-r", ModuleOutputImage], ModuleInfo.OutputDir)
-                LaunchCommand(["GenFw", "--address", str(BaseAddress), "-r", ModuleDebugImage], ModuleInfo.DebugDir)
+                ModuleAddressList.append((ModuleInfo, BaseAddress))
+                BaseAddress = BaseAddress + ModuleInfo.Image.Size
+            ImageList.append((ModuleOutputImage, ModuleInfo.OutputDir, ModuleAddressList[-1][1]))
+            ImageList.append((ModuleDebugImage, ModuleInfo.DebugDir, ModuleAddressList[-1][1]))
+        self._RebaseImageList(ImageList, ModeIsSmm)
+
+        for ModuleInfo, BaseAddress in ModuleAddressList:
+            ModuleName = ModuleInfo.BaseName
+            ModuleOutputImage = ModuleInfo.Image.FileName
+            ModuleDebugImage  = os.path.join(ModuleInfo.DebugDir, ModuleInfo.BaseName + '.efi')
             #
             # Collect funtion address from Map file
             #
@@ -1511,12 +1835,6 @@ class Build():
                     MapBuffer.write('  0x%010X    %s\n' % (BaseAddress + Function[1], Function[0]))
             ImageMap.close()
 
-            #
-            # for SMM module in SMRAM, the SMRAM will be allocated from base to top.
-            #
-            if ModeIsSmm:
-                BaseAddress = BaseAddress + ModuleInfo.Image.Size
-
     ## Collect MAP information of all FVs
     #
     def _CollectFvMapBuffer (self, MapBuffer, Wa, ModuleList):
@@ -1887,7 +2205,7 @@ class Build():
                             EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
                         # Start task scheduler
                         if not BuildTask.IsOnGoing():
-                            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag)
+                            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag, os.path.join(Wa.BuildDir, 'ModuleBuildTime.txt'))
 
                     # in case there's an interruption. we need a full version of makefile for platform
                     Pa.CreateMakeFile(False)
@@ -1898,6 +2216,7 @@ class Build():
                 MakeContiue = time.time()
                 ExitFlag.set()
                 BuildTask.WaitForComplete()
+                self.PredictedMakeTime += int(round(BuildTask.PredictedMakespan))
                 self.CreateAsBuiltInf()
                 self.MakeTime += int(round((time.time() - MakeContiue)))
                 if BuildTask.HasError():
@@ -1954,6 +2273,16 @@ class Build():
                     #
                     self._SaveMapFile (MapBuffer, Wa)
 
+    ## Generate flash images of platform in build process
+    #
+    # The workspace database and the FDF parsed by build are reused by GenFds.
+    #
+    #   @param  Wa      The WorkspaceAutoGen object of the platform
+    #
+    def _GenFds(self, Wa):
+        if GenFdsInBuild(Wa, GlobalData.gFdfParser, self.Db):
+            EdkLogger.error("build", COMMAND_FAILURE, "Failed to generate flash images", ExtraData=str(Wa))
+
     def _GenFfsCmd(self):
         CmdListDict = {}
         GenFfsDict = GenFds.GenFfsMakefile('', GlobalData.gFdfParser, self, self.ArchList, GlobalData)
@@ -2025,16 +2354,33 @@ class Build():
                             if Inf in Pa.Platform.Modules:
                                 continue
                             ModuleList.append(Inf)
+                    MaList = []
                     for Module in ModuleList:
                         # Get ModuleAutoGen object to generate C code file and makefile
                         Ma = ModuleAutoGen(Wa, Module, BuildTarget, ToolChain, Arch, self.PlatformFile)
                         
                         if Ma == None:
                             continue
+                        MaList.append((Module, Ma))
+                    if GlobalData.gUseHashCache:
+                        self._PrefetchModuleHashFiles([Ma for Module, Ma in MaList])
+
+                    AutoGenList = []
+                    for Module, Ma in MaList:
                         if Ma.CanSkipbyHash():
                             self.HashSkipModules.append(Ma)
                             continue
 
+                        GenFfsList = []
+                        if CmdListDict and self.Fdf and (Module.File, Arch) in CmdListDict:
+                            GenFfsList = CmdListDict[Module.File, Arch]
+                            del CmdListDict[Module.File, Arch]
+                        AutoGenList.append((Ma, GenFfsList))
+
+                    if self.AutoGenMultiProcess:
+                        AutoGenList = self._MultiProcessAutoGen(AutoGenList)
+
+                    for Ma, GenFfsList in AutoGenList:
                         # Not to auto-gen for targets 'clean', 'cleanlib', 'cleanall', 'run', 'fds'
                         if self.Target not in ['clean', 'cleanlib', 'cleanall', 'run', 'fds']:
                             # for target which must generate AutoGen code and makefile
@@ -2044,31 +2390,19 @@ class Build():
                                 continue
 
                             if not self.SkipAutoGen or self.Target == 'genmake':
-                                if CmdListDict and self.Fdf and (Module.File, Arch) in CmdListDict:
-                                    Ma.CreateMakeFile(True, CmdListDict[Module.File, Arch])
-                                    del CmdListDict[Module.File, Arch]
-                                else:
-                                    Ma.CreateMakeFile(True)
+                                Ma.CreateMakeFile(True, GenFfsList)
                             if self.Target == "genmake":
                                 continue
                         self.BuildModules.append(Ma)
+                        # start the make of the module at once, its makefile and
+                        # the ones of its libraries are ready
+                        if self.PipelineMake:
+                            self._StartModuleBuildTask(Wa, Pa, Ma, ExitFlag)
                     self.Progress.Stop("done!")
                     self.AutoGenTime += int(round((time.time() - AutoGenStart)))
                     MakeStart = time.time()
                     for Ma in self.BuildModules:
-                        # Generate build task for the module
-                        if not Ma.IsBinaryModule:
-                            Bt = BuildTask.New(ModuleMakeUnit(Ma, self.Target))
-                        # Break build if any build thread has error
-                        if BuildTask.HasError():
-                            # we need a full version of makefile for platform
-                            ExitFlag.set()
-                            BuildTask.WaitForComplete()
-                            Pa.CreateMakeFile(False)
-                            EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
-                        # Start task scheduler
-                        if not BuildTask.IsOnGoing():
-                            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag)
+                        self._StartModuleBuildTask(Wa, Pa, Ma, ExitFlag)
 
                     # in case there's an interruption. we need a full version of makefile for platform
                     Pa.CreateMakeFile(False)
@@ -2091,6 +2425,7 @@ class Build():
                 #
                 ExitFlag.set()
                 BuildTask.WaitForComplete()
+                self.PredictedMakeTime += int(round(BuildTask.PredictedMakespan))
                 self.CreateAsBuiltInf()
                 self.MakeTime += int(round((time.time() - MakeContiue)))
                 #
@@ -2130,7 +2465,7 @@ class Build():
                         # Generate FD image if there's a FDF file found
                         #
                         GenFdsStart = time.time()
-                        LaunchCommand(Wa.GenFdsCommand, os.getcwd())
+                        self._GenFds(Wa)
 
                         #
                         # Create MAP file for all platform FVs after GenFds.
@@ -2142,6 +2477,119 @@ class Build():
                     #
                     self._SaveMapFile(MapBuffer, Wa)
 
+    ## Create the build task of a module, and start the task scheduler if not yet
+    #
+    #   @param  Wa          The WorkspaceAutoGen object
+    #   @param  Pa          The PlatformAutoGen object the module belongs to
+    #   @param  Ma          The ModuleAutoGen object
+    #   @param  ExitFlag    Flag used to end the scheduler
+    #
+    def _StartModuleBuildTask(self, Wa, Pa, Ma, ExitFlag):
+        # Generate build task for the module
+        if not Ma.IsBinaryModule:
+            Bt = BuildTask.New(ModuleMakeUnit(Ma, self.Target))
+        # Break build if any build thread has error
+        if BuildTask.HasError():
+            # we need a full version of makefile for platform
+            ExitFlag.set()
+            BuildTask.WaitForComplete()
+            Pa.CreateMakeFile(False)
+            EdkLogger.error("build", BUILD_ERROR, "Failed to build module", ExtraData=GlobalData.gBuildingModule)
+        # Start task scheduler
+        if not BuildTask.IsOnGoing():
+            BuildTask.StartScheduler(self.ThreadNumber, ExitFlag, os.path.join(Wa.BuildDir, 'ModuleBuildTime.txt'))
+
+    ## Generate AutoGen code and makefile of modules in multiple processes
+    #
+    #   Libraries are generated at first, so that each of them is generated only
+    #   once even if it's used by many modules. The ModuleAutoGen objects in build
+    #   process are then updated with the results of the workers, which makes the
+    #   later CreateCodeFile()/CreateMakeFile() calls on them do nothing.
+    #
+    #   The worker processes must be forked from the build process. On Windows,
+    #   AutoGen is done in build process as usual.
+    #
+    #   @param  AutoGenList     List of (ModuleAutoGen, GenFfsList) to generate
+    #
+    #   @retval generator       (ModuleAutoGen, GenFfsList) of the modules in
+    #                           the order their AutoGen completes
+    #
+    def _MultiProcessAutoGen(self, AutoGenList):
+        global gAutoGenWorkList
+
+        if self.SkipAutoGen or self.Target not in ['', 'all'] or not AutoGenList:
+            for Item in AutoGenList:
+                yield Item
+            return
+        if platform.system() == 'Windows':
+            EdkLogger.verbose("Multi-process AutoGen is not supported on Windows")
+            for Item in AutoGenList:
+                yield Item
+            return
+        #
+        # Forking while build threads are running may leave the locks held by them
+        # locked forever in worker processes
+        #
+        if BuildTask.IsOnGoing():
+            EdkLogger.verbose("Multi-process AutoGen is not used while modules are being built")
+            for Item in AutoGenList:
+                yield Item
+            return
+
+        LibraryList = []
+        LibrarySet = set()
+        for Ma, GenFfsList in AutoGenList:
+            if Ma.IsLibrary:
+                continue
+            for La in Ma.LibraryAutoGenList:
+                if La not in LibrarySet:
+                    LibrarySet.add(La)
+                    LibraryList.append(La)
+
+        # the GenFfsList of libraries is None, so that they're not returned
+        for WorkList in [[(La, None, True, True) for La in LibraryList],
+                         [(Ma, GenFfsList, True, True) for Ma, GenFfsList in AutoGenList]]:
+            if not WorkList:
+                continue
+            gAutoGenWorkList = WorkList
+            Pool = multiprocessing.Pool(min(self.ThreadNumber, len(WorkList)), AutoGenWorkerInit)
+            try:
+                for Index, ErrorCode, ErrorInfo, CodeFileCreated, MakeFileCreated, DepexGenerated, IncludeIndexUpdates \
+                        in Pool.imap_unordered(AutoGenWorker, range(len(WorkList))):
+                    Ma = WorkList[Index][0]
+                    GenMake.MergeIncludeIndexUpdates(IncludeIndexUpdates)
+                    if ErrorCode == CODE_ERROR and ErrorInfo:
+                        EdkLogger.error("build", CODE_ERROR, "Unknown fatal error when generating AutoGen files of [%s]" % repr(Ma),
+                                        ExtraData=ErrorInfo)
+                    elif ErrorCode:
+                        # the error message has been printed by worker process
+                        GlobalData.gProcessingFile = "%s [%s, %s, %s]" % (Ma.MetaFile, Ma.Arch, Ma.ToolChain, Ma.BuildTarget)
+                        raise FatalError(ErrorCode)
+                    Ma.IsCodeFileCreated = CodeFileCreated
+                    Ma.IsMakeFileCreated = MakeFileCreated
+                    Ma.DepexGenerated = DepexGenerated
+                    if WorkList[Index][1] is not None:
+                        yield (Ma, WorkList[Index][1])
+                Pool.close()
+            finally:
+                Pool.terminate()
+                Pool.join()
+                gAutoGenWorkList = []
+
+    ## Calculate digests of all files covered by module hash in parallel
+    #
+    #   @param  MaList      The list of ModuleAutoGen objects
+    #
+    def _PrefetchModuleHashFiles(self, MaList):
+        FileList = []
+        for Ma in MaList:
+            for Module in [Ma] + Ma.LibraryAutoGenList:
+                if Module.IsBinaryModule:
+                    continue
+                FileList.append(Module.MetaFile.Path)
+                FileList.extend(Module.HashFileList)
+        GlobalData.gFileDigestCache.Prefetch(FileList)
+
     ## Generate GuidedSectionTools.txt in the FV directories.
     #
     def CreateGuidedSectionToolsFile(self):
@@ -2245,24 +2693,39 @@ class Build():
             BuildTask.Abort()
         EdkLogger.SetLevel(OldLogLevel)
 
+    ## Save the include dependency index for next build
+    #
+    # The index is written into a temporary file first and then renamed, so
+    # that concurrent builds never read a partial file.
+    #
     def DumpBuildData(self):
         CacheDirectory = os.path.dirname(GlobalData.gDatabasePath)
         Utils.CreateDirectory(CacheDirectory)
-        Utils.DataDump(Utils.gFileTimeStampCache, os.path.join(CacheDirectory, "gFileTimeStampCache"))
-        Utils.DataDump(Utils.gDependencyDatabase, os.path.join(CacheDirectory, "gDependencyDatabase"))
+        FilePath = os.path.join(CacheDirectory, "gDependencyDatabase")
+        TempFile = "%s.%d" % (FilePath, getpid())
+        Utils.DataDump((Utils.gDependencyDatabaseVersion, Utils.gDependencyDatabase), TempFile)
+        try:
+            if os.path.exists(FilePath):
+                os.remove(FilePath)
+            os.rename(TempFile, FilePath)
+        except OSError, X:
+            EdkLogger.verbose("Failed to save [%s]\n\t%s" % (FilePath, str(X)))
+            if os.path.exists(TempFile):
+                os.remove(TempFile)
 
+    ## Restore the include dependency index saved by last build
+    #
+    # Entries are validated against the modified time and size of each file
+    # when used, so a stale index only costs re-scanning changed files.
+    #
     def RestoreBuildData(self):
-        FilePath = os.path.join(os.path.dirname(GlobalData.gDatabasePath), "gFileTimeStampCache")
-        if Utils.gFileTimeStampCache == {} and os.path.isfile(FilePath):
-            Utils.gFileTimeStampCache = Utils.DataRestore(FilePath)
-            if Utils.gFileTimeStampCache == None:
-                Utils.gFileTimeStampCache = {}
-
         FilePath = os.path.join(os.path.dirname(GlobalData.gDatabasePath), "gDependencyDatabase")
         if Utils.gDependencyDatabase == {} and os.path.isfile(FilePath):
-            Utils.gDependencyDatabase = Utils.DataRestore(FilePath)
-            if Utils.gDependencyDatabase == None:
-                Utils.gDependencyDatabase = {}
+            Data = Utils.DataRestore(FilePath)
+            # data saved by old tools is dropped
+            if type(Data) == type(()) and len(Data) == 2 and Data[0] == Utils.gDependencyDatabaseVersion:
+                # GenMake refers to the same dictionary object
+                Utils.gDependencyDatabase.update(Data[1])
 
 def ParseDefines(DefineList=[]):
     DefineDict = {}
@@ -2367,7 +2830,19 @@ def MyOptionParser():
     Parser.add_option("--hash", action="store_true", dest="UseHashCache", default=False, help="Enable hash-based caching during build process.")
     Parser.add_option("--binary-destination", action="store", type="string", dest="BinCacheDest", help="Generate a cache of binary files in the specified directory.")
     Parser.add_option("--binary-source", action="store", type="string", dest="BinCacheSource", help="Consume a cache of binary files from the specified directory.")
+    Parser.add_option("--binary-cache-size", action="store", type="int", dest="BinCacheSize", default=0,
+        help="Maximum size in MB of the binary cache. Least recently used modules are removed from the cache at the end of build. Default is 0, no limit.")
     Parser.add_option("--genfds-multi-thread", action="store_true", dest="GenfdsMultiThread", default=False, help="Enable GenFds multi thread to generate ffs file.")
+    Parser.add_option("--genfds-cache", action="store", type="string", dest="GenFdsCache",
+        help="Keep the outputs of tools called by GenFds in the specified directory, and reuse them for the same command and input files.")
+    Parser.add_option("--genfds-cache-size", action="store", type="int", dest="GenFdsCacheSize", default=0,
+        help="Maximum size in MB of the GenFds cache. Least recently used outputs are removed from the cache at the end of GenFds. Default is 0, no limit.")
+    Parser.add_option("--autogen-multi-process", action="store_true", dest="AutoGenMultiProcess", default=False,
+        help="Enable multi-process AutoGen of modules in multi-thread build mode. The number of processes is the same as thread number.")
+    Parser.add_option("--pipeline-make", action="store_true", dest="PipelineMake", default=False,
+        help="Start the make of a module as soon as its AutoGen is done in multi-thread build mode, instead of after the AutoGen of all modules.")
+    Parser.add_option("--metafile-storage", action="store", type="choice", choices=['sqlite', 'memory'], dest="MetaFileStorage", default='sqlite',
+        help="Storage of records parsed from INF/DEC/DSC files: 'sqlite' keeps them in tables of build database, 'memory' keeps them in memory of build process. Default is 'sqlite'.")
     (Opt, Args) = Parser.parse_args()
     return (Opt, Args)
 
@@ -2489,7 +2964,8 @@ def Main():
         for TmpTableName in TmpTableDict:
             SqlCommand = """drop table IF EXISTS %s""" % TmpTableName
             TmpTableDict[TmpTableName].execute(SqlCommand)
-        #MyBuild.DumpBuildData()
+        if not MyBuild.DisableCache:
+            MyBuild.DumpBuildData()
         #
         # All job done, no error found and no exception raised
         #
@@ -2559,10 +3035,17 @@ def Main():
         BuildDurationStr = time.strftime("%H:%M:%S", BuildDuration)
     if MyBuild != None:
         if not BuildError:
-            MyBuild.BuildReport.GenerateReport(BuildDurationStr, LogBuildTime(MyBuild.AutoGenTime), LogBuildTime(MyBuild.MakeTime), LogBuildTime(MyBuild.GenFdsTime))
+            MyBuild.BuildReport.GenerateReport(BuildDurationStr, LogBuildTime(MyBuild.AutoGenTime), LogBuildTime(MyBuild.MakeTime), LogBuildTime(MyBuild.GenFdsTime),
+                                               LogBuildTime(MyBuild.PredictedMakeTime))
         MyBuild.Db.Close()
+        if GlobalData.gFileDigestCache:
+            GlobalData.gFileDigestCache.Save()
+        if GlobalData.gBinCache:
+            GlobalData.gBinCache.Evict()
     EdkLogger.SetLevel(EdkLogger.QUIET)
     EdkLogger.quiet("\n- %s -" % Conclusion)
+    if GlobalData.gBinCache:
+        EdkLogger.quiet(GlobalData.gBinCache.GetSummary())
     EdkLogger.quiet(time.strftime("Build end time: %H:%M:%S, %b.%d %Y", time.localtime()))
     EdkLogger.quiet("Build total time: %s\n" % BuildDurationStr)
     return ReturnCode
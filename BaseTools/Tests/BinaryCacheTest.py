@@ -0,0 +1,141 @@
+## @file
+# Unit tests for the binary cache of build
+#
+#  Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import hashlib
+import os
+import sys
+import time
+import unittest
+
+import TestTools
+
+from Common.BinaryCache import BinaryCache
+
+class Tests(TestTools.BaseToolsTest):
+
+    def setUp(self):
+        TestTools.BaseToolsTest.setUp(self)
+        self.cacheDir = self.GetTmpFilePath('cache')
+        self.srcDir = self.GetTmpFilePath('src')
+        self.destDir = self.GetTmpFilePath('dest')
+        os.mkdir(self.srcDir)
+        os.mkdir(self.destDir)
+        self.cache = BinaryCache(self.cacheDir)
+        self.key = BinaryCache.GetKey('Module.inf', 'X64', 1)
+
+    def WriteSrcFile(self, fileName, data):
+        path = os.path.join(self.srcDir, fileName)
+        f = open(path, 'wb')
+        f.write(data)
+        f.close()
+        return (fileName, path)
+
+    def ReadDestFile(self, fileName):
+        f = open(os.path.join(self.destDir, fileName), 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def GetDestDir(self, fileName):
+        return self.destDir
+
+    def GetEntryDir(self, key):
+        return os.path.join(self.cacheDir, 'objects', key[:2], key)
+
+    def StoreFiles(self, cache, key, fileDict):
+        fileList = [self.WriteSrcFile(name, fileDict[name]) for name in sorted(fileDict)]
+        return cache.Store(key, fileList)
+
+    def testKey(self):
+        self.assertEqual(self.key, hashlib.md5('Module.inf|X64|1').hexdigest())
+        self.assertNotEqual(self.key, BinaryCache.GetKey('Module.inf', 'IA32', 1))
+
+    def testStoreAndRetrieve(self):
+        files = {'Module.efi' : '\0\1\2\3' * 100, 'Module.map' : 'map\r\n'}
+        self.assertTrue(self.StoreFiles(self.cache, self.key, files))
+        # an entry is never overwritten
+        self.assertFalse(self.StoreFiles(self.cache, self.key, {'Module.efi' : 'other'}))
+
+        manifest = open(os.path.join(self.GetEntryDir(self.key), BinaryCache._MANIFEST_), 'r').read()
+        self.assertEqual(manifest.splitlines(),
+                         ['%s %d %s' % (hashlib.md5(files[name]).hexdigest(), len(files[name]), name)
+                          for name in sorted(files)])
+
+        self.assertTrue(self.cache.Retrieve(self.key, self.GetDestDir))
+        for name in files:
+            self.assertEqual(self.ReadDestFile(name), files[name])
+        self.assertEqual(sorted(os.listdir(self.destDir)), sorted(files))
+        self.assertEqual(self.cache.GetSummary(), 'Binary cache: 1 hit(s), 0 miss(es), 1 stored, 0 evicted')
+        self.assertEqual(os.listdir(os.path.join(self.cacheDir, 'tmp')), [])
+
+    def testMiss(self):
+        self.assertFalse(self.cache.Retrieve(self.key, self.GetDestDir))
+        self.assertEqual(os.listdir(self.destDir), [])
+        self.assertEqual((self.cache.HitCount, self.cache.MissCount), (0, 1))
+
+    def testCorruptedEntry(self):
+        self.assertTrue(self.StoreFiles(self.cache, self.key, {'A.efi' : 'a' * 64, 'B.efi' : 'b' * 64}))
+        f = open(os.path.join(self.GetEntryDir(self.key), 'B.efi'), 'wb')
+        f.write('c' * 64)
+        f.close()
+        f = open(os.path.join(self.destDir, 'A.efi'), 'wb')
+        f.write('old')
+        f.close()
+
+        self.assertFalse(self.cache.Retrieve(self.key, self.GetDestDir))
+        self.assertEqual((self.cache.HitCount, self.cache.MissCount), (0, 1))
+        # the entry is removed, and nothing is left in destination
+        self.assertFalse(os.path.exists(self.GetEntryDir(self.key)))
+        self.assertEqual(os.listdir(self.destDir), ['A.efi'])
+        self.assertEqual(self.ReadDestFile('A.efi'), 'old')
+
+    def testInvalidManifest(self):
+        self.assertTrue(self.StoreFiles(self.cache, self.key, {'A.efi' : 'a'}))
+        f = open(os.path.join(self.GetEntryDir(self.key), BinaryCache._MANIFEST_), 'w')
+        f.write('invalid\n')
+        f.close()
+        self.assertFalse(self.cache.Retrieve(self.key, self.GetDestDir))
+        self.assertEqual(os.listdir(self.destDir), [])
+
+    def testEvict(self):
+        cache = BinaryCache(self.cacheDir, 250)
+        keyList = [BinaryCache.GetKey(index) for index in range(3)]
+        now = time.time()
+        for index in range(3):
+            self.assertTrue(self.StoreFiles(cache, keyList[index], {'%d.efi' % index : 'x' * 100}))
+            os.utime(self.GetEntryDir(keyList[index]), (now - 300 + index * 100, now - 300 + index * 100))
+        # the oldest entry becomes the most recently used one
+        self.assertTrue(cache.Retrieve(keyList[0], self.GetDestDir))
+
+        cache.Evict()
+        self.assertTrue(os.path.exists(self.GetEntryDir(keyList[0])))
+        self.assertFalse(os.path.exists(self.GetEntryDir(keyList[1])))
+        self.assertTrue(os.path.exists(self.GetEntryDir(keyList[2])))
+        self.assertEqual(cache.EvictCount, 1)
+        self.assertEqual(os.listdir(os.path.join(self.cacheDir, 'tmp')), [])
+
+    def testNoLimit(self):
+        for index in range(3):
+            self.assertTrue(self.StoreFiles(self.cache, BinaryCache.GetKey(index), {'%d.efi' % index : 'x' * 100}))
+        self.cache.Evict()
+        self.assertEqual(self.cache.EvictCount, 0)
+
+TheTestSuite = TestTools.MakeTheTestSuite(locals())
+
+if __name__ == '__main__':
+    allTests = TheTestSuite()
+    unittest.TextTestRunner().run(allTests)
@@ -0,0 +1,183 @@
+## @file
+# Unit tests for the in-process section and FFS file generation of GenFds
+#
+#  Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import os
+import shutil
+import sys
+import unittest
+
+import TestTools
+
+from GenFds import FfsBuilder
+
+#
+# The files in TestData are generated by the C tools from Image.efi, a small
+# X64 DXE driver built by GCC5 and converted by GenFw:
+#
+#   GenFw -t -o Image.te Image.efi
+#   GenSec -s EFI_SECTION_PE32 -o Image.pe32 Image.efi
+#   GenSec -s EFI_SECTION_TE -o Image.tesec Image.te
+#   GenSec -s EFI_SECTION_VERSION -n 1.0 -j 3 -o Version.sec
+#   GenSec -s EFI_SECTION_GUID_DEFINED -o Crc32.sec Image.pe32 Version.sec
+#   LzmaCompress -e -o Image.lzma Image.pe32
+#   GenSec -s EFI_SECTION_GUID_DEFINED -g EE4E5898-3914-4259-9D6E-DC7BD79403CF
+#          -r PROCESSING_REQUIRED -o Lzma.sec Image.lzma
+#   GenSec --sectionalign 1 --sectionalign 64 -o Aligned.bin Version.sec Image.pe32
+#   GenFfs -t EFI_FV_FILETYPE_DRIVER -g 8A9CC2B5-8C09-4C0C-87E4-0C2EC6B1E4B1
+#          -o Driver.ffs -i Image.pe32 -n 32 -i Version.sec
+#   GenFfs -t EFI_FV_FILETYPE_PEIM -g 3E0D9B51-7A74-4A51-8F4E-4A67B8C3F1A2 -x -s -a 128
+#          -o Peim.ffs -i Image.tesec -n 32 -i Version.sec
+#   GenFfs -t EFI_FV_FILETYPE_FREEFORM -g 6D2B3C4A-1E5F-4A7B-9C8D-0E1F2A3B4C5D
+#          -o Free.ffs -i Version.sec
+#
+DataDir = os.path.join(TestTools.TestsDir, 'TestData')
+
+LzmaGuid = 'EE4E5898-3914-4259-9D6E-DC7BD79403CF'
+DriverGuid = '8A9CC2B5-8C09-4C0C-87E4-0C2EC6B1E4B1'
+PeimGuid = '3E0D9B51-7A74-4A51-8F4E-4A67B8C3F1A2'
+FreeformGuid = '6D2B3C4A-1E5F-4A7B-9C8D-0E1F2A3B4C5D'
+
+class Tests(TestTools.BaseToolsTest):
+
+    def setUp(self):
+        TestTools.BaseToolsTest.setUp(self)
+        self.output = self.GetTmpFilePath('output')
+
+    def DataFile(self, fileName):
+        return os.path.join(DataDir, fileName)
+
+    def ReadDataFile(self, fileName):
+        f = open(self.DataFile(fileName), 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def ReadOutput(self):
+        f = open(self.output, 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def assertSection(self, reference, *args, **kwd):
+        self.assertTrue(FfsBuilder.GenSection(self.output, *args, **kwd))
+        self.assertEqual(self.ReadOutput(), self.ReadDataFile(reference))
+
+    def assertFfs(self, reference, *args, **kwd):
+        self.assertTrue(FfsBuilder.GenFfs(self.output, *args, **kwd))
+        self.assertEqual(self.ReadOutput(), self.ReadDataFile(reference))
+
+    def assertSectionFallback(self, *args, **kwd):
+        self.assertFalse(FfsBuilder.GenSection(self.output, *args, **kwd))
+        self.assertFalse(os.path.exists(self.output))
+
+    def assertFfsFallback(self, *args, **kwd):
+        self.assertFalse(FfsBuilder.GenFfs(self.output, *args, **kwd))
+        self.assertFalse(os.path.exists(self.output))
+
+    def testPe32Section(self):
+        self.assertSection('Image.pe32', [self.DataFile('Image.efi')], 'EFI_SECTION_PE32')
+
+    def testTeSection(self):
+        self.assertSection('Image.tesec', [self.DataFile('Image.te')], 'EFI_SECTION_TE')
+
+    def testVersionSection(self):
+        self.assertSection('Version.sec', [], 'EFI_SECTION_VERSION', Ver='1.0', BuildNumber='3')
+
+    def testCrc32Section(self):
+        self.assertSection('Crc32.sec', [self.DataFile('Image.pe32'), self.DataFile('Version.sec')],
+                           'EFI_SECTION_GUID_DEFINED')
+
+    def testGuidedSection(self):
+        self.assertSection('Lzma.sec', [self.DataFile('Image.lzma')], 'EFI_SECTION_GUID_DEFINED',
+                           LzmaGuid, GuidAttr=['PROCESSING_REQUIRED'])
+
+    def testAlignedSectionContents(self):
+        self.assertSection('Aligned.bin', [self.DataFile('Version.sec'), self.DataFile('Image.pe32')],
+                           InputAlign=['1', '64'])
+
+    def testSectionFallback(self):
+        self.assertSectionFallback([self.DataFile('Image.pe32')], 'EFI_SECTION_COMPRESSION')
+        self.assertSectionFallback([], 'EFI_SECTION_USER_INTERFACE')
+        self.assertSectionFallback([], 'EFI_SECTION_VERSION', Ver='"1.0 beta"')
+        self.assertSectionFallback([], 'EFI_SECTION_VERSION', Ver='1.0', BuildNumber='65536')
+        self.assertSectionFallback([self.DataFile('Image.lzma')], 'EFI_SECTION_GUID_DEFINED',
+                                   LzmaGuid, GuidAttr=['UNKNOWN'])
+        self.assertSectionFallback([self.DataFile('Image.efi'), self.DataFile('Image.te')], 'EFI_SECTION_PE32')
+        self.assertSectionFallback([self.DataFile('Image.pe32')], InputAlign=['1', '64'])
+        self.assertSectionFallback([self.GetTmpFilePath('missing')], 'EFI_SECTION_PE32')
+
+    def testDriverFfs(self):
+        self.assertFfs('Driver.ffs', [self.DataFile('Image.pe32'), self.DataFile('Version.sec')],
+                       'EFI_FV_FILETYPE_DRIVER', DriverGuid, SectionAlign=['32', None])
+
+    def testFixedFfs(self):
+        self.assertFfs('Peim.ffs', [self.DataFile('Image.tesec'), self.DataFile('Version.sec')],
+                       'EFI_FV_FILETYPE_PEIM', PeimGuid, True, True, '128', ['32', None])
+
+    def testFreeformFfs(self):
+        self.assertFfs('Free.ffs', [self.DataFile('Version.sec')], 'EFI_FV_FILETYPE_FREEFORM', FreeformGuid)
+
+    def testFfsFallback(self):
+        self.assertFfsFallback([self.DataFile('Image.pe32')], 'EFI_FV_FILETYPE_UNKNOWN', DriverGuid)
+        self.assertFfsFallback([self.DataFile('Image.pe32')], 'EFI_FV_FILETYPE_DRIVER',
+                               '00000000-0000-0000-0000-000000000000')
+        self.assertFfsFallback([self.DataFile('Image.pe32')], 'EFI_FV_FILETYPE_DRIVER', 'gDriverGuid')
+        self.assertFfsFallback([self.DataFile('Image.pe32')], 'EFI_FV_FILETYPE_DRIVER', DriverGuid, Align='64')
+        self.assertFfsFallback([], 'EFI_FV_FILETYPE_DRIVER', DriverGuid)
+        # the PEIM has no PE section
+        self.assertFfsFallback([self.DataFile('Version.sec')], 'EFI_FV_FILETYPE_PEIM', PeimGuid)
+        # the core has more than one PE section
+        self.assertFfsFallback([self.DataFile('Image.pe32'), self.DataFile('Image.tesec')],
+                               'EFI_FV_FILETYPE_DXE_CORE', DriverGuid)
+
+    def testGuidTool(self):
+        input = self.DataFile('Image.pe32')
+        if FfsBuilder.LzmaCompress == None:
+            self.assertFalse(FfsBuilder.GuidTool(self.output, [input], 'LzmaCompress', '-e'))
+            return
+        self.assertTrue(FfsBuilder.GuidTool(self.output, [input], 'LzmaCompress', '-e'))
+        self.assertEqual(self.ReadOutput(), self.ReadDataFile('Image.lzma'))
+
+    def testGuidToolFallback(self):
+        input = self.DataFile('Image.pe32')
+        self.assertFalse(FfsBuilder.GuidTool(self.output, [input], 'LzmaCompress', '-d'))
+        self.assertFalse(FfsBuilder.GuidTool(self.output, [input], 'LzmaCompress', '-e -z'))
+        self.assertFalse(FfsBuilder.GuidTool(self.output, [input], 'TianoCompress', '-e'))
+        self.assertFalse(FfsBuilder.GuidTool(self.output, [input, input], 'LzmaCompress', '-e'))
+        self.assertFalse(os.path.exists(self.output))
+
+    def testImageFileList(self):
+        ffsList = []
+        for fileName in ('Driver.ffs', 'Peim.ffs', 'Free.ffs'):
+            shutil.copy(self.DataFile(fileName), self.testDir)
+            ffsList.append(self.GetTmpFilePath(fileName))
+        self.assertEqual(FfsBuilder.GetImageFileList(ffsList),
+                         [self.GetTmpFilePath('Driver.efi'), 'Image.map',
+                          self.GetTmpFilePath('Peim.efi'), 'Image.map'])
+
+    def testImageFileListFallback(self):
+        self.assertEqual(FfsBuilder.GetImageFileList([self.GetTmpFilePath('missing.ffs')]), None)
+        f = self.OpenTmpFile('short.ffs', 'wb')
+        f.write(self.ReadDataFile('Driver.ffs')[:20])
+        f.close()
+        self.assertEqual(FfsBuilder.GetImageFileList([self.GetTmpFilePath('short.ffs')]), None)
+
+TheTestSuite = TestTools.MakeTheTestSuite(locals())
+
+if __name__ == '__main__':
+    allTests = TheTestSuite()
+    unittest.TextTestRunner().run(allTests)
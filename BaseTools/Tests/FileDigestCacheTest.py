@@ -0,0 +1,103 @@
+## @file
+# Unit tests for the file digest cache of build
+#
+#  Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import hashlib
+import os
+import sys
+import time
+import unittest
+
+import TestTools
+
+from Common.FileDigestCache import FileDigestCache
+
+class Tests(TestTools.BaseToolsTest):
+
+    def setUp(self):
+        TestTools.BaseToolsTest.setUp(self)
+        self.cacheFile = self.GetTmpFilePath('Digest.cache')
+
+    ## Write a file, whose modified time is long ago unless it's given
+    def WriteFile(self, fileName, data, mtime=None):
+        path = self.GetTmpFilePath(fileName)
+        f = open(path, 'wb')
+        f.write(data)
+        f.close()
+        if mtime == None:
+            mtime = int(time.time()) - 3600
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def testDigest(self):
+        path = self.WriteFile('A.c', 'int a;\n')
+        cache = FileDigestCache(None)
+        self.assertEqual(cache.GetDigest(path), hashlib.md5('int a;\n').hexdigest())
+
+    def testChangedFile(self):
+        cache = FileDigestCache(None)
+        path = self.WriteFile('A.c', 'int a;\n')
+        cache.GetDigest(path)
+        self.WriteFile('A.c', 'int ab;\n')
+        self.assertEqual(cache.GetDigest(path), hashlib.md5('int ab;\n').hexdigest())
+
+    def testSaveAndRestore(self):
+        mtime = int(time.time()) - 3600
+        path = self.WriteFile('A.c', 'int a;\n', mtime)
+        cache = FileDigestCache(self.cacheFile)
+        cache.GetDigest(path)
+        cache.Save()
+        self.assertTrue(os.path.exists(self.cacheFile))
+
+        # same size and modified time, the saved digest is used without reading the file
+        self.WriteFile('A.c', 'int b;\n', mtime)
+        cache = FileDigestCache(self.cacheFile)
+        self.assertEqual(cache.GetDigest(path), hashlib.md5('int a;\n').hexdigest())
+
+    def testRacyFile(self):
+        path = self.WriteFile('A.c', 'int a;\n', time.time())
+        cache = FileDigestCache(self.cacheFile)
+        self.assertEqual(cache.GetDigest(path), hashlib.md5('int a;\n').hexdigest())
+        # the digest of a file modified just now is not kept
+        cache.Save()
+        self.assertFalse(os.path.exists(self.cacheFile))
+
+    def testInvalidCacheFile(self):
+        f = open(self.cacheFile, 'wb')
+        f.write('invalid')
+        f.close()
+        path = self.WriteFile('A.c', 'int a;\n')
+        cache = FileDigestCache(self.cacheFile)
+        self.assertEqual(cache.GetDigest(path), hashlib.md5('int a;\n').hexdigest())
+
+    def testPrefetch(self):
+        pathList = [self.WriteFile('%d.c' % index, 'int a%d;\n' % index) for index in range(8)]
+        cache = FileDigestCache(self.cacheFile, 4)
+        cache.Prefetch(pathList + pathList)
+        cache.Save()
+
+        # all digests are saved
+        for index in range(8):
+            self.WriteFile('%d.c' % index, 'int b%d;\n' % index, os.stat(pathList[index]).st_mtime)
+        cache = FileDigestCache(self.cacheFile)
+        for index in range(8):
+            self.assertEqual(cache.GetDigest(pathList[index]), hashlib.md5('int a%d;\n' % index).hexdigest())
+
+TheTestSuite = TestTools.MakeTheTestSuite(locals())
+
+if __name__ == '__main__':
+    allTests = TheTestSuite()
+    unittest.TextTestRunner().run(allTests)
@@ -0,0 +1,110 @@
+## @file
+# Unit tests for the in-process rebase of PE/COFF images
+#
+#  Copyright (c) 2017, Intel Corporation. All rights reserved.<BR>
+#
+#  This program and the accompanying materials
+#  are licensed and made available under the terms and conditions of the BSD License
+#  which accompanies this distribution.  The full text of the license may be found at
+#  http://opensource.org/licenses/bsd-license.php
+#
+#  THE PROGRAM IS DISTRIBUTED UNDER THE BSD LICENSE ON AN "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR REPRESENTATIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED.
+#
+
+##
+# Import Modules
+#
+import os
+import struct
+import sys
+import unittest
+
+import TestTools
+
+from Common import PeCoffRebase
+
+#
+# The reference images in TestData are generated by GenFw from Image.efi:
+#
+#   GenFw --rebase 0x10000 -r ImageRebased.efi
+#   GenFw --address 0x20000 -r ImageAddress.efi
+#
+DataDir = os.path.join(TestTools.TestsDir, 'TestData')
+
+class Tests(TestTools.BaseToolsTest):
+
+    def setUp(self):
+        TestTools.BaseToolsTest.setUp(self)
+        f = open(os.path.join(DataDir, 'Image.efi'), 'rb')
+        self.image = f.read()
+        f.close()
+        self.peOffset = struct.unpack_from('<I', self.image, 0x3C)[0]
+
+    def ReadReference(self, fileName):
+        f = open(os.path.join(DataDir, fileName), 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def WriteImage(self, data):
+        f = self.OpenTmpFile('Image.efi', 'wb')
+        f.write(data)
+        f.close()
+        return self.GetTmpFilePath('Image.efi')
+
+    def ReadImage(self):
+        f = self.OpenTmpFile('Image.efi', 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def PatchImage(self, offset, format, value):
+        data = bytearray(self.image)
+        struct.pack_into(format, data, offset, value)
+        return str(data)
+
+    def testRebase(self):
+        self.assertTrue(PeCoffRebase.RebaseImage(self.WriteImage(self.image), 0x10000))
+        self.assertEqual(self.ReadImage(), self.ReadReference('ImageRebased.efi'))
+
+    def testRebaseAgain(self):
+        image = self.ReadReference('ImageRebased.efi')
+        self.assertTrue(PeCoffRebase.RebaseImage(self.WriteImage(image), 0x10000))
+        self.assertEqual(self.ReadImage(), image)
+
+    def testSetAddress(self):
+        self.assertTrue(PeCoffRebase.SetImageAddress(self.WriteImage(self.image), 0x20000))
+        self.assertEqual(self.ReadImage(), self.ReadReference('ImageAddress.efi'))
+
+    def assertFallback(self, data):
+        for function in (PeCoffRebase.RebaseImage, PeCoffRebase.SetImageAddress):
+            self.assertFalse(function(self.WriteImage(data), 0x10000))
+            self.assertEqual(self.ReadImage(), data)
+
+    def testNotPeImage(self):
+        self.assertFallback(self.ReadReference('Image.pe32'))
+        self.assertFallback(self.image[:0x3C])
+        self.assertFallback(self.image[:self.peOffset + 8])
+
+    def testUnsupportedMachine(self):
+        # ARM Thumb-2
+        self.assertFallback(self.PatchImage(self.peOffset + 4, '<H', 0x01C2))
+
+    def testRelocationsStripped(self):
+        characteristics = struct.unpack_from('<H', self.image, self.peOffset + 22)[0]
+        self.assertFallback(self.PatchImage(self.peOffset + 22, '<H', characteristics | 0x0001))
+
+    def testUnsupportedSubsystem(self):
+        # EFI_IMAGE_SUBSYSTEM_NATIVE
+        self.assertFallback(self.PatchImage(self.peOffset + 24 + 68, '<H', 1))
+
+    def testMissingFile(self):
+        self.assertFalse(PeCoffRebase.RebaseImage(self.GetTmpFilePath('missing.efi'), 0x10000))
+        self.assertFalse(PeCoffRebase.SetImageAddress(self.GetTmpFilePath('missing.efi'), 0x10000))
+
+TheTestSuite = TestTools.MakeTheTestSuite(locals())
+
+if __name__ == '__main__':
+    allTests = TheTestSuite()
+    unittest.TextTestRunner().run(allTests)
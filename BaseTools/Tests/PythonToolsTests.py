@@ -26,6 +26,14 @@ def TheTestSuite():
     suites.append(CheckPythonSyntax.TheTestSuite())
     import CheckUnicodeSourceFiles
     suites.append(CheckUnicodeSourceFiles.TheTestSuite())
+    import FfsBuilderTest
+    suites.append(FfsBuilderTest.TheTestSuite())
+    import PeCoffRebaseTest
+    suites.append(PeCoffRebaseTest.TheTestSuite())
+    import BinaryCacheTest
+    suites.append(BinaryCacheTest.TheTestSuite())
+    import FileDigestCacheTest
+    suites.append(FileDigestCacheTest.TheTestSuite())
     return unittest.TestSuite(suites)
 
 if __name__ == '__main__':